@@ -0,0 +1,203 @@
+"""
+Time the main backend stages of Molonaviz on synthetic sampling points, without any window.
+For every number of rows, a new database is created in a temporary directory and the following stages are timed:
+    -parse_raw_files: read the raw .csv files and convert the dates, as done when importing a point
+    -import_spoint: insert the raw measures in the database
+    -insert_cleaned_measures
+    -refresh_raw_measures, refresh_cleaned_measures, measures_table: load the measures models
+    -save_direct_model_results: save the results of a direct model
+    -update_summary
+    -prepare_measures_cold, prepare_measures_warm: prepare the cleaned measures for pyheatmy, then get them from the cache
+    -refresh_temp_map_cold, refresh_temp_map_warm, refresh_heat_fluxes, refresh_water_flux: load the results models, first from the database then from the cache
+The results are written to a JSON report, which can be compared with a previous one.
+
+Usage: python benchmarks/run_benchmarks.py --rows 10000 100000 --compare benchmarks/reports/previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from PyQt5 import QtCore
+from PyQt5.QtSql import QSqlDatabase
+
+from molonaviz.backend.StudyAndLabManager import StudyAndLabManager
+from molonaviz.backend.SamplingPointManager import SamplingPointManager
+from molonaviz.backend.SPointCoordinator import SPointCoordinator
+from molonaviz.backend.ComputationRuns import DIRECT_MODEL_RUN
+from molonaviz.utils.general import convertDates
+from molonaviz.utils import profiling
+
+import synthetic
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+
+class Timings:
+    """
+    Keep the best (smallest) time of every stage over several runs.
+    """
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name : str):
+        start = time.perf_counter()
+        yield
+        duration = time.perf_counter() - start
+        self.stages[name] = min(duration, self.stages.get(name, float("inf")))
+
+def run_once(nb_rows : int, args, timings : Timings, directory : str):
+    """
+    Create a database with a synthetic point of nb_rows measures in the given directory, and time every stage.
+    """
+    con = synthetic.create_database(directory)
+    try:
+        run_stages(con, nb_rows, args, timings, directory)
+    finally:
+        con.close()
+        del con
+        QSqlDatabase.removeDatabase("Benchmark")
+
+def run_stages(con : QSqlDatabase, nb_rows : int, args, timings : Timings, directory : str):
+    """
+    Time every stage. All the queries are deleted when this function returns, so the connection can then be removed.
+    """
+    manager = StudyAndLabManager(con)
+    manager.create_new_lab(synthetic.LAB_NAME, *synthetic.synthetic_lab())
+    manager.create_new_study(synthetic.STUDY_NAME, synthetic.LAB_NAME)
+
+    dfpress, dftemp = synthetic.synthetic_raw_measures(nb_rows, args.seed)
+    pressFile, tempFile = synthetic.write_raw_files(directory, dfpress, dftemp)
+    with timings.stage("parse_raw_files"):
+        dfpress = pd.read_csv(pressFile)
+        dfpress.columns = ["Date", "Voltage", "Temp_Stream"]
+        convertDates(dfpress)
+        dftemp = pd.read_csv(tempFile)
+        dftemp.columns = ["Date", "Temp1", "Temp2", "Temp3", "Temp4"]
+        convertDates(dftemp)
+    dfCleaned = synthetic.synthetic_cleaned_measures(dfpress, dftemp)
+
+    spointManager = SamplingPointManager(con, synthetic.STUDY_NAME)
+    infoDF, notice, scheme = synthetic.synthetic_spoint_files(directory)
+    with timings.stage("import_spoint"):
+        spointManager.create_new_spoint("SyntheticPoint", synthetic.PSENSOR_NAME, synthetic.SHAFT_NAME, notice, scheme, infoDF, dfpress, dftemp)
+
+    coordinator = SPointCoordinator(con, synthetic.STUDY_NAME, "SyntheticPoint")
+    with timings.stage("insert_cleaned_measures"):
+        coordinator.insert_cleaned_measures(dfCleaned)
+    with timings.stage("refresh_raw_measures"):
+        coordinator.refresh_measures_plots(True)
+    with timings.stage("refresh_cleaned_measures"):
+        coordinator.refresh_measures_plots(False)
+    with timings.stage("measures_table"):
+        table = coordinator.get_table_model(False)
+        table.data(table.index(table.rowCount() - 1, 0)) #Read the last page
+
+    with timings.stage("update_summary"):
+        coordinator.update_summary()
+
+    from molonaviz.backend.Compute import Compute #pyheatmy is only imported when a computation is run
+    compute = Compute(coordinator)
+    with timings.stage("prepare_measures_cold"):
+        compute.prepare_measures()
+    with timings.stage("prepare_measures_warm"):
+        compute.prepare_measures()
+    compute.col = synthetic.SyntheticColumn(min(nb_rows, args.result_dates), args.nb_cells, args.seed)
+    compute.start_run(DIRECT_MODEL_RUN, "Synthetic results", args.nb_cells)
+    with timings.stage("save_direct_model_results"):
+        compute.save_direct_model_results()
+    coordinator.set_run(compute.runID)
+    coordinator.cache.clear()
+    with timings.stage("refresh_temp_map_cold"):
+        coordinator.refresh_temp_map()
+    with timings.stage("refresh_temp_map_warm"):
+        coordinator.refresh_temp_map()
+    with timings.stage("refresh_heat_fluxes"):
+        coordinator.refresh_heat_fluxes()
+    with timings.stage("refresh_water_flux"):
+        coordinator.refresh_water_flux()
+
+def git_commit():
+    """
+    Return the current git commit of the repository, or None if it can't be found.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report : dict, previous : dict):
+    """
+    Print the time of every stage next to the time in a previous report.
+    """
+    print(f"\nComparison with the report of {previous['date']} (commit {previous['commit']}):")
+    previousResults = {result["rows"] : result["stages"] for result in previous["results"]}
+    for result in report["results"]:
+        before = previousResults.get(result["rows"])
+        if before is None:
+            continue
+        print(f"  {result['rows']} rows")
+        for name, seconds in result["stages"].items():
+            old = before.get(name)
+            if seconds is None or old is None:
+                continue
+            print(f"    {name:<28} {old:>10.3f}s -> {seconds:>10.3f}s  (x{seconds / old if old > 0 else float('nan'):.2f})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the backend stages of Molonaviz on synthetic sampling points.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="numbers of measures of the synthetic points (10k to 10M)")
+    parser.add_argument("--repeat", type=int, default=1, help="number of runs for every number of rows: the best time of every stage is kept")
+    parser.add_argument("--nb-cells", type=int, default=20, help="number of cells of the synthetic results")
+    parser.add_argument("--result-dates", type=int, default=10000, help="maximum number of dates of the synthetic results: results have nb_cells rows per date")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", action="store_true", help="also write the profiling records (see utils/profiling.py) next to the report")
+    parser.add_argument("--output", default=None, help="path of the JSON report (by default, a new file in benchmarks/reports)")
+    parser.add_argument("--compare", default=None, help="path of a previous JSON report to compare with")
+    args = parser.parse_args()
+
+    app = QtCore.QCoreApplication(sys.argv) #Required by the SQL drivers
+    date = datetime.now()
+    commit = git_commit()
+    output = args.output or os.path.join(REPORTS_DIR, f"{date.strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    if args.profile:
+        profiling.enable_profiling(os.path.splitext(output)[0] + "-profiling.jsonl")
+
+    report = {"date" : date.isoformat(timespec="seconds"), "commit" : commit, "python" : platform.python_version(), "platform" : platform.platform(),
+              "numpy" : np.__version__, "pandas" : pd.__version__, "qt" : QtCore.QT_VERSION_STR,
+              "parameters" : {"repeat" : args.repeat, "nb_cells" : args.nb_cells, "result_dates" : args.result_dates, "seed" : args.seed, "profile" : args.profile},
+              "results" : []}
+    for nb_rows in args.rows:
+        print(f"{nb_rows} rows")
+        timings = Timings()
+        for _ in range(args.repeat):
+            directory = tempfile.mkdtemp(prefix="molonaviz_benchmark_")
+            try:
+                run_once(nb_rows, args, timings, directory)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        for name, seconds in timings.stages.items():
+            if seconds is not None:
+                print(f"    {name:<28} {seconds:>10.3f}s")
+        report["results"].append({"rows" : nb_rows, "stages" : timings.stages})
+
+    profiling.disable_profiling()
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
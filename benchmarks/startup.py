@@ -0,0 +1,58 @@
+"""
+Measure how long it takes to import Molonaviz's main window, which is what delays the launch of the application.
+Every measure is done in a new Python process. The .ui files are first loaded from the classes generated at build time, then with uic (by setting MOLONAVIZ_COMPILED_UI=0). The report also lists the slow modules (matplotlib, scipy, pyheatmy...) imported at launch: they should only be imported when they are needed.
+
+Usage: python benchmarks/startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+#Modules which are slow to import and shouldn't be needed to launch Molonaviz.
+HEAVY_MODULES = ["matplotlib", "scipy", "pyheatmy", "pkg_resources", "PyQt5.uic"]
+
+MEASURE = f"""
+import json, sys, time
+start = time.perf_counter()
+import molonaviz.main
+duration = time.perf_counter() - start
+print(json.dumps({{"seconds" : duration, "modules" : [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def measure(compiled_ui : bool, repeat : int):
+    """
+    Return the best time to import the main window over repeat new processes, and the slow modules imported.
+    """
+    env = dict(os.environ, MOLONAVIZ_COMPILED_UI = "1" if compiled_ui else "0")
+    best, modules = float("inf"), []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", MEASURE], env=env, capture_output=True, text=True, check=True)
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+        best = min(best, measured["seconds"])
+        modules = measured["modules"]
+    return best, modules
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the time needed to import Molonaviz's main window.")
+    parser.add_argument("--repeat", type=int, default=5, help="number of processes for every measure: the best time is kept")
+    parser.add_argument("--output", default=None, help="path of a JSON file where the report should be written")
+    args = parser.parse_args()
+
+    from molonaviz.utils.compile_ui import compile_ui_files
+    compile_ui_files() #Make sure the generated classes are up to date
+
+    report = {}
+    for name, compiled_ui in (("compiled_ui", True), ("uic", False)):
+        seconds, modules = measure(compiled_ui, args.repeat)
+        report[name] = {"seconds" : seconds, "heavy_modules" : modules}
+        print(f"{name:<12} {seconds:.3f}s  slow modules imported: {', '.join(modules) if modules else 'none'}")
+    print(f"Generated UI classes save {report['uic']['seconds'] - report['compiled_ui']['seconds']:.3f}s at launch.")
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Generators of synthetic laboratories, sampling points and computation results used by the benchmarks.
+Everything is deterministic (a seed can be given): two runs with the same parameters give the same database, so their timings can be compared.
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtSql import QSqlDatabase
+
+from molonaviz.utils.general import createDatabaseDirectory
+from molonaviz.utils.get_files import get_docs, get_interactions_asset
+
+LAB_NAME = "BenchmarkLab"
+STUDY_NAME = "BenchmarkStudy"
+THERMOMETER_NAME = "T001"
+PSENSOR_NAME = "P001"
+SHAFT_NAME = "S001"
+SHAFT_DEPTHS = [0.1, 0.25, 0.4, 0.55]
+START_DATE = datetime(2020, 1, 1)
+TIME_STEP = np.timedelta64(15, "m") #Time between two measures, as for the real sensors
+
+def create_database(directory : str, connectionName : str = "Benchmark"):
+    """
+    Create an empty Molonaviz database (with all its subfolders) in the given directory, and return a connection to it.
+    """
+    createDatabaseDirectory(directory, "Molonari", get_interactions_asset("sample_text.txt"), get_docs("ERD_structure.sql"))
+    con = QSqlDatabase.addDatabase("QSQLITE", connectionName)
+    con.setDatabaseName(os.path.join(directory, "Molonari", "Molonari.sqlite"))
+    con.open()
+    return con
+
+def synthetic_lab():
+    """
+    Return the dataframes describing a laboratory with one thermometer, one pressure sensor and one shaft, as they would be read from the .csv files (see examples/Laboratory).
+    """
+    thermometer = pd.DataFrame([["Cons_Name", "Benchmark"], ["Cons_Ref", "Ref"], ["T_Sensor_Name", THERMOMETER_NAME], ["Sigma_Meas_T", "0.03"]])
+    psensor = pd.DataFrame([["Sensor_Name", PSENSOR_NAME], ["Datalogger", "Benchmark"], ["Calibration_Date", "2020/01/01 00:00:00"],
+                            ["Intercept", "1.5"], ["dU/dH", "-8.9"], ["dU/dT", "-0.0137"], ["Sigma_Meas_P", "0.01"], ["Thermometer name", THERMOMETER_NAME]])
+    shaft = pd.DataFrame([["Shaft_Name", SHAFT_NAME], ["Datalogger", "Benchmark"], ["T_Sensor_Name", THERMOMETER_NAME], ["Sensors_Depth", str(SHAFT_DEPTHS)]])
+    return [thermometer], [psensor], [shaft]
+
+def synthetic_dates(nb_rows : int):
+    """
+    Return nb_rows dates separated by TIME_STEP, as an array of numpy.datetime64.
+    """
+    return np.datetime64(START_DATE) + np.arange(nb_rows) * TIME_STEP
+
+def synthetic_raw_measures(nb_rows : int, seed : int = 0):
+    """
+    Return two dataframes (pressures, temperatures) with nb_rows raw measures each, respecting the sampling point dataframes conventions.
+    The temperatures follow a daily cycle which is damped with depth, with some noise.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.to_datetime(synthetic_dates(nb_rows))
+    days = np.arange(nb_rows) * (TIME_STEP / np.timedelta64(1, "D"))
+    river = 15 + 4*np.sin(2*np.pi*days)
+    temps = {f"Temp{i+1}" : 15 + 4*np.exp(-3*depth)*np.sin(2*np.pi*days - depth) + rng.normal(0, 0.05, nb_rows) for i, depth in enumerate(SHAFT_DEPTHS)}
+    dfpress = pd.DataFrame({"Date" : dates, "Voltage" : 1.5 + rng.normal(0, 0.01, nb_rows), "Temp_Stream" : river})
+    dftemp = pd.DataFrame({"Date" : dates, **temps})
+    return dfpress, dftemp
+
+def write_raw_files(directory : str, dfpress : pd.DataFrame, dftemp : pd.DataFrame):
+    """
+    Write the raw measures in .csv files, with dates in one of the formats used by the sensors. Return the paths of the pressure and temperature files.
+    """
+    pressFile = os.path.join(directory, "synthetic_P_measures.csv")
+    tempFile = os.path.join(directory, "synthetic_T_measures.csv")
+    dfpress.to_csv(pressFile, index=False, date_format="%m/%d/%y %I:%M:%S %p")
+    dftemp.to_csv(tempFile, index=False, date_format="%m/%d/%y %I:%M:%S %p")
+    return pressFile, tempFile
+
+def synthetic_spoint_files(directory : str):
+    """
+    Create the notice and the scheme of a sampling point in the given directory, and return the dataframe describing the sampling point (see examples/Point035) with the paths to the notice and the scheme.
+    """
+    notice = os.path.join(directory, "notice.txt")
+    scheme = os.path.join(directory, "scheme.png")
+    for path in (notice, scheme):
+        open(path, "w").close()
+    infoDF = pd.DataFrame([["Point_Name", "SyntheticPoint"], ["P_Sensor_Name", PSENSOR_NAME], ["Shaft_Name", SHAFT_NAME],
+                           ["Implantation_Date", pd.Timestamp(START_DATE)], ["Meas_Date", pd.Timestamp(START_DATE)],
+                           ["River_Bed", 0.155], ["Delta_h", 0]])
+    return infoDF, notice, scheme
+
+def synthetic_cleaned_measures(dfpress : pd.DataFrame, dftemp : pd.DataFrame):
+    """
+    Return the cleaned measures corresponding to the raw measures, respecting the cleaned measures dataframe conventions.
+    """
+    dfCleaned = pd.DataFrame({"Date" : pd.to_datetime(dftemp["Date"]),
+                              "Temp1" : dftemp["Temp1"], "Temp2" : dftemp["Temp2"], "Temp3" : dftemp["Temp3"], "Temp4" : dftemp["Temp4"],
+                              "TempBed" : dfpress["Temp_Stream"], "Pressure" : (dfpress["Voltage"] - 1.5) / -8.9})
+    return dfCleaned
+
+class SyntheticColumn:
+    """
+    An object giving the same results as a solved pyheatmy Column, so the results can be saved in the database without running a computation.
+    Only the methods used by Compute.save_direct_model_results are implemented. Results are given for the first nb_dates dates of the measures.
+    """
+    def __init__(self, nb_dates : int, nb_cells : int, seed : int = 0):
+        rng = np.random.default_rng(seed)
+        self.depths = np.linspace(SHAFT_DEPTHS[-1] / nb_cells, SHAFT_DEPTHS[-1], nb_cells)
+        self.times = pd.to_datetime(synthetic_dates(nb_dates)).to_pydatetime()
+        days = np.arange(nb_dates) * (TIME_STEP / np.timedelta64(1, "D"))
+        self.temps = 288.15 + 4*np.exp(-3*self.depths[:, None])*np.sin(2*np.pi*days[None, :] - self.depths[:, None])
+        self.advec = rng.normal(0, 1, (nb_cells, nb_dates))
+        self.conduc = rng.normal(0, 1, (nb_cells, nb_dates))
+        self.flows = rng.normal(0, 1e-6, nb_dates)
+
+    def get_depths_solve(self):
+        return self.depths
+
+    def get_times_solve(self):
+        return self.times
+
+    def get_temps_solve(self):
+        return self.temps
+
+    def get_advec_flows_solve(self):
+        return self.advec
+
+    def get_conduc_flows_solve(self):
+        return self.conduc
+
+    def get_flows_solve(self, depth):
+        return self.flows
+
+    def get_id_sensors(self):
+        #Cells holding the three deepest thermometers
+        return [int(np.argmin(np.abs(self.depths - depth))) + 1 for depth in SHAFT_DEPTHS[1:]]
+
+    def get_RMSE(self):
+        return [0.1, 0.2, 0.3, 0.35]
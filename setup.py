@@ -1,4 +1,23 @@
+import importlib.util
+import os
 from setuptools import setup, find_namespace_packages
+from setuptools.command.build_py import build_py
+
+class BuildWithCompiledUi(build_py):
+    """
+    Generate the Python classes of the .ui files before building, so Molonaviz doesn't have to parse them at every launch (see molonaviz/utils/compile_ui.py).
+    If PyQt5 is not available when building, the .ui files are loaded at runtime instead.
+    """
+    def run(self):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "molonaviz", "utils", "compile_ui.py")
+        spec = importlib.util.spec_from_file_location("compile_ui", path)
+        compile_ui = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(compile_ui)
+        try:
+            compile_ui.compile_ui_files()
+        except ImportError:
+            print("PyQt5 is not available: the .ui files will be loaded at runtime.")
+        super().run()
 
 setup(name='molonaviz',
     version='1.0',
@@ -17,4 +36,5 @@ setup(name='molonaviz',
                     'molonaviz.interactions' : ["*.txt"]
                     },
 
-    include_package_data = False)
+    include_package_data = False,
+    cmdclass = {'build_py' : BuildWithCompiledUi})
@@ -0,0 +1,117 @@
+"""
+This file regroups the analytical flux engine, a fast estimation of the water flow which doesn't need pyheatmy.
+The diurnal temperature signal is damped and delayed as it travels between two thermometers: the amplitude ratio and the phase shift between the signals give the velocity of the thermal front, and therefore the water flow (Hatch et al., 2006; Keery et al., 2007).
+The amplitude and phase of the diurnal harmonic are measured around every date with a sliding-window fit over a whole number of days. Everything is vectorised: multi-year records take a few seconds.
+Positive flows are downward (infiltration). The phase shift only gives the magnitude of the flow: its sign is taken from the amplitude ratio.
+This file doesn't depend on Qt.
+"""
+import numpy as np
+
+PERIOD = 86400 #Period of the diurnal signal in seconds
+RHO_C_WATER = 4.18e6 #Volumetric heat capacity of water (J/m^3/K)
+LAMBDA_WATER = 0.6 #Thermal conductivity of water (W/m/K)
+MAX_VELOCITY = 1e-2 #Largest velocity of the thermal front searched (m/s)
+#Methods, as stored in the Method column of the WaterFlow table.
+METHODS = ["Amplitude ratio", "Phase shift"]
+
+def regular_series(times : np.ndarray, values : np.ndarray):
+    """
+    Interpolate the measures on a regular grid whose step is the usual time step of the measures. Return the grid (in seconds from the first date), the interpolated values, the time step and the index in the grid of every measure.
+    The points of the grid which are in a gap of the measures are NaN.
+    """
+    seconds = (times - times[0]).astype("timedelta64[s]").astype(np.float64)
+    step = float(np.median(np.diff(seconds)))
+    grid = np.arange(0, seconds[-1] + step/2, step)
+    grid_values = np.column_stack([np.interp(grid, seconds, column) for column in values.T])
+    #Distance to the closest measure: the grid is only trusted where the measures are regular.
+    right = np.clip(np.searchsorted(seconds, grid), 1, len(seconds) - 1)
+    distance = np.minimum(np.abs(grid - seconds[right - 1]), np.abs(seconds[right] - grid))
+    grid_values[distance > step] = np.nan
+    indexes = np.clip(np.rint(seconds / step).astype(np.int64), 0, len(grid) - 1)
+    return grid, grid_values, step, indexes
+
+def moving_mean(values : np.ndarray, width : int):
+    """
+    Centred moving mean of the columns of values over width samples. The result is NaN near the ends and where the window holds NaN.
+    """
+    nans = np.isnan(values)
+    cumsum = np.cumsum(np.where(nans, 0, values), axis=0)
+    cumnans = np.cumsum(nans, axis=0)
+    cumsum = np.concatenate([np.zeros((1,) + values.shape[1:], dtype=cumsum.dtype), cumsum])
+    cumnans = np.concatenate([np.zeros((1,) + values.shape[1:], dtype=cumnans.dtype), cumnans])
+    result = np.full(values.shape, np.nan, dtype=cumsum.dtype)
+    start = width // 2
+    end = len(values) - (width - 1 - width // 2)
+    if end <= start:
+        return result
+    sums = cumsum[width:] - cumsum[:-width]
+    counts = cumnans[width:] - cumnans[:-width]
+    result[start:end] = np.where(counts == 0, sums / width, np.nan)
+    return result
+
+def diurnal_harmonic(grid : np.ndarray, values : np.ndarray, step : float, nb_periods : int = 1):
+    """
+    Return the amplitude and phase (in radians) of the diurnal harmonic of every column of values around every point of the grid, fitted over nb_periods days.
+    The trend is first removed with a moving mean over one day, then the signal is demodulated and averaged over the window: the other harmonics of the day cancel out.
+    """
+    omega = 2*np.pi/PERIOD
+    day = max(1, int(round(PERIOD/step)))
+    detrended = values - moving_mean(values, day)
+    demodulated = detrended * np.exp(-1j*omega*grid)[:, None]
+    mean = moving_mean(demodulated.real, day*nb_periods) + 1j*moving_mean(demodulated.imag, day*nb_periods)
+    return 2*np.abs(mean), -np.angle(mean)
+
+def thermal_properties(porosity : float, conductivity : float, capacity : float):
+    """
+    Return the effective thermal diffusivity of the saturated medium and the ratio between its volumetric heat capacity and the one of water, from the porosity, the thermal conductivity of the solid and its volumetric heat capacity.
+    """
+    lambda_m = (porosity*np.sqrt(LAMBDA_WATER) + (1 - porosity)*np.sqrt(conductivity))**2
+    rho_c_m = porosity*RHO_C_WATER + (1 - porosity)*capacity
+    return lambda_m/rho_c_m, rho_c_m/RHO_C_WATER
+
+def velocity_from_amplitude(ratio : np.ndarray, dz : float, kappa : float):
+    """
+    Velocity of the thermal front given by the amplitude ratio (deep/shallow) between two thermometers dz apart (Hatch et al., 2006).
+    The equation is solved by bisection, as it is monotonous in the velocity. Ratios above 1 and velocities out of the searched range give NaN.
+    """
+    c = 8*np.pi*kappa/PERIOD
+    target = 2*kappa*np.log(np.where(ratio > 0, ratio, np.nan))/dz
+    low = np.full(np.shape(ratio), -MAX_VELOCITY)
+    high = np.full(np.shape(ratio), MAX_VELOCITY)
+    for _ in range(80):
+        v = (low + high)/2
+        g = v - np.sqrt((np.sqrt(v**4 + c**2) + v**2)/2)
+        above = g > target
+        high = np.where(above, v, high)
+        low = np.where(above, low, v)
+    v = (low + high)/2
+    valid = (ratio < 1) & (np.abs(v) < MAX_VELOCITY*(1 - 1e-6))
+    return np.where(valid, v, np.nan)
+
+def velocity_from_phase(lag : np.ndarray, dz : float, kappa : float):
+    """
+    Magnitude of the velocity of the thermal front given by the time lag (in seconds) between two thermometers dz apart (Hatch et al., 2006). Lags longer than the one of a purely conductive medium give NaN.
+    """
+    c = 8*np.pi*kappa/PERIOD
+    b = 4*np.pi*kappa*lag/(PERIOD*dz)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        squared = (c**2 - 4*b**4)/(4*b**2)
+    #Without any flow, rounding errors may give a slightly negative square.
+    valid = squared >= -1e-6*c
+    return np.where(valid, np.sqrt(np.maximum(squared, 0)), np.nan)
+
+def estimate_flux(times : np.ndarray, shallow : np.ndarray, deep : np.ndarray, dz : float, porosity : float, conductivity : float, capacity : float, nb_periods : int = 1):
+    """
+    Estimate the water flow (m/s) at every date from the temperatures of two thermometers dz meters apart. Return a dictionnary whose keys are the methods (see METHODS) and values are the flows at the given dates (NaN where they can't be estimated).
+    times must be datetime64 dates in increasing order. The thermal parameters are the ones of the solid: see thermal_properties.
+    """
+    grid, values, step, indexes = regular_series(times, np.column_stack((shallow, deep)).astype(np.float64))
+    amplitudes, phases = diurnal_harmonic(grid, values, step, nb_periods)
+    kappa, capacity_ratio = thermal_properties(porosity, conductivity, capacity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = amplitudes[:, 1]/amplitudes[:, 0]
+    lag = np.mod(phases[:, 1] - phases[:, 0], 2*np.pi)/(2*np.pi/PERIOD)
+    v_amplitude = velocity_from_amplitude(ratio, dz, kappa)
+    v_phase = velocity_from_phase(lag, dz, kappa) * np.where(v_amplitude < 0, -1, 1)
+    return {"Amplitude ratio" : (v_amplitude*capacity_ratio)[indexes],
+            "Phase shift" : (v_phase*capacity_ratio)[indexes]}
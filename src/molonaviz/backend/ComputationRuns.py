@@ -0,0 +1,73 @@
+"""
+This file regroups the tables used to keep the history of the computations of a point.
+Every direct model, MCMC, optimisation or analytical estimation of the water flow made for a point is a run: its results are tagged with the ID of the run instead of replacing the previous ones, so the runs can be compared without being computed again.
+The results of a run are linked to it through their quantiles (temperatures, heat flows, water flows, RMSE) or their layers (best parameters, parameters distribution). The water flows given by the analytical flux engine have no quantile: they are directly linked to their run. The dates are the ones of the cleaned measures, and the depths are shared by all the runs made with the same number of cells.
+"""
+from PyQt5.QtSql import QSqlQuery, QSqlDatabase #QSqlDatabase in used only for type hints
+
+#Types of runs, as stored in the ComputationRun table.
+DIRECT_MODEL_RUN = "Direct model"
+MCMC_RUN = "MCMC"
+OPTIMISER_RUN = "Optimiser"
+ANALYTICAL_RUN = "Analytical"
+#Types of the runs made with pyheatmy, which have a direct model.
+PYHEATMY_RUNS = [DIRECT_MODEL_RUN, MCMC_RUN, OPTIMISER_RUN]
+
+#Table holding the runs of every point. It is created when a point is opened, as databases created with older versions of Molonaviz don't have it.
+RUN_TABLES = ["""CREATE TABLE IF NOT EXISTS ComputationRun (
+            ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+            Type        VARCHAR,
+            Settings    VARCHAR,
+            NbCells     INTEGER,
+            Start       DATETIME,
+            Duration    REAL,
+            RMSE        REAL,
+            PointKey    INTEGER REFERENCES Point (ID)
+        )"""]
+#Columns linking the results to a run, added to the tables created by older versions of Molonaviz: (table, name, type).
+#Depth.Cells is the number of cells of the runs using this depth.
+RUN_COLUMNS = [("Quantile", "Run", "INTEGER REFERENCES ComputationRun (ID)"),
+               ("Layer", "Run", "INTEGER REFERENCES ComputationRun (ID)"),
+               ("MCMCRun", "Run", "INTEGER REFERENCES ComputationRun (ID)"),
+               ("EnsembleWaterFlow", "Run", "INTEGER REFERENCES ComputationRun (ID)"),
+               ("EnsembleHeatFlows", "Run", "INTEGER REFERENCES ComputationRun (ID)"),
+               ("Depth", "Cells", "INTEGER")]
+#Condition selecting the runs which are over. A run is created when its computation is launched, and its duration is saved once its results are: a run without duration was still running, or was interrupted (for instance if Molonaviz was closed) and may be incomplete.
+#Runs holding results computed with older versions of Molonaviz have neither start nor duration.
+FINISHED_RUN = "(ComputationRun.Duration IS NOT NULL OR ComputationRun.Start IS NULL)"
+
+def add_missing_columns(con : QSqlDatabase, columns : list[tuple[str, str, str]]):
+    """
+    Add the given columns ((table, name, type)) to the tables which don't have them yet. Tables which don't exist are ignored.
+    """
+    query = QSqlQuery(con)
+    for table, name, sql_type in columns:
+        query.exec(f"SELECT name FROM pragma_table_info('{table}')")
+        existing = []
+        while query.next():
+            existing.append(query.value(0))
+        if len(existing) > 0 and name not in existing:
+            query.exec(f"ALTER TABLE {table} ADD COLUMN {name} {sql_type}")
+
+def create_run_tables(con : QSqlDatabase):
+    """
+    Create the ComputationRun table and the columns linking the results to a run if they don't exist.
+    """
+    query = QSqlQuery(con)
+    for create_table in RUN_TABLES:
+        query.exec(create_table)
+    add_missing_columns(con, RUN_COLUMNS)
+
+def latest_run(pointID : int, run_types : list[str] | None = None):
+    """
+    Return an SQL expression giving the ID of the last finished run of the point with the given ID, or NULL if it has none. If run_types is not None, only the runs of these types are considered.
+    Results computed with older versions of Molonaviz are not linked to any run until the point is opened: comparing the run of a result with this expression using IS (rather than =) selects them as well.
+    """
+    types_clause = "" if run_types is None else f" AND ComputationRun.Type IN ({', '.join(repr(run_type) for run_type in run_types)})"
+    return f"(SELECT MAX(ComputationRun.ID) FROM ComputationRun WHERE ComputationRun.PointKey = {pointID} AND {FINISHED_RUN}{types_clause})"
+
+def describe_layers(layers : list[list]):
+    """
+    Return a description of the parameters of the layers ([name, depth, -log10(K), porosity, thermal conductivity, heat capacity] for every layer), one line per layer, to be stored in the settings of a run.
+    """
+    return "\n".join(f"{name} ({depth} m): -log10(K)={perm:.4g}, n={n:.4g}, lambda_s={lamb:.4g}, rho_s*c_s={rho:.4g}" for name, depth, perm, n, lamb, rho in layers)
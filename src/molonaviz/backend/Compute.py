@@ -1,29 +1,67 @@
+import logging
+import time
+from datetime import datetime
+from functools import partial
 from PyQt5 import QtCore
 from PyQt5.QtSql import QSqlQuery
-from pyheatmy import *
+import numpy as np
 from numpy import shape
 
-from ..utils.general import databaseDateToDatetime, datetimeToDatabaseDate
+from ..utils.general import databaseDatesToDatetime64, datetimeToDatabaseDate, datetime64ToDatabaseDate
+from ..utils.profiling import timed, profiled, count_rows
 from .SPointCoordinator import SPointCoordinator
+from .Ensemble import draw_parameter_sets, run_ensemble
+from .AnalyticalFlux import estimate_flux
+from .MCMCSampler import warm_start, run_chain, results_from_column, compact_states, DIAGNOSTICS
+from .ComputationRuns import DIRECT_MODEL_RUN, MCMC_RUN, OPTIMISER_RUN, ANALYTICAL_RUN, describe_layers
+from .Optimiser import run_optimiser
+from .Sweep import build_design, scale_design, sweep_parameter_sets, run_sweep, sensitivity_indices, PARAMETERS, OUTPUTS, ANALYSED_OUTPUTS
+
+logger = logging.getLogger(__name__)
 
 class ColumnMCMCRunner(QtCore.QObject):
     """
     A QT runner which is meant to launch the MCMC in its own thread.
+    If warm_start is not None, the chain is started from a previous MCMC: it is a tuple made of the initial state and the covariance of the proposal. If targets is not None, the chain stops as soon as it has converged (see has_converged). In both cases, the MCMC is run by the sampler of backend/MCMCSampler.py rather than by pyheatmy.
+    storage gives the burn-in, the thinning and the maximal number of states of the parameters distribution which is stored (see compact_states).
     """
     finished = QtCore.pyqtSignal()
 
-    def __init__(self, col, nb_iter: int, all_priors: dict, nb_cells: str, quantiles: list):
+    def __init__(self, col, col_dict : dict, nb_iter: int, all_priors: dict, nb_cells: str, quantiles: list, warm_start : tuple | None = None, targets : dict | None = None, check_every : int = 100, storage : tuple = (0, 1, None)):
         super(ColumnMCMCRunner, self).__init__()
 
         self.col = col
+        self.col_dict = col_dict
         self.nb_iter = nb_iter
         self.all_priors = all_priors
         self.nb_cells = nb_cells
         self.quantiles = quantiles
+        self.warm_start = warm_start
+        self.targets = targets
+        self.check_every = check_every
+        self.storage = storage
+        self.results = None #Results of the MCMC, see results_from_column in backend/MCMCSampler.py
 
     def run(self):
-        print("Launching MCMC...")
-        self.col.compute_mcmc(self.nb_iter, self.all_priors, self.nb_cells, self.quantiles)
+        if self.warm_start is None and self.targets is None:
+            logger.info("Launching MCMC...")
+            with timed("ColumnMCMCRunner.run"):
+                self.col.compute_mcmc(self.nb_iter, self.all_priors, self.nb_cells, self.quantiles)
+            self.results = results_from_column(self.col, self.nb_iter)
+        else:
+            logger.info("Launching MCMC from the previous results..." if self.warm_start is not None else "Launching MCMC...")
+            try:
+                with timed("ColumnMCMCRunner.run"):
+                    self.results = run_chain(self.col, self.col_dict, self.all_priors, self.nb_iter, self.nb_cells, self.quantiles, self.warm_start, self.targets, self.check_every,
+                                             progress=partial(log_progress, name="iterations"))
+            except Exception as e:
+                logger.warning(f"The MCMC failed: {e}")
+            if self.results is not None:
+                logger.info(f"Acceptance rate of the MCMC: {self.results['acceptance']:.0%}")
+                if self.results["converged"]:
+                    logger.info(f"The MCMC converged after {self.results['iterations']} iterations.")
+        if self.results is not None:
+            self.results["distributions"] = compact_states(self.results["distributions"], *self.storage)
         self.finished.emit()
 
 class ColumnDirectModelRunner(QtCore.QObject):
@@ -37,13 +75,100 @@ class ColumnDirectModelRunner(QtCore.QObject):
         self.col = col
         self.params = params
         self.nb_cells = nb_cells
+        self.success = False
 
     def run(self):
-        print("Launching Direct Model...")
-        layers = layersListCreator(self.params)
-        self.col.compute_solve_transi(layers, self.nb_cells)
+        logger.info("Launching Direct Model...")
+        try:
+            from pyheatmy import layersListCreator
+            layers = layersListCreator(self.params)
+            with timed("ColumnDirectModelRunner.run"):
+                self.col.compute_solve_transi(layers, self.nb_cells)
+            self.success = True
+        except Exception as e:
+            logger.warning(f"The direct model failed: {e}")
         self.finished.emit()
 
+class EnsembleRunner(QtCore.QObject):
+    """
+    A QT runner which is meant to launch the ensemble of direct models in its own thread. The direct models themselves are run in a pool of processes: see backend/Ensemble.py.
+    """
+    finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, col_dict : dict, parameter_sets : list, nb_cells : int, quantiles : list[float], nb_workers : int | None = None):
+        super(EnsembleRunner, self).__init__()
+        self.col_dict = col_dict
+        self.parameter_sets = parameter_sets
+        self.nb_cells = nb_cells
+        self.quantiles = quantiles
+        self.nb_workers = nb_workers
+
+    def run(self):
+        logger.info(f"Launching {len(self.parameter_sets)} direct models to propagate the uncertainty...")
+        bands = None
+        try:
+            with timed("EnsembleRunner.run"):
+                bands = run_ensemble(self.col_dict, self.parameter_sets, self.nb_cells, self.quantiles, self.nb_workers, log_progress)
+        except Exception as e:
+            logger.warning(f"The ensemble of direct models failed: {e}")
+        self.finished.emit(bands)
+
+class SweepRunner(QtCore.QObject):
+    """
+    A QT runner which is meant to launch a parameter sweep in its own thread. The direct models themselves are run in a pool of processes: see backend/Sweep.py.
+    """
+    finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, col_dict : dict, parameter_sets : list, nb_cells : int, nb_workers : int | None = None):
+        super(SweepRunner, self).__init__()
+        self.col_dict = col_dict
+        self.parameter_sets = parameter_sets
+        self.nb_cells = nb_cells
+        self.nb_workers = nb_workers
+
+    def run(self):
+        logger.info(f"Launching the parameter sweep ({len(self.parameter_sets)} direct models)...")
+        outputs = None
+        try:
+            with timed("SweepRunner.run"):
+                outputs = run_sweep(self.col_dict, self.parameter_sets, self.nb_cells, self.nb_workers, log_progress)
+        except Exception as e:
+            logger.warning(f"The parameter sweep failed: {e}")
+        self.finished.emit(outputs)
+
+class OptimiserRunner(QtCore.QObject):
+    """
+    A QT runner which is meant to launch the optimiser in its own thread. The restarts themselves are run in a pool of processes: see backend/Optimiser.py.
+    """
+    finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, col_dict : dict, layers : list[list], bounds : list[tuple[float, float]], nb_restarts : int, nb_cells : int, max_evaluations : int, nb_workers : int | None = None):
+        super(OptimiserRunner, self).__init__()
+        self.col_dict = col_dict
+        self.layers = layers
+        self.bounds = bounds
+        self.nb_restarts = nb_restarts
+        self.nb_cells = nb_cells
+        self.max_evaluations = max_evaluations
+        self.nb_workers = nb_workers
+
+    def run(self):
+        logger.info(f"Launching the optimiser ({self.nb_restarts} restarts)...")
+        best = None
+        try:
+            with timed("OptimiserRunner.run"):
+                best = run_optimiser(self.col_dict, self.layers, self.bounds, self.nb_restarts, self.nb_cells, self.max_evaluations, self.nb_workers, partial(log_progress, name="restarts"))
+        except Exception as e:
+            logger.warning(f"The optimiser failed: {e}")
+        self.finished.emit(best)
+
+def log_progress(done : int, total : int, name : str = "direct models"):
+    """
+    Tell the user how many tasks of a pool are over, ten times during the computation.
+    """
+    if done % max(1, total//10) == 0:
+        logger.info(f"{done}/{total} {name} computed.")
+
 class Compute(QtCore.QObject):
     """
     How to use this class :
@@ -52,32 +177,47 @@ class Compute(QtCore.QObject):
     - Launch the computation :
         - with given parameters : compute.compute_direct_model(params: tuple, nb_cells: int, sensorDir: str)
         - with parameters inferred from MCMC : compute.compute_MCMC(nb_iter: int, priors: dict, nb_cells: str, sensorDir: str)
+        - with parameter sets drawn from the distribution given by the MCMC : compute.compute_ensemble(nb_samples: int, quantiles: list, nb_cells: int). This can also be done right after the MCMC by giving an ensemble size to compute_MCMC.
+        - with parameter sets sweeping given ranges : compute.compute_sweep(layers: list, design: str, ranges: dict, nb_samples: int, nb_cells: int)
+        - with parameters minimising the RMSE, as a fast alternative to the MCMC : compute.compute_optimiser(layers: list, bounds: list, nb_restarts: int, nb_cells: int, max_evaluations: int). The direct model is then run with the best parameters.
+    - The water flow can also be estimated without pyheatmy from the diurnal signal of two thermometers : compute.compute_analytical(sensors: tuple, porosity: float, conductivity: float, capacity: float). This is fast enough to be done in the main thread.
+    Every direct model, MCMC or optimisation is saved in a new run (see backend/ComputationRuns.py): the results of the previous runs are kept, and the coordinator displays the new run once it is over. The quantile bands of the ensemble belong to the run of the MCMC. The parameter sweeps and the analytical water flows don't belong to any run.
     """
     MCMCFinished = QtCore.pyqtSignal()
     DirectModelFinished = QtCore.pyqtSignal()
+    EnsembleFinished = QtCore.pyqtSignal()
+    SweepFinished = QtCore.pyqtSignal()
+    OptimiserFailed = QtCore.pyqtSignal()
+    AnalyticalFinished = QtCore.pyqtSignal()
 
     def __init__(self, coordinator : SPointCoordinator):
         # Call constructor of parent classes
         super(Compute, self).__init__()
         self.thread = QtCore.QThread()
+        self.pool_thread = QtCore.QThread() #Thread waiting for the pools of processes (ensembles, sweeps and optimiser). The ensemble may be launched by end_MCMC, before self.thread is over.
 
         self.con = coordinator.con
         self.pointID = coordinator.pointID
         self.coordinator = coordinator
         self.col = None
+        self.measures = None #Cleaned measures prepared for pyheatmy (see prepare_measures)
+        self.measures_version = None
+        self.runID = None #Run of the last computation launched: see start_run
+        self.run_cells = None
+        self.run_start = None
 
     def set_column(self):
         """
         Create the Column object associated to the current Point.
         """
-        press = []
-        temps = []
-        cleaned_measures = self.coordinator.build_cleaned_measures(full_query=True)
-        cleaned_measures.exec()
-        while cleaned_measures.next():
-            # Warning: temperatures are stored in °C. However, phyheatmy requires K to work!
-            temps.append([databaseDateToDatetime(cleaned_measures.value(0)),[cleaned_measures.value(i)+273.15 for i in range(1,5)]]) #Date and 4 Temperatures
-            press.append([databaseDateToDatetime(cleaned_measures.value(0)), [cleaned_measures.value(6), cleaned_measures.value(5) + 273.15]]) #Date, Pressure, Temperature
+        from pyheatmy import Column #pyheatmy is slow to import: it is only imported when a computation is needed.
+        self.col = Column.from_dict(self.column_dict())
+
+    def column_dict(self):
+        """
+        Return the dictionnary used to create the Column object associated to the current Point.
+        """
+        press, temps = self.prepare_measures()
 
         column_infos = self.build_column_infos()
         column_infos.exec()
@@ -93,17 +233,53 @@ class Compute(QtCore.QObject):
             "sigma_meas_T" : column_infos.value(7),
             "inter_mode" : "linear"
             }
+        return col_dict
 
-        self.col = Column.from_dict(col_dict)
+    @profiled()
+    def prepare_measures(self):
+        """
+        Return the cleaned measures in the format expected by pyheatmy, as two lists:
+            -the pressure measures: [date, [pressure, bed temperature]] for every date
+            -the temperature measures: [date, [Temp1, Temp2, Temp3, Temp4]] for every date
+        Temperatures are given in K. The lists are kept until the cleaned measures of the point change, so they are only built once for successive computations.
+        """
+        if self.measures is not None and self.measures_version == self.coordinator.cleaned_measures_version:
+            return self.measures
+
+        cleaned_measures = self.coordinator.build_cleaned_measures(full_query=True)
+        cleaned_measures.setForwardOnly(True)
+        cleaned_measures.exec()
+        dates = []
+        values = []
+        while cleaned_measures.next():
+            dates.append(cleaned_measures.value(0))
+            values.append([cleaned_measures.value(i) for i in range(1,7)]) #Temp1 to 4, TempBed, Pressure
+        count_rows(len(dates))
+        dates = databaseDatesToDatetime64(dates).astype("datetime64[us]").tolist() #pyheatmy requires datetime objects
+        values = np.array(values, dtype=np.float64).reshape(-1, 6)
+
+        # Warning: temperatures are stored in °C. However, phyheatmy requires K to work!
+        temperatures = (values[:, 0:4] + 273.15).tolist()
+        pressure = np.column_stack((values[:, 5], values[:, 4] + 273.15)).tolist()
+        self.measures = ([[date, p] for date, p in zip(dates, pressure)], [[date, t] for date, t in zip(dates, temperatures)])
+        self.measures_version = self.coordinator.cleaned_measures_version
+        return self.measures
 
     def compute_direct_model(self, params : list[list],  nb_cells: int):
         """
-        Launch the direct model with given parameters per layer.
+        Launch the direct model with given parameters per layer, in a new run.
         """
-        if self.thread.isRunning():
-            print("Please wait while for the previous computation to end")
+        if self.is_running():
+            logger.warning("Please wait while for the previous computation to end")
             return
 
+        self.start_run(DIRECT_MODEL_RUN, f"{nb_cells} cells\n{describe_layers(params)}", nb_cells)
+        self.launch_direct_model(params, nb_cells)
+
+    def launch_direct_model(self, params : list[list],  nb_cells: int):
+        """
+        Launch the direct model with given parameters per layer. Its results are saved in the current run.
+        """
         self.save_layers_and_params(params)
         self.update_nb_cells(nb_cells)
 
@@ -118,13 +294,47 @@ class Compute(QtCore.QObject):
         """
         This is called when the DirectModel is over. Save the relevant information in the database
         """
+        self.thread.started.disconnect(self.direct_runner.run)
+        if not self.direct_runner.success:
+            self.thread.quit()
+            self.coordinator.delete_run(self.runID)
+            self.DirectModelFinished.emit()
+            return
         self.save_direct_model_results()
+        self.end_run()
+        self.coordinator.update_summary()
 
         self.thread.quit()
-        print("Direct model finished.")
+        logger.info("Direct model finished.")
 
         self.DirectModelFinished.emit()
 
+    def start_run(self, run_type : str, settings : str, nb_cells : int | None):
+        """
+        Create a new run (see backend/ComputationRuns.py): the results of the computation which is launched are saved in this run.
+        settings is a description of the settings of the computation, displayed to the user. nb_cells is None for computations which don't discretise the column.
+        """
+        insertRun = QSqlQuery(self.con)
+        insertRun.prepare("INSERT INTO ComputationRun (Type, Settings, NbCells, Start, PointKey) VALUES (:Type, :Settings, :NbCells, :Start, :PointKey)")
+        insertRun.bindValue(":Type", run_type)
+        insertRun.bindValue(":Settings", settings)
+        insertRun.bindValue(":NbCells", nb_cells)
+        insertRun.bindValue(":Start", datetimeToDatabaseDate(datetime.now()))
+        insertRun.bindValue(":PointKey", self.pointID)
+        insertRun.exec()
+        self.runID = insertRun.lastInsertId()
+        self.run_cells = nb_cells
+        self.run_start = time.perf_counter()
+
+    def end_run(self):
+        """
+        This is called once the results of the current run are saved. Save its duration and RMSE, then display it.
+        """
+        updateRun = QSqlQuery(self.con)
+        updateRun.exec(f"UPDATE ComputationRun SET Duration = {time.perf_counter() - self.run_start} WHERE ID = {self.runID}")
+        self.coordinator.update_run_RMSE(self.runID)
+        self.coordinator.set_run(self.runID)
+
     def update_nb_cells(self, nb_cells):
         """
         Update entry in Point table to reflect the given number of cells.
@@ -135,11 +345,12 @@ class Compute(QtCore.QObject):
 
     def save_layers_and_params(self, data : list[list]):
         """
-        Save the layers and the last parameters in the database.
+        Save the layers and the last parameters in the current run.
         """
         insertlayer = QSqlQuery(self.con)
-        insertlayer.prepare("INSERT INTO Layer (Name, Depth, PointKey) VALUES (:Name, :Depth, :PointKey)")
+        insertlayer.prepare("INSERT INTO Layer (Name, Depth, PointKey, Run) VALUES (:Name, :Depth, :PointKey, :Run)")
         insertlayer.bindValue(":PointKey", self.pointID)
+        insertlayer.bindValue(":Run", self.runID)
 
         insertparams = QSqlQuery(self.con)
         insertparams.prepare(f"""INSERT INTO BestParameters (Permeability, ThermConduct, Porosity, Capacity, Layer, PointKey)
@@ -160,36 +371,27 @@ class Compute(QtCore.QObject):
             insertparams.exec()
         self.con.commit()
 
-    def save_direct_model_results(self, save_dates = True):
+    @profiled()
+    def save_direct_model_results(self):
         """
-        Query the database and save the direct model results.
+        Query the database and save the direct model results in the current run.
         """
         #Quantile 0
         insertquantiles = QSqlQuery(self.con)
-        insertquantiles.prepare(f"INSERT INTO Quantile (Quantile, PointKey) VALUES (0,{self.pointID})")
+        insertquantiles.prepare(f"INSERT INTO Quantile (Quantile, PointKey, Run) VALUES (0,{self.pointID},{self.runID})")
 
         insertquantiles.exec()
         quantileID = insertquantiles.lastInsertId()
 
         depths = self.col.get_depths_solve()
         #Depths
-        if save_dates:
-            insertDepths = QSqlQuery(self.con)
-            insertDepths.prepare("INSERT INTO Depth (Depth,PointKey) VALUES (:Depth, :PointKey)")
-            insertDepths.bindValue(":PointKey", self.pointID)
-            self.con.transaction()
-            for depth in depths:
-                insertDepths.bindValue(":Depth", float(depth))
-                insertDepths.exec()
-            self.con.commit()
+        self.save_depths(depths)
 
         #Temperature and heat flows
         fetchDate = QSqlQuery(self.con)
         fetchDate.prepare(f"SELECT Date.ID FROM Date WHERE Date.PointKey = :PointKey AND Date.Date = :Date ")
         fetchDate.bindValue(":PointKey", self.pointID)
-        fetchDepth = QSqlQuery(self.con)
-        fetchDepth.prepare(f"SELECT Depth.ID FROM Depth WHERE Depth.PointKey = :PointKey AND Depth.Depth = :Depth")
-        fetchDepth.bindValue(":PointKey", self.pointID)
+        fetchDepth = self.build_fetch_depth()
 
         solvedTemps = self.col.get_temps_solve()
         advecFlows = self.col.get_advec_flows_solve()
@@ -204,6 +406,7 @@ class Compute(QtCore.QObject):
         #We assume solvedTemps,advecFlows and conduFlows have the same shapes, and that the dates and depths are also identical, ie the first column of all three arrays corrresponds to the same fixed date.
 
         nb_rows,nb_cols = shape(solvedTemps)
+        count_rows(nb_rows*nb_cols + nb_cols) #Temperatures and heat flows, then water flows
         self.con.transaction()
         for j in range(nb_cols):
             fetchDate.bindValue(":Date", datetimeToDatabaseDate(times[j]))
@@ -260,18 +463,60 @@ class Compute(QtCore.QObject):
         insertRMSE.exec()
         self.con.commit()
 
-    def compute_MCMC(self, nb_iter: int, all_priors : list, nb_cells: str, quantiles: tuple):
+    def save_depths(self, depths : np.ndarray):
+        """
+        Save the depths of the results of the current run, unless a previous run with the same number of cells already saved them: the depths are shared by all these runs.
+        """
+        countDepths = QSqlQuery(self.con)
+        countDepths.exec(f"SELECT COUNT(*) FROM Depth WHERE PointKey = {self.pointID} AND Cells = {self.run_cells}")
+        countDepths.next()
+        if countDepths.value(0) > 0:
+            return
+        insertDepths = QSqlQuery(self.con)
+        insertDepths.prepare("INSERT INTO Depth (Depth, Cells, PointKey) VALUES (:Depth, :Cells, :PointKey)")
+        insertDepths.bindValue(":Cells", self.run_cells)
+        insertDepths.bindValue(":PointKey", self.pointID)
+        self.con.transaction()
+        for depth in depths:
+            insertDepths.bindValue(":Depth", float(depth))
+            insertDepths.exec()
+        self.con.commit()
+
+    def is_running(self):
+        return self.thread.isRunning() or self.pool_thread.isRunning()
+
+    def compute_MCMC(self, nb_iter: int, all_priors : list, nb_cells: str, quantiles: tuple, ensemble_size : int = 0, nb_workers : int | None = None, previous : tuple | None = None, targets : dict | None = None, check_every : int = 100, storage : tuple = (0, 1, None)):
         """
-        Launch the MCMC computation with given parameters.
+        Launch the MCMC computation with given parameters, in a new run.
+        If ensemble_size is not 0, the uncertainty is then propagated to the flows by running ensemble_size direct models in nb_workers processes: see compute_ensemble.
+        If previous is not None, the chain is warm-started from the results of a previous run, given by stored_parameters.
+        If targets is not None, nb_iter is the maximal number of iterations: the convergence is checked every check_every iterations, and the chain stops as soon as the targets are reached (see has_converged in backend/MCMCSampler.py).
+        storage gives the fraction of the chain removed as burn-in, the thinning and the maximal number of states (None for no limit) of the parameters distribution stored in the database: see compact_states in backend/MCMCSampler.py.
         """
-        if self.thread.isRunning():
-            print("Please wait while for the previous computation to end")
+        if self.is_running():
+            logger.warning("Please wait while for the previous computation to end")
             return
 
         self.update_nb_cells(nb_cells)
 
-        self.set_column() #Updates self.col
-        self.mcmc_runner = ColumnMCMCRunner(self.col, nb_iter, all_priors, nb_cells, quantiles)
+        self.ensemble_settings = (ensemble_size, quantiles, nb_cells, nb_workers)
+        start = None
+        if previous is not None:
+            start = warm_start(all_priors, *previous)
+            if start is None:
+                logger.warning("The number of layers changed since the previous computation: the MCMC is started from the priors.")
+        settings = [f"{nb_iter} iterations at most" if targets is not None else f"{nb_iter} iterations", f"{nb_cells} cells", f"Quantiles: {', '.join(str(quantile) for quantile in quantiles)}"]
+        if start is not None:
+            settings.append("Warm-started from the previous results")
+        if targets is not None:
+            settings.append("Stopped once converged: " + ", ".join(f"{name} {value}" for name, value in targets.items()))
+        settings += [f"{name} ({depth} m): " + ", ".join(f"{parameter} in [{bounds[0]:.4g}, {bounds[1]:.4g}]" for parameter, (bounds, _) in priors.items()) for name, depth, priors in all_priors]
+        self.start_run(MCMC_RUN, "\n".join(settings), nb_cells)
+
+        col_dict = self.column_dict()
+        from pyheatmy import Column #pyheatmy is slow to import: it is only imported when a computation is needed.
+        self.col = Column.from_dict(col_dict)
+        self.mcmc_runner = ColumnMCMCRunner(self.col, col_dict, nb_iter, all_priors, nb_cells, quantiles, start, targets, check_every, storage)
         self.mcmc_runner.finished.connect(self.end_MCMC)
         self.mcmc_runner.moveToThread(self.thread)
         self.thread.started.connect(self.mcmc_runner.run)
@@ -281,39 +526,336 @@ class Compute(QtCore.QObject):
         """
         This is called when the MCMC is over. Save the relevant information in the database.
         """
-        self.save_MCMC_results()
-
+        self.thread.started.disconnect(self.mcmc_runner.run)
         self.thread.quit()
-        print("MCMC finished.")
+        if self.mcmc_runner.results is None:
+            self.coordinator.delete_run(self.runID)
+            self.MCMCFinished.emit()
+            return
+        self.save_MCMC_results(self.mcmc_runner.results)
+        self.save_MCMC_run(self.mcmc_runner.results)
+        self.end_run()
+        self.coordinator.update_summary()
+        logger.info("MCMC finished.")
 
         self.MCMCFinished.emit()
 
-    def save_MCMC_results(self):
+        ensemble_size, quantiles, nb_cells, nb_workers = self.ensemble_settings
+        if ensemble_size > 0:
+            self.compute_ensemble(ensemble_size, quantiles, nb_cells, nb_workers)
+
+    def compute_ensemble(self, nb_samples : int, quantiles : list[float], nb_cells : int, nb_workers : int | None = None):
+        """
+        Propagate the uncertainty given by the MCMC to the water and heat flows: draw nb_samples parameter sets from the parameters distribution, run the direct model for each of them in nb_workers processes (by default, one per processor) and compute the given quantiles of the flows.
+        The parameters distribution is the one of the last run launched, which must be an MCMC: the quantile bands are saved in this run.
+        """
+        if self.pool_thread.isRunning():
+            logger.warning("Please wait while for the previous computation to end")
+            return
+
+        layers, distributions = self.parameters_distribution(self.runID)
+        if len(layers) == 0:
+            logger.warning("The parameters distribution is empty: the MCMC must be computed before propagating the uncertainty.")
+            return
+        parameter_sets = draw_parameter_sets(layers, distributions, nb_samples)
+
+        self.ensemble_runner = EnsembleRunner(self.column_dict(), parameter_sets, nb_cells, quantiles, nb_workers)
+        self.ensemble_runner.finished.connect(self.end_ensemble)
+        self.ensemble_runner.moveToThread(self.pool_thread)
+        self.pool_thread.started.connect(self.ensemble_runner.run)
+        self.pool_thread.start()
+
+    def end_ensemble(self, bands : dict | None):
+        """
+        This is called when the ensemble of direct models is over. Save the quantile bands in the database.
+        """
+        self.pool_thread.started.disconnect(self.ensemble_runner.run)
+        self.pool_thread.quit()
+        if bands is not None:
+            self.save_ensemble_results(bands)
+            self.coordinator.run_cache(self.runID).remove(self.coordinator.get_heatfluxes_model().CACHE_NAME) #The heat flows now have bands
+            logger.info("Uncertainty propagated to the flows.")
+        self.EnsembleFinished.emit()
+
+    def compute_sweep(self, layers : list[list], design : str, ranges : dict, nb_samples : int, nb_cells : int, nb_workers : int | None = None):
+        """
+        Launch a parameter sweep: the direct model is run for every set of parameters given by the design (see build_design in backend/Sweep.py) in nb_workers processes (by default, one per processor).
+        layers gives the parameters of every layer, as for compute_direct_model: the swept parameters (keys of ranges) are replaced by the values of the design in every layer.
+        """
+        if self.is_running():
+            logger.warning("Please wait while for the previous computation to end")
+            return
+        if len(ranges) == 0:
+            logger.warning("No parameter was chosen for the parameter sweep.")
+            return
+
+        unit_design = build_design(design, ranges, nb_samples)
+        values = scale_design(unit_design, ranges)
+        self.sweep_settings = (design, list(ranges), unit_design, values)
+        parameter_sets = sweep_parameter_sets(layers, list(ranges), values)
+
+        self.sweep_runner = SweepRunner(self.column_dict(), parameter_sets, nb_cells, nb_workers)
+        self.sweep_runner.finished.connect(self.end_sweep)
+        self.sweep_runner.moveToThread(self.pool_thread)
+        self.pool_thread.started.connect(self.sweep_runner.run)
+        self.pool_thread.start()
+
+    def end_sweep(self, outputs : np.ndarray | None):
+        """
+        This is called when the parameter sweep is over. Save the runs and the sensitivity indices in the database.
+        """
+        self.pool_thread.started.disconnect(self.sweep_runner.run)
+        self.pool_thread.quit()
+        if outputs is not None:
+            design, parameters, unit_design, values = self.sweep_settings
+            self.save_sweep_results(design, parameters, unit_design, values, outputs)
+            logger.info("Parameter sweep finished.")
+        self.SweepFinished.emit()
+
+    @profiled()
+    def save_sweep_results(self, design : str, parameters : list[str], unit_design : np.ndarray, values : np.ndarray, outputs : np.ndarray):
+        """
+        Save the runs of a parameter sweep and the sensitivity indices of the swept parameters in the database, replacing the previous ones.
+        The parameters which were not swept are left empty, as they may be different in every layer.
+        """
+        deleteSweep = QSqlQuery(self.con)
+        deleteSweep.exec(f"DELETE FROM SweepRun WHERE PointKey = {self.pointID}")
+        deleteSweep.exec(f"DELETE FROM SensitivityIndex WHERE PointKey = {self.pointID}")
+
+        insertRun = QSqlQuery(self.con)
+        insertRun.prepare(f"""INSERT INTO SweepRun (Design, {", ".join(PARAMETERS)}, {", ".join(OUTPUTS)}, PointKey)
+            VALUES (:Design, {", ".join(":" + name for name in PARAMETERS + OUTPUTS)}, :PointKey)""")
+        insertRun.bindValue(":Design", design)
+        insertRun.bindValue(":PointKey", self.pointID)
+        insertIndex = QSqlQuery(self.con)
+        insertIndex.prepare("INSERT INTO SensitivityIndex (Parameter, Output, Index1, Index2, PointKey) VALUES (:Parameter, :Output, :Index1, :Index2, :PointKey)")
+        insertIndex.bindValue(":PointKey", self.pointID)
+
+        count_rows(len(values))
+        self.con.transaction()
+        for row, output in zip(values, outputs):
+            for parameter in PARAMETERS:
+                insertRun.bindValue(f":{parameter}", float(row[parameters.index(parameter)]) if parameter in parameters else None)
+            for name, value in zip(OUTPUTS, output):
+                insertRun.bindValue(f":{name}", None if np.isnan(value) else float(value))
+            insertRun.exec()
+        for name in ANALYSED_OUTPUTS:
+            first, second = sensitivity_indices(design, unit_design, outputs[:, OUTPUTS.index(name)])
+            insertIndex.bindValue(":Output", name)
+            for parameter, index1, index2 in zip(parameters, first, second):
+                insertIndex.bindValue(":Parameter", parameter)
+                insertIndex.bindValue(":Index1", None if np.isnan(index1) else float(index1))
+                insertIndex.bindValue(":Index2", None if np.isnan(index2) else float(index2))
+                insertIndex.exec()
+        self.con.commit()
+
+    def compute_optimiser(self, layers : list[list], bounds : list[tuple[float, float]], nb_restarts : int, nb_cells : int, max_evaluations : int, nb_workers : int | None = None):
+        """
+        Search the parameters of the layers minimising the total RMSE with nb_restarts independent runs of the Nelder-Mead method, in nb_workers processes (by default, one per processor). Each run makes at most max_evaluations direct models.
+        layers gives the parameters of every layer, as for compute_direct_model: they are the starting point of the first run. bounds gives the (min, max) of -log10(K), the porosity, the thermal conductivity and the heat capacity, as for the priors of the MCMC.
+        When the best parameters are found, the direct model is run with them: its results, the parameters and the RMSE are saved in a new run, as for compute_direct_model.
+        """
+        if self.is_running():
+            logger.warning("Please wait while for the previous computation to end")
+            return
+
+        settings = [f"{nb_restarts} restarts, {max_evaluations} direct models at most per restart", f"{nb_cells} cells",
+                    ", ".join(f"{parameter} in [{low:.4g}, {high:.4g}]" for parameter, (low, high) in zip(["-log10(K)", "n", "lambda_s", "rho_s*c_s"], bounds)),
+                    f"Starting point:\n{describe_layers(layers)}"]
+        self.start_run(OPTIMISER_RUN, "\n".join(settings), nb_cells)
+        self.optimiser_settings = nb_cells
+        self.optimiser_runner = OptimiserRunner(self.column_dict(), layers, bounds, nb_restarts, nb_cells, max_evaluations, nb_workers)
+        self.optimiser_runner.finished.connect(self.end_optimiser)
+        self.optimiser_runner.moveToThread(self.pool_thread)
+        self.pool_thread.started.connect(self.optimiser_runner.run)
+        self.pool_thread.start()
+
+    def end_optimiser(self, best : tuple | None):
+        """
+        This is called when the optimiser is over. Run the direct model with the best parameters in the run of the optimiser, so that they are saved with its results.
+        """
+        self.pool_thread.started.disconnect(self.optimiser_runner.run)
+        self.pool_thread.quit()
+        self.pool_thread.wait() #The direct model can't be launched while a computation is running.
+        if best is None:
+            logger.warning("The optimiser couldn't find any parameters for which the direct model works.")
+            self.coordinator.delete_run(self.runID)
+            self.OptimiserFailed.emit()
+            return
+        params, rmse, nb_evaluations = best
+        logger.info(f"Optimiser finished: total RMSE {rmse:.4g} after {nb_evaluations} direct models.")
+        self.launch_direct_model(params, self.optimiser_settings)
+
+    @profiled()
+    def compute_analytical(self, sensors : tuple[int, int], porosity : float, conductivity : float, capacity : float, nb_periods : int = 1):
+        """
+        Estimate the water flow with the amplitude ratio and phase shift methods (see backend/AnalyticalFlux.py) between the thermometers whose numbers (1 to 4) are given in sensors, and save it in a new run.
+        The thermal parameters are the ones of the solid, as for the direct model. The diurnal signal is fitted over nb_periods days around every date.
+        """
+        _, temps = self.prepare_measures()
+        if len(temps) < 2:
+            logger.warning("There are not enough cleaned measures to estimate the water flow.")
+            return
+        column_infos = self.build_column_infos()
+        column_infos.exec()
+        column_infos.next()
+        shallow, deep = sorted(sensors)
+        dz = column_infos.value(deep) - column_infos.value(shallow) #Shaft.Depth1 to Depth4 are the columns 1 to 4
+        if dz <= 0:
+            logger.warning("The thermometers used to estimate the water flow must be at different depths.")
+            return
+
+        settings = [f"Thermometers {shallow} and {deep}", f"n={porosity:.4g}, lambda_s={conductivity:.4g}, rho_s*c_s={capacity:.4g}", f"Fitted over {nb_periods} day(s)"]
+        self.start_run(ANALYTICAL_RUN, "\n".join(settings), None)
+        times = np.array([date for date, _ in temps], dtype="datetime64[s]")
+        values = np.array([t for _, t in temps], dtype=np.float64)
+        with timed("estimate_flux"):
+            flows = estimate_flux(times, values[:, shallow-1], values[:, deep-1], dz, porosity, conductivity, capacity, nb_periods)
+        self.save_analytical_results(times, flows)
+        self.end_run()
+        logger.info("Analytical estimation of the water flow finished.")
+        self.AnalyticalFinished.emit()
+
+    def save_analytical_results(self, times : np.ndarray, flows : dict):
+        """
+        Save the water flows given by the analytical flux engine in the WaterFlow table, in the current run. The rows have a method but no quantile, so they are never mistaken for the results of pyheatmy.
+        """
+        #Dates are matched as integers: formatting every date as a string would be slow on long records.
+        databaseDates, IDs = [], []
+        fetchID = QSqlQuery(self.con)
+        fetchID.exec(f"SELECT Date.Date, Date.ID FROM Date WHERE Date.PointKey = {self.pointID}")
+        while fetchID.next():
+            databaseDates.append(fetchID.value(0))
+            IDs.append(fetchID.value(1))
+        datesIDs = dict(zip(databaseDatesToDatetime64(databaseDates).astype("datetime64[s]").astype(np.int64).tolist(), IDs))
+        dates = [datesIDs.get(date) for date in times.astype("datetime64[s]").astype(np.int64).tolist()]
+
+        insertFlows = QSqlQuery(self.con)
+        insertFlows.prepare("INSERT INTO WaterFlow (WaterFlow, Date, PointKey, Method, Run) VALUES (:WaterFlow, :Date, :PointKey, :Method, :Run)")
+        insertFlows.bindValue(":PointKey", self.pointID)
+        insertFlows.bindValue(":Run", self.runID)
+        count_rows(len(dates)*len(flows))
+        self.con.transaction()
+        for method, waterFlows in flows.items():
+            insertFlows.bindValue(":Method", method)
+            for date, flow in zip(dates, waterFlows):
+                if date is None:
+                    continue
+                insertFlows.bindValue(":WaterFlow", None if np.isnan(flow) else float(flow))
+                insertFlows.bindValue(":Date", date)
+                insertFlows.exec()
+        self.con.commit()
+
+    def parameters_distribution(self, runID : int):
+        """
+        Return the layers ((name, depth) for every layer) and the parameters distribution of every layer in the given run, as an array with the columns -log10(K), porosity, thermal conductivity and heat capacity.
+        """
+        select_distribution = self.build_parameters_distribution(runID)
+        select_distribution.setForwardOnly(True)
+        select_distribution.exec()
+        distributions = {}
+        while select_distribution.next():
+            layer = (select_distribution.value(0), select_distribution.value(1))
+            distributions.setdefault(layer, []).append([select_distribution.value(i) for i in range(2,6)])
+        layers = list(distributions.keys())
+        return layers, [np.array(distributions[layer], dtype=np.float64) for layer in layers]
+
+    def stored_parameters(self, runID : int | None):
+        """
+        Return the best parameters stored for every layer in the given run ([name, depth, -log10(K), porosity, thermal conductivity, heat capacity], ordered by depth) and the parameters distribution of every layer (see parameters_distribution), or None if nothing was computed.
+        This is used to warm-start the MCMC: see compute_MCMC.
+        """
+        if runID is None:
+            return None
+        select_params = self.build_best_parameters(runID)
+        select_params.exec()
+        best = []
+        while select_params.next():
+            best.append([select_params.value(i) for i in range(6)])
+        if len(best) == 0:
+            return None
+        _, distributions = self.parameters_distribution(runID)
+        return best, distributions
+
+    @profiled()
+    def save_ensemble_results(self, bands : dict):
         """
-        Query the database and save the MCMC results. This is essentially a copy of saveDirectResults, except for the function called to get the results.
+        Save the quantile bands given by the ensemble engine in the current run, replacing the previous ones. See run_ensemble in backend/Ensemble.py for the structure of bands.
+        """
+        deleteBands = QSqlQuery(self.con)
+        deleteBands.exec(f"DELETE FROM EnsembleWaterFlow WHERE Run = {self.runID}")
+        deleteBands.exec(f"DELETE FROM EnsembleHeatFlows WHERE Run = {self.runID}")
+
+        #Dates and depths of the results are matched with the ones in the database with a single query each.
+        datesIDs = {}
+        fetchID = QSqlQuery(self.con)
+        fetchID.exec(f"SELECT Date.Date, Date.ID FROM Date WHERE Date.PointKey = {self.pointID}")
+        while fetchID.next():
+            datesIDs[fetchID.value(0)] = fetchID.value(1)
+        fetchID.exec(f"SELECT Depth.Depth, Depth.ID FROM Depth WHERE Depth.PointKey = {self.pointID} AND Depth.Cells = {self.run_cells}")
+        depthsIDs = {}
+        while fetchID.next():
+            depthsIDs[fetchID.value(0)] = fetchID.value(1)
+        dates = [datesIDs.get(datetime64ToDatabaseDate(date)) for date in bands["dates"]]
+        depths = [depthsIDs.get(float(depth)) for depth in bands["depths"]]
+
+        insertFlows = QSqlQuery(self.con)
+        insertFlows.prepare("INSERT INTO EnsembleWaterFlow (Quantile, WaterFlow, Date, PointKey, Run) VALUES (:Quantile, :WaterFlow, :Date, :PointKey, :Run)")
+        insertFlows.bindValue(":PointKey", self.pointID)
+        insertFlows.bindValue(":Run", self.runID)
+        insertHeat = QSqlQuery(self.con)
+        insertHeat.prepare("""INSERT INTO EnsembleHeatFlows (Quantile, AdvectiveFlow, ConductiveFlow, TotalFlow, Date, Depth, PointKey, Run)
+            VALUES (:Quantile, :AdvectiveFlow, :ConductiveFlow, :TotalFlow, :Date, :Depth, :PointKey, :Run)""")
+        insertHeat.bindValue(":PointKey", self.pointID)
+        insertHeat.bindValue(":Run", self.runID)
+
+        self.con.transaction()
+        for quantile, waterFlows in bands["WaterFlow"].items():
+            advecFlows = bands["AdvectiveFlow"][quantile]
+            conduFlows = bands["ConductiveFlow"][quantile]
+            totalFlows = bands["TotalFlow"][quantile]
+            insertFlows.bindValue(":Quantile", float(quantile))
+            insertHeat.bindValue(":Quantile", float(quantile))
+            nb_rows, nb_cols = shape(advecFlows)
+            count_rows(nb_rows*nb_cols + nb_cols)
+            for j in range(nb_cols):
+                if dates[j] is None:
+                    continue
+                insertFlows.bindValue(":Date", dates[j])
+                insertFlows.bindValue(":WaterFlow", float(waterFlows[j]))
+                insertFlows.exec()
+                insertHeat.bindValue(":Date", dates[j])
+                for i in range(nb_rows):
+                    insertHeat.bindValue(":Depth", depths[i])
+                    # We need to convert into float, as SQL doesn't undestand np.float32 !
+                    insertHeat.bindValue(":AdvectiveFlow", float(advecFlows[i,j]))
+                    insertHeat.bindValue(":ConductiveFlow", float(conduFlows[i,j]))
+                    insertHeat.bindValue(":TotalFlow", float(totalFlows[i,j]))
+                    insertHeat.exec()
+        self.con.commit()
+
+    @profiled()
+    def save_MCMC_results(self, results : dict):
+        """
+        Query the database and save the MCMC results in the current run. This is essentially a copy of saveDirectResults, except for the function called to get the results.
+        See results_from_column in backend/MCMCSampler.py for the structure of results.
         """
         #Quantiles for the MCMC
-        quantiles = self.col.get_quantiles()
-        depths = self.col.get_depths_mcmc() # Should be get_depths_solve?
-        times = self.col.get_times_mcmc()
+        quantiles = results["quantiles"]
+        depths = results["depths"]
+        times = results["times"]
 
-        sensorsID = self.col.get_id_sensors()
+        sensorsID = results["sensors"]
         depthsensors = [depths[i-1] for i in sensorsID] #Python indexing starts a 0 but cells are indexed starting at 1
 
         #Quantile
         insertquantiles = QSqlQuery(self.con)
-        insertquantiles.prepare(f"INSERT INTO Quantile (Quantile, PointKey) VALUES (:Quantile,{self.pointID})")
-        #Depths
-        insertDepths = QSqlQuery(self.con)
-        insertDepths.prepare("INSERT INTO Depth (Depth,PointKey) VALUES (:Depth, :PointKey)")
-        insertDepths.bindValue(":PointKey", self.pointID)
+        insertquantiles.prepare(f"INSERT INTO Quantile (Quantile, PointKey, Run) VALUES (:Quantile,{self.pointID},{self.runID})")
         #Temperature and heat flows
         fetchDate = QSqlQuery(self.con)
         fetchDate.prepare(f"SELECT Date.ID FROM Date WHERE Date.PointKey = :PointKey AND Date.Date = :Date ")
         fetchDate.bindValue(":PointKey", self.pointID)
-        fetchDepth = QSqlQuery(self.con)
-        fetchDepth.prepare(f"SELECT Depth.ID FROM Depth WHERE Depth.PointKey = :PointKey AND Depth.Depth = :Depth")
-        fetchDepth.bindValue(":PointKey", self.pointID)
+        fetchDepth = self.build_fetch_depth()
         insertTemps = QSqlQuery(self.con)
         insertTemps.prepare("""INSERT INTO TemperatureAndHeatFlows (Date, Depth, Temperature, AdvectiveFlow, ConductiveFlow, TotalFlow, PointKey, Quantile)
             VALUES (:Date, :Depth, :Temperature, :AdvectiveFlow, :ConductiveFlow, :TotalFlow, :PointKey, :Quantile)""")
@@ -328,11 +870,7 @@ class Compute(QtCore.QObject):
                  VALUES (:Depth1, :Depth2, :Depth3, :RMSE1, :RMSE2, :RMSE3, :RMSETotal, :PointKey, :Quantile)""")
         insertRMSE.bindValue(":PointKey", self.pointID)
 
-        self.con.transaction()
-        for depth in depths:
-            insertDepths.bindValue(":Depth", float(depth))
-            insertDepths.exec()
-        self.con.commit()
+        self.save_depths(depths)
 
         for quantile in quantiles:
             insertquantiles.bindValue(":Quantile",quantile)
@@ -341,8 +879,9 @@ class Compute(QtCore.QObject):
 
             insertTemps.bindValue(":Quantile", quantileID)
             #We assume solvedTemps,advecFlows and conduFlows have the same shapes, and that the dates and depths are also identical, ie the first column of all three arrays corrresponds to the same fixed date.
-            solvedTemps = self.col.get_temps_quantile(quantile)
+            solvedTemps = results["temps"][quantile]
             nb_rows,nb_cols = shape(solvedTemps)
+            count_rows(nb_rows*nb_cols + nb_cols) #Temperatures and heat flows, then water flows
             self.con.transaction()
             for j in range(nb_cols):
                 fetchDate.bindValue(":Date", datetimeToDatabaseDate(times[j]))
@@ -363,7 +902,7 @@ class Compute(QtCore.QObject):
             self.con.commit()
 
             #Water flows
-            waterFlows = self.col.get_flows_quantile(quantile)[0,:] #Water flows at the top of the column.
+            waterFlows = results["flows"][quantile] #Water flows at the top of the column.
             insertFlows.bindValue(":Quantile", quantileID)
             self.con.transaction()
             for j in range(nb_cols):
@@ -376,7 +915,7 @@ class Compute(QtCore.QObject):
             self.con.commit()
 
             #RMSE
-            computedRMSE = self.col.get_RMSE_quantile(quantile)
+            computedRMSE = results["RMSE"][quantile]
             insertRMSE.bindValue(":Quantile", quantileID)
 
             self.con.transaction()
@@ -394,13 +933,14 @@ class Compute(QtCore.QObject):
         # Warning: the code for inserting the layers is a duplicate from save_layers_and_params.
         # We use a copy of save_layers_and_params's code just because we are lazy and don't want to
         # create all the layers THEN query one by one to get their ID THEN insert the parameters distribution. Here, we do it all at once.
-        layers = self.col.get_best_layers()
-        all_params = self.col.get_all_params()
+        layers = results["best"]
+        all_params = results["distributions"]
         current_params_index = 0
 
         insertlayer = QSqlQuery(self.con)
-        insertlayer.prepare("INSERT INTO Layer (Name, Depth, PointKey) VALUES (:Name, :Depth, :PointKey)")
+        insertlayer.prepare("INSERT INTO Layer (Name, Depth, PointKey, Run) VALUES (:Name, :Depth, :PointKey, :Run)")
         insertlayer.bindValue(":PointKey", self.pointID)
+        insertlayer.bindValue(":Run", self.runID)
         insertparams = QSqlQuery(self.con)
         insertparams.prepare(f"""INSERT INTO BestParameters (Permeability, ThermConduct, Porosity, Capacity, Layer, PointKey)
                            VALUES (:Permeability, :ThermConduct, :Porosity, :Capacity, :Layer, :PointKey)""")
@@ -411,13 +951,7 @@ class Compute(QtCore.QObject):
         insertdistribution.bindValue(":PointKey", self.pointID)
 
         self.con.transaction()
-        for elem in layers:
-            name = elem.name
-            zLow = elem.zLow
-            perm = elem.params.moinslog10K
-            poro = elem.params.n
-            lambda_s = elem.params.lambda_s
-            rhos_cs = elem.params.rhos_cs
+        for name, zLow, perm, poro, lambda_s, rhos_cs in layers:
 
             insertlayer.bindValue(":Name", name)
             insertlayer.bindValue(":Depth", zLow)
@@ -444,8 +978,74 @@ class Compute(QtCore.QObject):
         self.con.commit()
 
         # Recompute direct model with best parameters.
-        self.col.compute_solve_transi(layers, self.mcmc_runner.nb_cells, verbose = False)
-        self.save_direct_model_results(save_dates = False)
+        from pyheatmy import layersListCreator
+        self.col.compute_solve_transi(layersListCreator(layers), self.mcmc_runner.nb_cells, verbose = False)
+        self.save_direct_model_results()
+
+    def save_MCMC_run(self, results : dict):
+        """
+        Save the settings and the convergence of the MCMC in the current run.
+        """
+        insertRun = QSqlQuery(self.con)
+        insertRun.prepare(f"""INSERT INTO MCMCRun (MaxIterations, Iterations, WarmStart, AcceptanceRate, {", ".join(DIAGNOSTICS)}, Converged, BurnIn, Thinning, MaxSamples, StoredSamples, PointKey, Run)
+                VALUES (:MaxIterations, :Iterations, :WarmStart, :AcceptanceRate, {", ".join(f":{name}" for name in DIAGNOSTICS)}, :Converged, :BurnIn, :Thinning, :MaxSamples, :StoredSamples, :PointKey, :Run)""")
+        insertRun.bindValue(":MaxIterations", self.mcmc_runner.nb_iter)
+        insertRun.bindValue(":Iterations", results["iterations"])
+        insertRun.bindValue(":WarmStart", int(self.mcmc_runner.warm_start is not None))
+        insertRun.bindValue(":AcceptanceRate", results["acceptance"])
+        for name in DIAGNOSTICS:
+            #Infinite diagnostics (a parameter which never moved) are stored as NULL.
+            value = results["diagnostics"][name]
+            insertRun.bindValue(f":{name}", value if np.isfinite(value) else None)
+        insertRun.bindValue(":Converged", int(results["converged"]))
+        burn_in, thinning, max_samples = self.mcmc_runner.storage
+        insertRun.bindValue(":BurnIn", float(burn_in))
+        insertRun.bindValue(":Thinning", thinning)
+        insertRun.bindValue(":MaxSamples", max_samples)
+        insertRun.bindValue(":StoredSamples", min(len(distribution) for distribution in results["distributions"]))
+        insertRun.bindValue(":PointKey", self.pointID)
+        insertRun.bindValue(":Run", self.runID)
+        insertRun.exec()
+
+    def build_fetch_depth(self):
+        """
+        Build and return a query giving the ID of the depth :Depth of the current run.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"SELECT Depth.ID FROM Depth WHERE Depth.PointKey = :PointKey AND Depth.Cells = :Cells AND Depth.Depth = :Depth")
+        query.bindValue(":PointKey", self.pointID)
+        query.bindValue(":Cells", self.run_cells)
+        return query
+
+    def build_best_parameters(self, runID : int):
+        """
+        Build and return a query giving the best parameters of every layer in the given run, ordered by depth.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT Layer.Name, Layer.Depth, BestParameters.Permeability, BestParameters.Porosity, BestParameters.ThermConduct, BestParameters.Capacity FROM BestParameters
+            JOIN Layer
+            ON BestParameters.Layer = Layer.ID
+            WHERE BestParameters.PointKey = {self.pointID}
+            AND Layer.Run = {runID}
+            ORDER BY Layer.Depth
+        """)
+        return query
+
+    def build_parameters_distribution(self, runID : int):
+        """
+        Build and return a query giving the parameters distribution of every layer in the given run, ordered by depth.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT Layer.Name, Layer.Depth, ParametersDistribution.Permeability, ParametersDistribution.Porosity, ParametersDistribution.ThermConduct, ParametersDistribution.HeatCapacity FROM ParametersDistribution
+            JOIN Layer
+            ON ParametersDistribution.Layer = Layer.ID
+            WHERE ParametersDistribution.PointKey = {self.pointID}
+            AND Layer.Run = {runID}
+            ORDER BY Layer.Depth, ParametersDistribution.ID
+        """)
+        return query
 
     def build_column_infos(self):
         """
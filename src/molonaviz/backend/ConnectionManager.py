@@ -0,0 +1,113 @@
+"""
+This file regroups the management of the connections to the database.
+A QSqlDatabase connection may only be used in the thread which created it: to read or write the database from several threads, every thread must have its own connection. The ConnectionManager gives every thread its own named connection to the same database file, with the same settings.
+"""
+import itertools
+import threading
+from PyQt5.QtSql import QSqlDatabase, QSqlQuery
+
+BUSY_TIMEOUT = 5000 #Time (in milliseconds) a connection waits for the database to be unlocked before failing.
+
+#Pragmas executed on every connection.
+#Foreign keys are not enforced: some functions delete rows which may still be referenced (for example, the dates in SPointCoordinator.delete_processed_data).
+PRAGMAS = [f"PRAGMA busy_timeout = {BUSY_TIMEOUT}",
+           "PRAGMA synchronous = NORMAL"]
+#Pragmas which can only be executed by a connection allowed to write. Write-Ahead Logging lets readers work while another connection writes.
+WRITE_PRAGMAS = ["PRAGMA journal_mode = WAL"]
+
+class ConnectionManager:
+    """
+    A concrete class giving named connections to a database file: every thread has at most one connection allowed to write and one read-only connection.
+    How to use this class:
+    - get a manager with connection_manager(databaseFile), so all the connections to a file are handled by the same manager.
+    - in any thread, call get_connection (or get_connection(readOnly=True) for a thread which only reads). Calling it again in the same thread gives the same connection.
+    - when a thread is over, it should call release, after all its queries have been deleted.
+    - when the database is closed, call close_all.
+    """
+    _counter = itertools.count()
+
+    def __init__(self, databaseFile : str):
+        self.databaseFile = databaseFile
+        self.lock = threading.Lock()
+        self.local = threading.local() #Names of the connections of the current thread
+        self.connections = {} #Name of every connection: identifier of the thread which created it
+
+    def get_connection(self, readOnly : bool = False):
+        """
+        Return the connection of the current thread, opening it if needed. Raise a RuntimeError if the connection couldn't be opened.
+        """
+        names = self.thread_connections()
+        if readOnly in names:
+            return QSqlDatabase.database(names[readOnly])
+
+        name = f"Molonaviz{next(self._counter)}{'ReadOnly' if readOnly else ''}"
+        con = QSqlDatabase.addDatabase("QSQLITE", name)
+        con.setDatabaseName(self.databaseFile)
+        options = [f"QSQLITE_BUSY_TIMEOUT={BUSY_TIMEOUT}"]
+        if readOnly:
+            options.append("QSQLITE_OPEN_READONLY")
+        con.setConnectOptions(";".join(options))
+        if not con.open():
+            error = con.lastError().text()
+            del con
+            QSqlDatabase.removeDatabase(name)
+            raise RuntimeError(f"Couldn't open the database {self.databaseFile}: {error}")
+        query = QSqlQuery(con)
+        for pragma in PRAGMAS + ([] if readOnly else WRITE_PRAGMAS):
+            query.exec(pragma)
+        query.finish()
+
+        names[readOnly] = name
+        with self.lock:
+            self.connections[name] = threading.get_ident()
+        return con
+
+    def release(self, readOnly : bool | None = None):
+        """
+        Close and remove the connections of the current thread: the read-only one, the one allowed to write, or both if readOnly is None.
+        All QSqlQuery objects and QSqlDatabase objects using these connections should have been deleted.
+        """
+        names = self.thread_connections()
+        for key in [k for k in list(names) if readOnly is None or k == readOnly]:
+            name = names.pop(key)
+            con = QSqlDatabase.database(name, False)
+            con.close()
+            del con
+            QSqlDatabase.removeDatabase(name)
+            with self.lock:
+                self.connections.pop(name, None)
+
+    def close_all(self):
+        """
+        Close and remove every connection given by this manager. This should be called from the main thread, once the other threads are over.
+        A connection can only be closed by the thread which created it: connections of other threads are only removed.
+        """
+        with self.lock:
+            connections, self.connections = self.connections, {}
+        for name, thread in connections.items():
+            if thread == threading.get_ident():
+                con = QSqlDatabase.database(name, False)
+                con.close()
+                del con
+            QSqlDatabase.removeDatabase(name)
+        self.local = threading.local()
+
+    def thread_connections(self):
+        """
+        Return a dictionnary with the names of the connections of the current thread: the key is True for the read-only connection, False for the other one.
+        """
+        if not hasattr(self.local, "names"):
+            self.local.names = {}
+        return self.local.names
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def connection_manager(databaseFile : str):
+    """
+    Return the manager handling the connections to the given database file.
+    """
+    with _managers_lock:
+        if databaseFile not in _managers:
+            _managers[databaseFile] = ConnectionManager(databaseFile)
+        return _managers[databaseFile]
@@ -0,0 +1,192 @@
+"""
+This file regroups the ensemble engine, used to propagate the uncertainty given by the MCMC to the water and heat flows.
+Parameter sets are drawn from the parameters distribution stored after a MCMC, and the direct model is run for each of them in a pool of processes. The flows are reduced to quantile bands on the fly with the P² algorithm, so the memory used doesn't depend on the number of parameter sets.
+This file doesn't depend on Qt: it is imported by the processes of the pool.
+"""
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+#Tables holding the quantile bands. They are created when a point is opened, as databases created with older versions of Molonaviz don't have them.
+ENSEMBLE_TABLES = ["""CREATE TABLE IF NOT EXISTS EnsembleWaterFlow (
+            ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+            Quantile    REAL,
+            WaterFlow   REAL,
+            Date        INTEGER REFERENCES Date (ID),
+            PointKey    INTEGER REFERENCES Point (ID),
+            Run         INTEGER REFERENCES ComputationRun (ID)
+        )""",
+        """CREATE TABLE IF NOT EXISTS EnsembleHeatFlows (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            Quantile        REAL,
+            AdvectiveFlow   REAL,
+            ConductiveFlow  REAL,
+            TotalFlow       REAL,
+            Date            INTEGER REFERENCES Date (ID),
+            Depth           INTEGER REFERENCES Depth (ID),
+            PointKey        INTEGER REFERENCES Point (ID),
+            Run             INTEGER REFERENCES ComputationRun (ID)
+        )"""]
+
+class P2Quantile:
+    """
+    Streaming estimator of a quantile with the P² algorithm (Jain and Chlamtac, 1985).
+    The estimator works element-wise on arrays: every call to add gives one new observation for each element of an array with the given shape. Only five markers are kept for each element, whatever the number of observations.
+    """
+    def __init__(self, quantile : float, shape : tuple, dtype = np.float32):
+        self.quantile = quantile
+        self.count = 0
+        self.first = [] #The first five observations, used to initialise the markers
+        self.heights = np.empty((5,) + tuple(shape), dtype=dtype)
+        self.positions = np.empty((5,) + tuple(shape), dtype=dtype)
+        p = quantile
+        self.desired = np.array([0, 2*p, 4*p, 2 + 2*p, 4], dtype=np.float64) #Desired positions of the markers
+        self.increments = np.array([0, p/2, p, (1 + p)/2, 1], dtype=np.float64)
+
+    def add(self, x : np.ndarray):
+        x = np.asarray(x, dtype=self.heights.dtype)
+        self.count += 1
+        if self.count <= 5:
+            self.first.append(x)
+            if self.count == 5:
+                self.heights[:] = np.sort(np.stack(self.first), axis=0)
+                self.positions[:] = np.arange(5, dtype=self.positions.dtype).reshape((5,) + (1,)*x.ndim)
+                self.first = []
+            return
+
+        q, n = self.heights, self.positions
+        #Cell k of the observation, so that q[k] <= x < q[k+1]. The extreme markers are moved if needed.
+        k = np.minimum(np.sum(q[1:] <= x, axis=0), 3)
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        for i in range(1, 5):
+            n[i] += (k < i)
+        self.desired += self.increments
+
+        #Adjust the three middle markers if they are too far from their desired position.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in range(1, 4):
+                d = self.desired[i] - n[i]
+                up = (d >= 1) & (n[i+1] - n[i] > 1)
+                down = (d <= -1) & (n[i-1] - n[i] < -1)
+                move = up | down
+                if not np.any(move):
+                    continue
+                s = np.where(up, 1, -1).astype(q.dtype)
+                parabolic = q[i] + s/(n[i+1] - n[i-1]) * ((n[i] - n[i-1] + s)*(q[i+1] - q[i])/(n[i+1] - n[i]) + (n[i+1] - n[i] - s)*(q[i] - q[i-1])/(n[i] - n[i-1]))
+                neighbour_q = np.where(up, q[i+1], q[i-1])
+                neighbour_n = np.where(up, n[i+1], n[i-1])
+                linear = q[i] + s*(neighbour_q - q[i])/(neighbour_n - n[i])
+                new_q = np.where((q[i-1] < parabolic) & (parabolic < q[i+1]), parabolic, linear)
+                q[i] = np.where(move, new_q, q[i])
+                n[i] += np.where(move, s, 0)
+
+    def value(self):
+        """
+        Return the current estimation of the quantile for every element. With less than five observations, the exact quantile is returned.
+        """
+        if self.count == 0:
+            return np.full(self.heights.shape[1:], np.nan, dtype=self.heights.dtype)
+        if self.count < 5:
+            return np.quantile(np.stack(self.first), self.quantile, axis=0).astype(self.heights.dtype)
+        return self.heights[2].copy()
+
+class StreamingQuantiles:
+    """
+    Estimate several quantiles of the same arrays on the fly (one P2Quantile per quantile).
+    """
+    def __init__(self, quantiles : list[float], shape : tuple, dtype = np.float32):
+        self.estimators = {quantile : P2Quantile(quantile, shape, dtype) for quantile in quantiles}
+
+    def add(self, x : np.ndarray):
+        for estimator in self.estimators.values():
+            estimator.add(x)
+
+    def values(self):
+        """
+        Return a dictionnary whose keys are the quantiles and values are the estimated arrays.
+        """
+        return {quantile : estimator.value() for quantile, estimator in self.estimators.items()}
+
+def draw_parameter_sets(layers : list[tuple[str, float]], distributions : list[np.ndarray], nb_samples : int, seed : int | None = None):
+    """
+    Draw nb_samples parameter sets from the parameters distribution given by the MCMC.
+    layers is the list of the (name, depth) of the layers, and distributions the list of the arrays of parameters of each layer (one row per state of the MCMC, with the columns -log10(K), porosity, thermal conductivity and heat capacity).
+    The same state of the MCMC is used for all the layers, as the parameters of the layers are not independent.
+    Return a list of parameter sets in the format expected by layersListCreator: for every layer, [name, depth, -log10(K), porosity, thermal conductivity, heat capacity].
+    """
+    nb_states = min(len(distribution) for distribution in distributions)
+    rng = np.random.default_rng(seed)
+    states = rng.integers(0, nb_states, size=nb_samples)
+    return [[[name, depth] + [float(v) for v in distribution[state]] for (name, depth), distribution in zip(layers, distributions)] for state in states]
+
+_column = None #Column used by the current process of the pool
+
+def init_worker(col_dict : dict):
+    """
+    Initialise a process of the pool: the column is only built once per process.
+    """
+    global _column
+    from pyheatmy import Column #pyheatmy is slow to import: it is only imported when a computation is needed.
+    _column = Column.from_dict(col_dict)
+
+def solve_direct_model(params : list[list], nb_cells : int):
+    """
+    Run the direct model with the given parameter set. Return the dates, the depths, the water flow at the top of the column and the advective and conductive flows.
+    """
+    from pyheatmy import layersListCreator
+    _column.compute_solve_transi(layersListCreator(params), nb_cells, verbose=False)
+    depths = np.asarray(_column.get_depths_solve(), dtype=np.float64)
+    times = np.array(_column.get_times_solve(), dtype="datetime64[s]")
+    return (times, depths, np.asarray(_column.get_flows_solve(depths[0]), dtype=np.float32),
+            np.asarray(_column.get_advec_flows_solve(), dtype=np.float32), np.asarray(_column.get_conduc_flows_solve(), dtype=np.float32))
+
+def map_direct_models(function, col_dict : dict, nb_workers : int | None, *iterables):
+    """
+    Return an iterator over function(*args) for the arguments given by iterables, as the built-in map. The function is called in processes whose column has been built by init_worker, so it can use it.
+    The calls are made in nb_workers processes (by default, one per processor). If nb_workers is 1, they are made in the current process.
+    """
+    if nb_workers == 1:
+        init_worker(col_dict)
+        yield from map(function, *iterables)
+        return
+    #Processes are spawned rather than forked: forking a process running several threads (like the Qt application) may deadlock.
+    with ProcessPoolExecutor(max_workers=nb_workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker, initargs=(col_dict,)) as executor:
+        yield from executor.map(function, *iterables)
+
+def run_ensemble(col_dict : dict, parameter_sets : list, nb_cells : int, quantiles : list[float], nb_workers : int | None = None, progress = None):
+    """
+    Run the direct model for every parameter set and return the quantile bands of the flows as a dictionnary with the following keys:
+        -"dates", "depths": the dates (datetime64) and depths of the results
+        -"WaterFlow": a dictionnary whose keys are the quantiles and values are the water flows at the top of the column
+        -"AdvectiveFlow", "ConductiveFlow", "TotalFlow": a dictionnary whose keys are the quantiles and values are the heat flows maps (depth x date)
+    The direct models are run in nb_workers processes: see map_direct_models.
+    If progress is not None, progress(done, total) is called every time a direct model is over.
+    """
+    results = map_direct_models(solve_direct_model, col_dict, nb_workers, parameter_sets, itertools.repeat(nb_cells))
+    return reduce_results(results, quantiles, len(parameter_sets), progress)
+
+def reduce_results(results, quantiles : list[float], total : int, progress = None):
+    """
+    Reduce the results of the direct models to quantile bands as they arrive. See run_ensemble.
+    """
+    bands = None
+    for done, (times, depths, water, advective, conductive) in enumerate(results, start=1):
+        if bands is None:
+            bands = {"dates" : times, "depths" : depths}
+            estimators = {"WaterFlow" : StreamingQuantiles(quantiles, water.shape),
+                          "AdvectiveFlow" : StreamingQuantiles(quantiles, advective.shape),
+                          "ConductiveFlow" : StreamingQuantiles(quantiles, conductive.shape),
+                          "TotalFlow" : StreamingQuantiles(quantiles, advective.shape)}
+        estimators["WaterFlow"].add(water)
+        estimators["AdvectiveFlow"].add(advective)
+        estimators["ConductiveFlow"].add(conductive)
+        estimators["TotalFlow"].add(advective + conductive)
+        if progress is not None:
+            progress(done, total)
+    if bands is None:
+        return None
+    for name, estimator in estimators.items():
+        bands[name] = estimator.values()
+    return bands
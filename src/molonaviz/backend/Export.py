@@ -0,0 +1,244 @@
+"""
+This file regroups the classes used to export the measures and the results of a point to files.
+The rows are read from the database and written to the files chunk by chunk, so the memory used does not depend on the number of rows exported.
+"""
+import logging
+import csv
+from PyQt5 import QtCore
+from PyQt5.QtSql import QSqlQuery, QSqlDatabase
+
+from .SPointCoordinator import SPointCoordinator
+from .ConnectionManager import connection_manager
+
+logger = logging.getLogger(__name__)
+
+#Dates are exported as YYYY-MM-DD HH:MM:SS, which is understood by most tools (and is how Python writes a datetime).
+EXPORT_DATE = "REPLACE(Date.Date, '/', '-') AS Date"
+
+#For every dataset: the columns, the FROM clause, the WHERE clause restricting the rows to a point (pointID is formatted in) and the ORDER BY clause.
+#Datasets with results have a Quantile column: the quantiles to export can be chosen. Results are the ones of a run (see backend/ComputationRuns.py). Datasets with a Date column can be restricted to a date range.
+EXPORT_DATASETS = {
+    #The two files of the cleaned measures export of the sampling point window: their headers are the ones of the files written by previous versions of Molonaviz.
+    "CleanedPressures" : (f"{EXPORT_DATE}, CleanedMeasures.Pressure AS \"Differential pressure (m)\", CleanedMeasures.TempBed AS \"Temperature (°C)\"",
+                            "FROM CleanedMeasures JOIN Date ON CleanedMeasures.Date = Date.ID",
+                            "WHERE CleanedMeasures.PointKey = {pointID}",
+                            "ORDER BY Date.Date"),
+    "CleanedTemperatures" : (f"{EXPORT_DATE}, CleanedMeasures.Temp1 AS \"Temperature 1 (°C)\", CleanedMeasures.Temp2 AS \"Temperature 2 (°C)\", CleanedMeasures.Temp3 AS \"Temperature 3 (°C)\", CleanedMeasures.Temp4 AS \"Temperature 4 (°C)\"",
+                            "FROM CleanedMeasures JOIN Date ON CleanedMeasures.Date = Date.ID",
+                            "WHERE CleanedMeasures.PointKey = {pointID}",
+                            "ORDER BY Date.Date"),
+    "CleanedMeasures" : (f"{EXPORT_DATE}, CleanedMeasures.Temp1 AS Temp1, CleanedMeasures.Temp2 AS Temp2, CleanedMeasures.Temp3 AS Temp3, CleanedMeasures.Temp4 AS Temp4, CleanedMeasures.TempBed AS TempBed, CleanedMeasures.Pressure AS Pressure",
+                            "FROM CleanedMeasures JOIN Date ON CleanedMeasures.Date = Date.ID",
+                            "WHERE CleanedMeasures.PointKey = {pointID}",
+                            "ORDER BY Date.Date"),
+    "Temperatures" : (f"{EXPORT_DATE}, Depth.Depth AS Depth, Quantile.Quantile AS Quantile, TemperatureAndHeatFlows.Temperature AS Temperature",
+                            "FROM TemperatureAndHeatFlows JOIN Date ON TemperatureAndHeatFlows.Date = Date.ID JOIN Depth ON TemperatureAndHeatFlows.Depth = Depth.ID JOIN Quantile ON TemperatureAndHeatFlows.Quantile = Quantile.ID",
+                            "WHERE Quantile.PointKey = {pointID} AND Quantile.Run = :Run",
+                            "ORDER BY Quantile.Quantile, Date.Date, Depth.Depth"),
+    "HeatFlows" : (f"{EXPORT_DATE}, Depth.Depth AS Depth, Quantile.Quantile AS Quantile, TemperatureAndHeatFlows.AdvectiveFlow AS AdvectiveFlow, TemperatureAndHeatFlows.ConductiveFlow AS ConductiveFlow, TemperatureAndHeatFlows.TotalFlow AS TotalFlow",
+                            "FROM TemperatureAndHeatFlows JOIN Date ON TemperatureAndHeatFlows.Date = Date.ID JOIN Depth ON TemperatureAndHeatFlows.Depth = Depth.ID JOIN Quantile ON TemperatureAndHeatFlows.Quantile = Quantile.ID",
+                            "WHERE Quantile.PointKey = {pointID} AND Quantile.Run = :Run",
+                            "ORDER BY Quantile.Quantile, Date.Date, Depth.Depth"),
+    "WaterFlows" : (f"{EXPORT_DATE}, Quantile.Quantile AS Quantile, WaterFlow.WaterFlow AS WaterFlow",
+                            "FROM WaterFlow JOIN Date ON WaterFlow.Date = Date.ID JOIN Quantile ON WaterFlow.Quantile = Quantile.ID",
+                            "WHERE Quantile.PointKey = {pointID} AND Quantile.Run = :Run",
+                            "ORDER BY Quantile.Quantile, Date.Date"),
+    "ParametersDistribution" : ("Layer.Depth AS Layer, ParametersDistribution.Permeability AS Permeability, ParametersDistribution.ThermConduct AS ThermConduct, ParametersDistribution.Porosity AS Porosity, ParametersDistribution.HeatCapacity AS HeatCapacity",
+                            "FROM ParametersDistribution JOIN Layer ON ParametersDistribution.Layer = Layer.ID",
+                            "WHERE ParametersDistribution.PointKey = {pointID} AND Layer.Run = :Run",
+                            "ORDER BY Layer.Depth, ParametersDistribution.ID")
+}
+
+#File extension for every export format.
+EXPORT_FORMATS = {"CSV" : ".csv", "Parquet" : ".parquet", "HDF5" : ".h5"}
+
+def build_export_query(con : QSqlDatabase, pointID : int, dataset : str, quantiles : list[float] | None = None, start : str | None = None, end : str | None = None, runID : int | None = None):
+    """
+    Build and return a query selecting the rows of the given dataset (a key of EXPORT_DATASETS) for a point.
+    -datasets with results only select the rows of the run runID
+    -if quantiles is not None, only the rows for these quantiles are selected (datasets without quantiles ignore this argument)
+    -if start and end are not None, they must respect the database date format: only the rows between these two dates are selected (datasets without dates ignore these arguments)
+    """
+    columns, from_clause, where_clause, order_clause = EXPORT_DATASETS[dataset]
+    where_clause = where_clause.format(pointID = pointID)
+    if quantiles is not None and "Quantile" in from_clause:
+        where_clause += f" AND Quantile.Quantile IN ({', '.join(str(q) for q in quantiles)})"
+    dated = start is not None and end is not None and "Date" in from_clause
+    if dated:
+        where_clause += " AND Date.Date BETWEEN :start AND :end"
+    query = QSqlQuery(con)
+    query.setForwardOnly(True) #Rows are only read once: don't keep them in memory
+    query.prepare(f"SELECT {columns} {from_clause} {where_clause} {order_clause}")
+    if dated:
+        query.bindValue(":start", start)
+        query.bindValue(":end", end)
+    if ":Run" in where_clause:
+        query.bindValue(":Run", runID)
+    return query
+
+class CSVWriter:
+    """
+    Write the chunks in a .csv file.
+    """
+    def __init__(self, path : str, headers : list[str]):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(headers)
+
+    def write(self, columns : list[list]):
+        self.writer.writerows(zip(*columns))
+
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    """
+    Write the chunks in a Parquet file: every chunk is a row group. This requires pyarrow.
+    """
+    def __init__(self, path : str, headers : list[str]):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.path = path
+        self.headers = headers
+        self.writer = None #Created with the first chunk, once the types of the columns are known.
+
+    def write(self, columns : list[list]):
+        table = self.pyarrow.table(dict(zip(self.headers, columns)))
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is None:
+            #No rows: still write an empty file with the right columns.
+            self.pyarrow.parquet.write_table(self.pyarrow.table({header : [] for header in self.headers}), self.path)
+        else:
+            self.writer.close()
+
+class HDF5Writer:
+    """
+    Write the chunks in a HDF5 file. Every column is a one-dimensional dataset at the root of the file, which grows with every chunk. This requires h5py.
+    """
+    def __init__(self, path : str, headers : list[str]):
+        import h5py
+        self.h5py = h5py
+        self.file = h5py.File(path, "w")
+        self.headers = headers
+        self.nb_rows = 0
+
+    def write(self, columns : list[list]):
+        nb_new_rows = len(columns[0])
+        for header, column in zip(self.headers, columns):
+            if header not in self.file:
+                dtype = self.h5py.string_dtype() if isinstance(column[0], str) else "f8"
+                self.file.create_dataset(header, shape=(0,), maxshape=(None,), dtype=dtype, chunks=True)
+            dataset = self.file[header]
+            dataset.resize((self.nb_rows + nb_new_rows,))
+            if dataset.dtype.kind == "f":
+                column = [float("nan") if value is None else value for value in column] #NULL values
+            dataset[self.nb_rows:] = column
+        self.nb_rows += nb_new_rows
+
+    def close(self):
+        self.file.close()
+
+EXPORT_WRITERS = {"CSV" : CSVWriter, "Parquet" : ParquetWriter, "HDF5" : HDF5Writer}
+
+class ExportRunner(QtCore.QObject):
+    """
+    A QT runner which is meant to export datasets in its own thread.
+    A QSqlDatabase connection may only be used in the thread which created it: the runner uses its own read-only connection to the database (see ConnectionManager).
+    targets is a list of tuples (dataset, path). The results exported are the ones of the run runID.
+    """
+    finished = QtCore.pyqtSignal(str) #Empty string if the export succeeded, error message otherwise.
+
+    def __init__(self, databaseName : str, pointID : int, runID : int | None, targets : list[tuple[str, str]], export_format : str, quantiles : list[float] | None, start : str | None, end : str | None, chunk_size : int = 50000):
+        super(ExportRunner, self).__init__()
+        self.databaseName = databaseName
+        self.pointID = pointID
+        self.runID = runID
+        self.targets = targets
+        self.export_format = export_format
+        self.quantiles = quantiles
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+
+    def run(self):
+        connections = connection_manager(self.databaseName)
+        error = ""
+        try:
+            con = connections.get_connection(readOnly=True)
+            for dataset, path in self.targets:
+                self.export_dataset(con, dataset, path)
+        except ImportError as e:
+            error = f"The {self.export_format} format requires a module which is not installed ({e.name})."
+        except Exception as e:
+            error = str(e)
+        con = None
+        connections.release()
+        self.finished.emit(error)
+
+    def export_dataset(self, con : QSqlDatabase, dataset : str, path : str):
+        """
+        Write the given dataset in the file located at path, chunk by chunk.
+        """
+        query = build_export_query(con, self.pointID, dataset, self.quantiles, self.start, self.end, self.runID)
+        if not query.exec():
+            raise RuntimeError(query.lastError().text())
+        record = query.record()
+        headers = [record.fieldName(i) for i in range(record.count())]
+        writer = EXPORT_WRITERS[self.export_format](path, headers)
+        try:
+            has_rows = query.next()
+            while has_rows:
+                columns = [[] for _ in headers]
+                nb_rows = 0
+                while has_rows and nb_rows < self.chunk_size:
+                    for i, column in enumerate(columns):
+                        column.append(query.value(i))
+                    nb_rows += 1
+                    has_rows = query.next()
+                writer.write(columns)
+        finally:
+            writer.close()
+            query.finish()
+        logger.info(f"{dataset} has been exported to {path}")
+
+class Export(QtCore.QObject):
+    """
+    How to use this class :
+    - Initialise the export engine by giving it the coordinator of the current point.
+    - Call export() with the datasets and the files to write. The export runs in its own thread: when it is over, the signal exportFinished is emitted with an empty string, or with an error message if something went wrong.
+    """
+    exportFinished = QtCore.pyqtSignal(str)
+
+    def __init__(self, coordinator : SPointCoordinator):
+        super(Export, self).__init__()
+        self.thread = QtCore.QThread()
+        self.databaseName = coordinator.con.databaseName()
+        self.pointID = coordinator.pointID
+        self.coordinator = coordinator
+
+    def export(self, targets : list[tuple[str, str]], export_format : str = "CSV", quantiles : list[float] | None = None, start : str | None = None, end : str | None = None):
+        """
+        Export the datasets in the background. The results exported are the ones of the run displayed by the coordinator. See build_export_query for the meaning of quantiles, start and end.
+        """
+        if self.thread.isRunning():
+            logger.warning("Please wait while for the previous export to end")
+            return
+        self.runner = ExportRunner(self.databaseName, self.pointID, self.coordinator.runID, targets, export_format, quantiles, start, end)
+        self.runner.finished.connect(self.end_export)
+        self.runner.moveToThread(self.thread)
+        self.thread.started.connect(self.runner.run)
+        self.thread.start()
+
+    def end_export(self, error : str):
+        """
+        This is called when the export is over.
+        """
+        self.thread.quit()
+        self.thread.wait()
+        self.thread.started.disconnect()
+        self.exportFinished.emit(error)
@@ -1,154 +1,232 @@
 import numpy as np
 from ..interactions.MoloModel import MoloModel
-from ..utils.general import build_picture, databaseDateToDatetime
+from .ResultsCache import ResultsCache
+from .Sweep import PARAMETERS, OUTPUTS, INDEX_NAMES
+from ..utils.general import build_picture, databaseDatesToDatetime64, datetime64ToDatabaseDate
 
 """
 This file regroups different models used to display graphs in the window showing the sampling point results.
+Dates and values are stored in separate arrays: dates are numpy datetime64, and values are float32 unless another dtype (for example np.float64) is given to the model. This way, the views don't need to convert anything.
 """
 
 class PressureDataModel(MoloModel):
     """
     A model to display the pressure as given by the captors (raw or cleaned data).
     """
-    def __init__(self, queries):
+    def __init__(self, queries, dtype = np.float32):
         super().__init__(queries)
-        self.array_data = []
+        self.dtype = dtype
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.pressure = np.array([], dtype=self.dtype)
 
     def update_data(self):
         try:
+            dates = []
+            pressure = []
             while self.queries[0].next():
-                self.array_data.append([self.queries[0].value(0),self.queries[0].value(1)]) #Date, Pressure
-            self.array_data = np.array(self.array_data)
+                dates.append(self.queries[0].value(0))
+                pressure.append(self.queries[0].value(1))
+            self.dates = databaseDatesToDatetime64(dates)
+            self.pressure = np.array(pressure, dtype=self.dtype)
         except Exception:
             #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
             self.reset_data()
 
     def get_pressure(self):
-        try:
-            return self.array_data[:,1]
-        except Exception:
-            return np.array([])
+        return self.pressure
 
     def get_dates(self):
-        try:
-            return databaseDateToDatetime(self.array_data[:,0])
-        except Exception:
-            return np.array([])
+        return self.dates
 
     def reset_data(self):
-        self.array_data = []
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.pressure = np.array([], dtype=self.dtype)
 
 class TemperatureDataModel(MoloModel):
     """
     A model to display the presure as given by the captors (raw or cleaned data).
     """
-    def __init__(self, queries):
+    def __init__(self, queries, dtype = np.float32):
         super().__init__(queries)
-        self.array_data = []
+        self.dtype = dtype
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.temperatures = np.empty((0, 5), dtype=self.dtype) #Temp1 to 4, TempBed
 
     def update_data(self):
         try:
+            dates = []
+            temperatures = []
             while self.queries[0].next():
-                self.array_data.append([self.queries[0].value(0),self.queries[0].value(1),self.queries[0].value(2),self.queries[0].value(3),self.queries[0].value(4),self.queries[0].value(5)]) #Date, Temp1 to 4, TempBed
-            self.array_data = np.array(self.array_data)
+                dates.append(self.queries[0].value(0))
+                temperatures.append([self.queries[0].value(i) for i in range(1,6)]) #Temp1 to 4, TempBed
+            self.dates = databaseDatesToDatetime64(dates)
+            self.temperatures = np.array(temperatures, dtype=self.dtype).reshape(-1, 5)
         except Exception:
             #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
             self.reset_data()
 
     def get_temperatures(self):
-        try:
-            return [self.array_data[:, i] for i in range(1,6)]
-        except Exception:
+        if self.temperatures.shape[0] == 0:
             return np.array([])
+        return [self.temperatures[:, i] for i in range(5)]
 
     def get_dates(self):
-        try:
-            return databaseDateToDatetime(self.array_data[:,0])
-        except Exception:
-            return np.array([])
+        return self.dates
 
     def reset_data(self):
-        self.array_data = []
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.temperatures = np.empty((0, 5), dtype=self.dtype)
 
 class WaterFluxModel(MoloModel):
     """
     A model to display the water fluxes.
     """
-    def __init__(self, queries):
+    def __init__(self, queries, dtype = np.float32):
         super().__init__(queries)
+        self.dtype = dtype
         self.flows = {}
-        self.dates=[]
+        self.dates = np.array([], dtype="datetime64[ns]")
 
     def update_data(self):
         try:
-            #Initialize data structures
-            self.queries[0].next()
-            if self.queries[0].value(0) is not None and self.queries[0].value(2) is not None:
-                #There is at least a valid query so the model should not be empty
-                self.dates.append(self.queries[0].value(0))
-                self.flows[self.queries[0].value(2)] = [self.queries[0].value(1)]
-                while self.queries[0].next():
-                    self.dates.append(self.queries[0].value(0)) #Dates
-                    self.flows[self.queries[0].value(2)].append(self.queries[0].value(1)) #Flow
-                for i in range(1,len(self.queries)):
-                    self.queries[i].next()
-                    self.flows[self.queries[i].value(2)] = [self.queries[i].value(1)]
-                    #Add the other flows for the different quantiles if they exist
-                    while self.queries[i].next():
-                        self.flows[self.queries[i].value(2)].append(self.queries[i].value(1))
+            dates = None
+            flows = {}
+            for query in self.queries:
+                series_dates, series_flows = [], []
+                label = None
+                while query.next():
+                    label = query.value(2)
+                    series_dates.append(query.value(0))
+                    series_flows.append(self.flow_value(query))
+                if label is None:
+                    #Empty query: nothing to display for this flow.
+                    continue
+                if dates is None:
+                    #The dates of the first flow are the ones of the model.
+                    dates = series_dates
+                    flows[label] = series_flows
+                else:
+                    #The other flows may not have been computed at the same dates: they are given at the dates of the model, and are NaN where they are unknown.
+                    by_date = dict(zip(series_dates, series_flows))
+                    flows[label] = [by_date.get(date, np.nan) for date in dates]
+            self.dates = databaseDatesToDatetime64(dates if dates is not None else [])
+            self.flows = {quantile : np.array(flow, dtype=self.dtype) for quantile, flow in flows.items()}
         except Exception:
-            #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
+            #Invalid query: then revert any changes done. The model is empty: nothing will be displayed.
             self.reset_data()
 
+    def flow_value(self, query):
+        """
+        Return the flow of the current record of the query. The analytical methods store NULL where the flow couldn't be estimated: it is given as NaN.
+        """
+        return np.nan if query.isNull(1) else query.value(1)
+
     def get_water_flow(self):
         """
-        Return a dictionnary with keys beings the quantiles and values being the arrays of associated flows.
+        Return the flows of the direct model (empty if it hasn't been computed) and a dictionnary with keys beings the quantiles (or the labels of the other flows) and values being the arrays of associated flows.
         """
-        try :
-            return self.flows[0], {key:np.array(value) for index, (key,value) in enumerate(self.flows.items()) if key !=0}
-        except Exception:
-            # Quantile 0 (direct model) doesn't exists
-            return np.array([]), {}
+        return self.flows.get(0, np.array([])), {key:value for key,value in self.flows.items() if key !=0}
 
     def get_dates(self):
-        return databaseDateToDatetime(np.array(self.dates))
+        return self.dates
 
     def reset_data(self):
         self.flows = {}
-        self.dates=[]
+        self.dates = np.array([], dtype="datetime64[ns]")
 
 class SolvedTemperatureModel(MoloModel):
     """
     A model to representing the temperature, depth and time. Can be used for umbrellas, temperature heat map or temperature per depth.
+    This model is shared by several views: the date and depth index maps and the parsed dates are built once when the data is loaded, and the series asked by the views are memoized until the next set of queries.
+    If a cache is given, the heat maps are written to it the first time they are read from the database, and then memory-mapped from the disk. As long as the results are in the cache, no query is needed to fill this model.
     """
-    def __init__(self, queries):
+    CACHE_NAME = "TemperatureMap"
+
+    def __init__(self, queries, cache : ResultsCache | None = None, dtype = np.float32):
         super().__init__(queries)
+        self.cache = cache
+        self.dtype = dtype
         self.dates = []
         self.data = {}
         self.depths = []
+        self.date_index = {} #Date (datetime64) -> column in the heat maps
+        self.depth_index = {} #Depth -> row in the heat maps
+        self.memo = {}
 
     def update_data(self):
         try:
-            while self.queries[0].next():
-                self.dates.append(self.queries[0].value(0))
-            self.dates = np.array(self.dates)
-            while self.queries[1].next():
-                self.depths.append(np.float64(self.queries[1].value(0)))
-            self.depths = np.array(self.depths)
-
-            for i in range(2,len(self.queries)):
-                query = self.queries[i]
-                query.next()
-                array_data = [np.float64(query.value(0))]
-                quantile = query.value(1)
-                while query.next():
-                    array_data.append(np.float64(query.value(0)))
-                array_data = build_picture(np.array(array_data), nb_cells= len(self.depths))
-                self.data[quantile] = array_data
+            if self.is_cached():
+                self.load_arrays(self.cache.load(self.CACHE_NAME))
+            else:
+                self.read_queries()
+                if self.cache is not None and len(self.data) > 0:
+                    self.load_arrays(self.cache.save(self.CACHE_NAME, self.cached_arrays()))
+            self.build_indexes()
         except Exception:
             #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
             self.reset_data()
 
+    def read_queries(self):
+        """
+        Fill the model with the results of the queries.
+        """
+        while self.queries[0].next():
+            self.dates.append(self.queries[0].value(0))
+        self.dates = databaseDatesToDatetime64(self.dates)
+        while self.queries[1].next():
+            self.depths.append(self.queries[1].value(0))
+        self.depths = np.array(self.depths, dtype=np.float64) #Depths are used as keys: they must be exactly the ones in the database
+
+        for i in range(2,len(self.queries)):
+            query = self.queries[i]
+            query.next()
+            array_data = [query.value(0)]
+            quantile = query.value(1)
+            while query.next():
+                array_data.append(query.value(0))
+            array_data = build_picture(np.array(array_data, dtype=self.dtype), nb_cells= len(self.depths))
+            self.data[quantile] = array_data
+
+    def is_cached(self):
+        """
+        Return True if the data of this model can be loaded from the cache.
+        """
+        return self.cache is not None and self.cache.contains(self.CACHE_NAME)
+
+    def cached_arrays(self):
+        """
+        Return the dictionnary of arrays which should be stored in the cache.
+        """
+        arrays = {"dates" : self.dates, "depths" : self.depths, "quantiles" : np.array(list(self.data.keys()), dtype=np.float64)}
+        for index, heatmap in enumerate(self.data.values()):
+            arrays[f"quantile{index}"] = heatmap
+        return arrays
+
+    def load_arrays(self, arrays : dict):
+        """
+        Fill the model with arrays given by the cache.
+        """
+        self.dates = arrays["dates"]
+        self.depths = arrays["depths"]
+        self.data = {float(quantile) : arrays[f"quantile{index}"] for index, quantile in enumerate(arrays["quantiles"])}
+
+    def build_indexes(self):
+        """
+        Build the date and depth index maps. If a date or a depth appears several times, its first occurence is kept.
+        """
+        self.dates = databaseDatesToDatetime64(self.dates)
+        for index, date in enumerate(self.dates):
+            self.date_index.setdefault(date, index)
+        for index, depth in enumerate(self.depths):
+            self.depth_index.setdefault(depth, index)
+
+    def memoized(self, key, function):
+        """
+        Return the value stored for the given key, or compute it with function and store it.
+        """
+        if key not in self.memo:
+            self.memo[key] = function()
+        return self.memo[key]
 
     def get_temperatures_cmap(self,quantile):
         """
@@ -163,7 +241,7 @@ class SolvedTemperatureModel(MoloModel):
         return np.array(self.depths)
 
     def get_dates(self):
-        return databaseDateToDatetime(np.array(self.dates))
+        return self.dates
 
     def get_depth_by_temp(self, nb_dates):
         """
@@ -171,23 +249,37 @@ class SolvedTemperatureModel(MoloModel):
         -the list corresponds to the depths array
         -the dictionnary has as many keys as nb_dates: these are equally spaced dates. The values are the temperature values.
         """
-        try:
+        def compute():
             n = self.dates.shape[0]
             step = n // nb_dates
             result = {}
             for i in range(nb_dates):
                 date = self.dates[i*step]
-                result[date] = self.data[0][:,np.where(self.dates==date)[0][0]]
+                result[datetime64ToDatabaseDate(date)] = self.get_temp_by_depth(date, 0)
             return self.depths,result
+        try:
+            return self.memoized(("umbrella", nb_dates), compute)
         except Exception:
             return np.array([]), {}
 
+    def get_temp_by_depth(self, date, quantile):
+        """
+        Return the temperatures for a given date and quantile, as a function of the depth. The date may be given in the database format or as a datetime64.
+        The profile is copied once from the heat map (where it is not contiguous) and memoized.
+        """
+        try:
+            index = self.date_index[databaseDatesToDatetime64([date])[0]]
+            return self.memoized(("profile", quantile, index), lambda: np.ascontiguousarray(self.data[quantile][:,index]))
+        except Exception:
+            return np.array([])
+
     def get_temp_by_date(self,depth,quantile):
         """
-        Return the temperatures for a given depth and quantile.
+        Return the temperatures for a given depth and quantile. The series is memoized.
         """
         try:
-            return self.data[quantile][np.where(self.depths==depth)[0][0],:]
+            index = self.depth_index[depth]
+            return self.memoized(("series", quantile, index), lambda: np.array(self.data[quantile][index,:]))
         except Exception:
             return np.array([])
 
@@ -195,109 +287,301 @@ class SolvedTemperatureModel(MoloModel):
         self.dates = []
         self.data = {}
         self.depths = []
+        self.date_index = {}
+        self.depth_index = {}
+        self.memo = {}
 
 class HeatFluxesModel(MoloModel):
     """
     A model to display the three heat fluxes (advective, conductive, total)
+    The first query gives the fluxes of the direct model. If there is another query, it gives the quantile bands computed by the ensemble engine (see backend/Ensemble.py), as rows (quantile, advective, conductive, total) ordered by quantile, date and depth.
+    If a cache is given, the fluxes are written to it the first time they are read from the database, and then memory-mapped from the disk: see SolvedTemperatureModel.
     """
-    def __init__(self, queries):
+    CACHE_NAME = "HeatFluxes"
+
+    def __init__(self, queries, cache : ResultsCache | None = None, dtype = np.float32):
         super().__init__(queries)
+        self.cache = cache
+        self.dtype = dtype
         self.dates = []
         self.array_data = []
         self.depths = []
+        self.fluxes = {} #Quantile (0 for the direct model): advective, conductive and total flows maps
 
     def update_data(self):
         try:
+            if self.is_cached():
+                self.load_arrays(self.cache.load(self.CACHE_NAME))
+                return
             while self.queries[0].next():
                 self.dates.append(self.queries[0].value(0))
-            self.dates = np.array(self.dates)
+            self.dates = databaseDatesToDatetime64(self.dates)
             while self.queries[1].next():
-                self.depths.append(np.float64(self.queries[1].value(0)))
-            self.depths = np.array(self.depths)
+                self.depths.append(self.queries[1].value(0))
+            self.depths = np.array(self.depths, dtype=np.float64)
 
             while self.queries[2].next():
-                self.array_data.append([np.float64(self.queries[2].value(1)),np.float64(self.queries[2].value(2)),np.float64(self.queries[2].value(3))]) #Advective, conductive, total
-            self.array_data = np.array(self.array_data)
-
-            self.advective = build_picture(self.array_data[:,0],nb_cells =len(self.depths))
-            self.conductive = build_picture(self.array_data[:,1],nb_cells =len(self.depths))
-            self.total = build_picture(self.array_data[:,2],nb_cells =len(self.depths))
+                self.array_data.append([self.queries[2].value(1),self.queries[2].value(2),self.queries[2].value(3)]) #Advective, conductive, total
+            self.fluxes[0] = self.build_maps(self.array_data)
+
+            if len(self.queries) > 3:
+                bands = {}
+                while self.queries[3].next():
+                    bands.setdefault(self.queries[3].value(0), []).append([self.queries[3].value(1),self.queries[3].value(2),self.queries[3].value(3)])
+                for quantile, array_data in bands.items():
+                    self.fluxes[quantile] = self.build_maps(array_data)
+            self.array_data = [] #The maps hold a copy of the fluxes
+            if self.cache is not None:
+                self.load_arrays(self.cache.save(self.CACHE_NAME, self.cached_arrays()))
         except Exception:
             #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
             self.reset_data()
 
+    def build_maps(self, array_data : list):
+        """
+        Given a list of rows (advective, conductive, total) ordered by date and depth, return the three flows maps.
+        """
+        array_data = np.array(array_data, dtype=self.dtype)
+        return tuple(build_picture(array_data[:,i], nb_cells =len(self.depths)) for i in range(3))
+
     def get_depths(self):
         return np.array(self.depths)
 
     def get_dates(self):
-        return databaseDateToDatetime(np.array(self.dates))
+        return self.dates
 
-    def get_advective_flow(self):
-        if len(self.advective) ==0:
-            #The model is empty!
-            return np.array([[]])
-        return self.advective
+    def get_quantiles(self):
+        """
+        Return the list of the quantiles for which heat flows are available, 0 being the direct model.
+        """
+        return sorted(self.fluxes.keys())
 
-    def get_conductive_flow(self):
-        if len(self.conductive)==0:
-            #The model is empty!
-            return np.array([[]])
-        return self.conductive
+    def is_cached(self):
+        """
+        Return True if the data of this model can be loaded from the cache.
+        """
+        return self.cache is not None and self.cache.contains(self.CACHE_NAME)
 
-    def get_total_flow(self):
-        if len(self.total)==0:
+    def cached_arrays(self):
+        """
+        Return the dictionnary of arrays which should be stored in the cache.
+        """
+        arrays = {"dates" : self.dates, "depths" : self.depths, "quantiles" : np.array(list(self.fluxes.keys()), dtype=np.float64)}
+        for index, (advective, conductive, total) in enumerate(self.fluxes.values()):
+            arrays[f"advective{index}"] = advective
+            arrays[f"conductive{index}"] = conductive
+            arrays[f"total{index}"] = total
+        return arrays
+
+    def load_arrays(self, arrays : dict):
+        """
+        Fill the model with arrays given by the cache.
+        """
+        self.dates = databaseDatesToDatetime64(arrays["dates"])
+        self.depths = arrays["depths"]
+        self.fluxes = {float(quantile) : (arrays[f"advective{index}"], arrays[f"conductive{index}"], arrays[f"total{index}"]) for index, quantile in enumerate(arrays["quantiles"])}
+
+    def get_flow(self, index : int, quantile : float):
+        """
+        Return the flows map with the given index (0 for advective, 1 for conductive, 2 for total) for the given quantile.
+        """
+        if quantile not in self.fluxes or len(self.fluxes[quantile][index]) == 0:
             #The model is empty!
             return np.array([[]])
-        return self.total
+        return self.fluxes[quantile][index]
+
+    def get_advective_flow(self, quantile : float = 0):
+        return self.get_flow(0, quantile)
+
+    def get_conductive_flow(self, quantile : float = 0):
+        return self.get_flow(1, quantile)
+
+    def get_total_flow(self, quantile : float = 0):
+        return self.get_flow(2, quantile)
 
     def reset_data(self):
         self.dates = []
         self.array_data = []
         self.depths = []
-        self.advective = []
-        self.conductive = []
-        self.total = []
+        self.fluxes = {}
+
+def gaussian_kde(values : np.ndarray, nb_points : int = 256):
+    """
+    Return a grid and the gaussian kernel density estimate of the values on this grid, with Silverman's bandwidth. The values are first binned on the grid, then the counts are convolved with the kernel: the cost doesn't depend much on the number of values.
+    Return two empty arrays if the density can't be estimated (less than two distinct values).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) < 2 or np.ptp(values) == 0:
+        return np.array([]), np.array([])
+    bandwidth = 1.06*np.std(values)*len(values)**(-1/5)
+    grid = np.linspace(values.min() - 3*bandwidth, values.max() + 3*bandwidth, nb_points)
+    step = grid[1] - grid[0]
+    counts, _ = np.histogram(values, bins=nb_points, range=(grid[0] - step/2, grid[-1] + step/2))
+    half_width = min(nb_points - 1, int(np.ceil(4*bandwidth/step)))
+    kernel = np.exp(-0.5*(np.arange(-half_width, half_width + 1)*step/bandwidth)**2)
+    density = np.convolve(counts, kernel, mode="same")/(len(values)*bandwidth*np.sqrt(2*np.pi))
+    return grid, density
 
 class ParamsDistributionModel(MoloModel):
     """
     A model to display the information about the parameters distribution.
+    The distribution of every layer is kept once it has been read, so switching between layers doesn't need any query: see set_layer and is_cached. The histograms and density estimates are computed once per layer (and number of bins) and then kept, so the views only have to draw them.
     """
-    def __init__(self, queries):
+    PARAMETERS = ["log10k", "conductivity", "porosity", "capacity"] #In the order of the columns of the query
+
+    def __init__(self, queries, dtype = np.float32):
         super().__init__(queries)
-        self.log10k = []
-        self.porosity = []
-        self.conductivity = []
-        self.capacity = []
+        self.dtype = dtype
+        self.layer = None
+        self.layers = {} #Layer: {parameter: array of values}
+        self.histograms = {} #(layer, parameter, bins): (counts, edges)
+        self.densities = {} #(layer, parameter): (grid, density)
+        self.values = {}
+
+    def set_layer(self, layer : float | str):
+        """
+        Set the layer whose distribution is given by the next queries, or loaded from the layers already read if no query is given. An empty string means there is no layer.
+        """
+        self.layer = float(layer) if layer != "" else None
+
+    def is_cached(self):
+        """
+        Return True if the distribution of the current layer has already been read.
+        """
+        return self.layer in self.layers
+
+    def clear_cache(self):
+        """
+        Forget the distributions, histograms and densities of all the layers. This must be called when the parameters distribution changes in the database.
+        """
+        self.layers = {}
+        self.histograms = {}
+        self.densities = {}
 
     def update_data(self):
         try:
+            if len(self.queries) == 0:
+                self.values = self.layers.get(self.layer, {})
+                return
+            columns = [[] for _ in self.PARAMETERS]
             while self.queries[0].next():
-                self.log10k.append(self.queries[0].value(0))
-                self.conductivity.append(self.queries[0].value(1))
-                self.porosity.append(self.queries[0].value(2))
-                self.capacity.append(self.queries[0].value(3))
-            self.log10k = np.array(self.log10k)
-            self.conductivity = np.array(self.conductivity)
-            self.porosity = np.array(self.porosity)
-            self.capacity = np.array(self.capacity)
+                for i, column in enumerate(columns):
+                    column.append(self.queries[0].value(i))
+            self.values = {parameter : np.array(column, dtype=self.dtype) for parameter, column in zip(self.PARAMETERS, columns)}
+            if len(columns[0]) > 0 and self.layer is not None:
+                #An empty distribution isn't kept: the MCMC may not be over yet.
+                self.layers[self.layer] = self.values
         except Exception:
             #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
             self.reset_data()
 
+    def get_values(self, parameter : str):
+        return np.asarray(self.values.get(parameter, []), dtype=self.dtype)
+
+    def get_histogram(self, parameter : str, bins : int):
+        """
+        Return the counts (normalised as a density) and the edges of the histogram of the given parameter, or two empty arrays if there is no distribution.
+        """
+        key = (self.layer, parameter, bins)
+        if key not in self.histograms:
+            values = self.get_values(parameter)
+            if len(values) == 0:
+                return np.array([]), np.array([])
+            self.histograms[key] = np.histogram(values, bins=bins, density=True)
+        return self.histograms[key]
+
+    def get_density(self, parameter : str):
+        """
+        Return a grid and the kernel density estimate of the given parameter on this grid: see gaussian_kde.
+        """
+        key = (self.layer, parameter)
+        if key not in self.densities:
+            values = self.get_values(parameter)
+            if len(values) == 0:
+                return np.array([]), np.array([])
+            self.densities[key] = gaussian_kde(values)
+        return self.densities[key]
+
     def get_log10k(self):
-        return np.array(self.log10k)
+        return self.get_values("log10k")
 
     def get_conductivity(self):
-        return np.array(self.conductivity)
+        return self.get_values("conductivity")
 
     def get_porosity(self):
-        return np.array(self.porosity)
+        return self.get_values("porosity")
 
     def get_capacity(self):
-        return np.array(self.capacity)
+        return self.get_values("capacity")
+
+    def reset_data(self):
+        self.values = {}
+
+class SweepModel(MoloModel):
+    """
+    A model to display the runs of a parameter sweep and the sensitivity indices of the swept parameters.
+    The first query should give the runs and the second one the indices: see build_sweep_runs and build_sensitivity_indices in SPointCoordinator.
+    """
+    def __init__(self, queries, dtype = np.float64):
+        super().__init__(queries)
+        self.dtype = dtype
+        self.design = ""
+        self.values = {} #Values of every swept parameter
+        self.outputs = {}
+        self.indices = {} #Output: {parameter: (first index, second index)}
+
+    def update_data(self):
+        try:
+            rows = []
+            while self.queries[0].next():
+                self.design = self.queries[0].value(0)
+                rows.append([self.to_float(self.queries[0].value(i)) for i in range(1, 1 + len(PARAMETERS) + len(OUTPUTS))])
+            rows = np.array(rows, dtype=self.dtype).reshape(-1, len(PARAMETERS) + len(OUTPUTS))
+            for i, parameter in enumerate(PARAMETERS):
+                if len(rows) > 0 and not np.all(np.isnan(rows[:, i])):
+                    self.values[parameter] = rows[:, i]
+            for i, output in enumerate(OUTPUTS):
+                self.outputs[output] = rows[:, len(PARAMETERS) + i]
+            while self.queries[1].next():
+                output = self.indices.setdefault(self.queries[1].value(1), {})
+                output[self.queries[1].value(0)] = (self.to_float(self.queries[1].value(2)), self.to_float(self.queries[1].value(3)))
+        except Exception:
+            #Empty query or invalid query: then revert any changes done. The model is empty: nothing will be displayed.
+            self.reset_data()
+
+    def to_float(self, value):
+        """
+        Empty values (parameters which were not swept, failed runs) are replaced by NaN.
+        """
+        return np.nan if value is None or value == "" else float(value)
+
+    def get_design(self):
+        return self.design
+
+    def get_index_names(self):
+        return INDEX_NAMES.get(self.design, ("", ""))
+
+    def get_parameters(self):
+        """
+        Return the list of the swept parameters.
+        """
+        return list(self.values.keys())
+
+    def get_values(self, parameter : str):
+        return self.values[parameter]
+
+    def get_output(self, output : str):
+        return self.outputs[output]
+
+    def get_indices(self, output : str):
+        """
+        Return a dictionnary whose keys are the swept parameters and values are their two sensitivity indices for the given output.
+        """
+        return self.indices.get(output, {})
 
     def reset_data(self):
-        self.log10k = []
-        self.porosity = []
-        self.conductivity = []
-        self.capacity = []
\ No newline at end of file
+        self.design = ""
+        self.values = {}
+        self.outputs = {}
+        self.indices = {}
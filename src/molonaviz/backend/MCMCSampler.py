@@ -0,0 +1,291 @@
+"""
+This file regroups the Metropolis sampler used instead of pyheatmy's MCMC when the chain must be controlled:
+    -warm start: pyheatmy always starts its chains from the uniform priors. Here, the chain can start from the best parameters stored in the database, and the proposal is a multivariate normal distribution whose covariance is the one of the stored parameters distribution (Haario et al., 2001). The burn-in is then short, and re-running the MCMC after adding a few weeks of measures is much faster.
+    -early stopping: the convergence of the chain is monitored while it runs (effective sample size, split R-hat and Geweke's diagnostic), and the chain stops once the targets given by the user are reached.
+The results are given in the same format as the ones of pyheatmy's MCMC (see results_from_column), so they are saved the same way. The quantiles of the temperatures and flows are reduced on the fly with the P² algorithm (see backend/Ensemble.py), so the memory used doesn't depend on the number of iterations.
+This file doesn't depend on Qt.
+"""
+import numpy as np
+
+from .Ensemble import StreamingQuantiles
+
+PARAMETERS = ["moinslog10K", "n", "lambda_s", "rhos_cs"] #Keys of the priors, in the order used for the states of the chain
+TEMPERATURE_VARIANCE = 1.0 #Variance of the temperature measures used in the energy (K^2), as in pyheatmy
+SCALING = 2.38**2 #Optimal scaling of the proposal covariance for a normal target, divided by the dimension (Gelman et al., 1996)
+MIN_STATES = 10 #Minimal number of stored states per dimension to estimate the proposal covariance
+NB_INITIAL_DRAWS = 100 #Number of states drawn from the priors to choose the initial state of a chain which isn't warm-started
+MIN_ITERATIONS = 100 #The convergence is not checked before this number of iterations
+
+#Table holding the settings and convergence of the MCMC of every run of a point (see backend/ComputationRuns.py). It is created when a point is opened, as databases created with older versions of Molonaviz don't have it.
+MCMC_TABLES = ["""CREATE TABLE IF NOT EXISTS MCMCRun (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            MaxIterations   INTEGER,
+            Iterations      INTEGER,
+            WarmStart       INTEGER,
+            AcceptanceRate  REAL,
+            ESS             REAL,
+            RHat            REAL,
+            Geweke          REAL,
+            Converged       INTEGER,
+            BurnIn          REAL,
+            Thinning        INTEGER,
+            MaxSamples      INTEGER,
+            StoredSamples   INTEGER,
+            PointKey        INTEGER REFERENCES Point (ID),
+            Run             INTEGER REFERENCES ComputationRun (ID)
+        )"""]
+#Columns added to the MCMCRun table after it was created: (name, type).
+MCMC_COLUMNS = [("BurnIn", "REAL"), ("Thinning", "INTEGER"), ("MaxSamples", "INTEGER"), ("StoredSamples", "INTEGER")]
+#Diagnostics of the convergence, as stored in the MCMCRun table. The targets given by the user have the same keys.
+DIAGNOSTICS = ["ESS", "RHat", "Geweke"]
+
+def prior_bounds(all_priors : list[list]):
+    """
+    Return the bounds of the priors ((min, max) of every parameter of every layer, in the order of the states of the chain) and the standard deviations of the proposal given by the user.
+    all_priors is in the format given by DialogCompute.getInputMCMC: [name, depth, priors] for every layer.
+    """
+    bounds = np.array([priors[parameter][0] for _, _, priors in all_priors for parameter in PARAMETERS], dtype=np.float64)
+    sigmas = np.array([priors[parameter][1] for _, _, priors in all_priors for parameter in PARAMETERS], dtype=np.float64)
+    return bounds, sigmas
+
+def warm_start(all_priors : list[list], best : list[list], distributions : list[np.ndarray]):
+    """
+    Return the initial state of the chain and the covariance of the proposal, or None if the stored results can't be used (the number of layers changed).
+    best gives the best parameters stored for every layer ([name, depth, -log10(K), porosity, thermal conductivity, heat capacity]), and distributions the stored parameters distribution of every layer (it may be empty if only the direct model was computed). The covariance is then the diagonal one given by the user's sigmas.
+    """
+    if len(best) != len(all_priors):
+        return None
+    bounds, sigmas = prior_bounds(all_priors)
+    start = np.clip(np.array([layer[2:6] for layer in best], dtype=np.float64).reshape(-1), bounds[:, 0], bounds[:, 1])
+    dimension = len(start)
+    covariance = np.diag(sigmas**2)
+    if len(distributions) == len(all_priors) and min(len(distribution) for distribution in distributions) >= MIN_STATES*dimension:
+        #The same state of the MCMC is used for all the layers, as the parameters of the layers are not independent.
+        nb_states = min(len(distribution) for distribution in distributions)
+        states = np.hstack([distribution[:nb_states] for distribution in distributions])
+        #The small diagonal term keeps the covariance positive definite if a parameter didn't move.
+        covariance = SCALING/dimension*np.cov(states, rowvar=False) + np.diag((1e-3*sigmas)**2)
+    return start, covariance
+
+def cold_start(col, all_priors : list[list], nb_cells : int, rng : np.random.Generator, nb_draws : int = NB_INITIAL_DRAWS):
+    """
+    Return the initial state of a chain started from the priors and the covariance of the proposal, given by the user's sigmas. As in pyheatmy, the initial state is the best of nb_draws states drawn uniformly from the priors.
+    """
+    bounds, sigmas = prior_bounds(all_priors)
+    best_state, best_energy = None, np.inf
+    for state in bounds[:, 0] + rng.random((nb_draws, len(bounds)))*(bounds[:, 1] - bounds[:, 0]):
+        result = solve(col, to_parameter_set(all_priors, state), nb_cells)
+        if result is not None and result[0] < best_energy:
+            best_state, best_energy = state, result[0]
+    if best_state is None:
+        best_state = bounds.mean(axis=1)
+    return best_state, np.diag(sigmas**2)
+
+def effective_sample_size(states : np.ndarray):
+    """
+    Return the effective sample size of every column of states (one row per iteration), estimated from the autocorrelation with Geyer's initial positive sequence. A parameter which never moved has an effective sample size of 1.
+    """
+    n = len(states)
+    centred = states - states.mean(axis=0)
+    spectrum = np.fft.rfft(centred, n=2*n, axis=0)
+    autocovariance = np.fft.irfft(spectrum*np.conj(spectrum), axis=0)[:n]/n
+    ess = np.ones(states.shape[1])
+    for j in range(states.shape[1]):
+        if autocovariance[0, j] <= 0:
+            continue
+        rho = autocovariance[:, j]/autocovariance[0, j]
+        pairs = rho[0:n-1:2] + rho[1:n:2]
+        negative = np.flatnonzero(pairs <= 0)
+        end = negative[0] if len(negative) > 0 else len(pairs)
+        tau = max(1.0, 2*np.sum(pairs[:end]) - 1)
+        ess[j] = n/tau
+    return ess
+
+def split_rhat(states : np.ndarray):
+    """
+    Return the split R-hat of every column of states (Gelman et al., 2013): the chain is split in two halves, which are compared as two chains. It is infinite for a parameter which never moved.
+    """
+    half = len(states)//2
+    chains = np.stack((states[:half], states[half:2*half]))
+    within = chains.var(axis=1, ddof=1).mean(axis=0)
+    between = half*chains.mean(axis=1).var(axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rhat = np.sqrt(((half - 1)/half*within + between/half)/within)
+    return np.where(within > 0, rhat, np.inf)
+
+def geweke(states : np.ndarray, first : float = 0.1, last : float = 0.5):
+    """
+    Return Geweke's z-score of every column of states: the mean of the first 10% of the chain is compared to the mean of the last 50%, with variances corrected for the autocorrelation. It is infinite for a parameter which never moved.
+    """
+    a = states[:max(2, int(first*len(states)))]
+    b = states[len(states) - max(2, int(last*len(states))):]
+    variance = a.var(axis=0)/effective_sample_size(a) + b.var(axis=0)/effective_sample_size(b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.abs(a.mean(axis=0) - b.mean(axis=0))/np.sqrt(variance)
+    return np.where(variance > 0, z, np.inf)
+
+def convergence(states : np.ndarray):
+    """
+    Return the diagnostics of the convergence of the chain as a dictionnary whose keys are DIAGNOSTICS: the smallest effective sample size, the largest split R-hat and the largest Geweke z-score of all the parameters.
+    """
+    return {"ESS" : float(np.min(effective_sample_size(states))),
+            "RHat" : float(np.max(split_rhat(states))),
+            "Geweke" : float(np.max(geweke(states)))}
+
+def has_converged(diagnostics : dict, targets : dict):
+    """
+    Return True if the diagnostics reach the targets given by the user: a minimal effective sample size, a maximal R-hat and a maximal Geweke z-score. Targets which are None are ignored.
+    """
+    return ((targets.get("ESS") is None or diagnostics["ESS"] >= targets["ESS"]) and
+            (targets.get("RHat") is None or diagnostics["RHat"] <= targets["RHat"]) and
+            (targets.get("Geweke") is None or diagnostics["Geweke"] <= targets["Geweke"]))
+
+def reflect(x : np.ndarray, bounds : np.ndarray):
+    """
+    Reflect the state x on the bounds of the priors, so that it stays in their support while keeping the proposal symmetric.
+    """
+    width = bounds[:, 1] - bounds[:, 0]
+    y = np.mod(x - bounds[:, 0], 2*width)
+    return bounds[:, 0] + np.where(y > width, 2*width - y, y)
+
+def to_parameter_set(all_priors : list[list], state : np.ndarray):
+    """
+    Return the parameter set in the format expected by layersListCreator for the given state of the chain.
+    """
+    values = state.reshape(len(all_priors), len(PARAMETERS)).tolist()
+    return [[name, depth] + v for (name, depth, _), v in zip(all_priors, values)]
+
+def solve(col, params : list[list], nb_cells : int):
+    """
+    Run the direct model with the given parameter set. Return its energy, the temperatures and the water flow at the top of the column, or None if the direct model failed.
+    """
+    from pyheatmy import layersListCreator
+    try:
+        col.compute_solve_transi(layersListCreator(params), nb_cells, verbose=False)
+        rmse = np.asarray(col.get_RMSE(), dtype=np.float64)[:3]
+        energy = len(col.get_times_solve())*np.sum(rmse**2)/(2*TEMPERATURE_VARIANCE)
+        if not np.isfinite(energy):
+            return None
+        depths = col.get_depths_solve()
+        return energy, np.asarray(col.get_temps_solve(), dtype=np.float32), np.asarray(col.get_flows_solve(depths[0]), dtype=np.float32)
+    except Exception:
+        return None
+
+def quantile_RMSE(temps : np.ndarray, measures : np.ndarray, sensors : list[int]):
+    """
+    Return the RMSE of the three thermometers and the total RMSE for the given temperatures (depth x date), measures being the temperatures of the thermometers (date x thermometer).
+    """
+    rmse = np.array([np.sqrt(np.nanmean((temps[sensor - 1, :] - measures[:, i])**2)) for i, sensor in enumerate(sensors[:3])])
+    return list(rmse) + [float(np.sqrt(np.mean(rmse**2)))]
+
+def run_chain(col, col_dict : dict, all_priors : list[list], nb_iter : int, nb_cells : int, quantiles : list[float], warm : tuple | None = None, targets : dict | None = None, check_every : int = 100, seed : int | None = None, progress = None):
+    """
+    Run a Metropolis chain of at most nb_iter iterations using the column col. col_dict is the dictionnary col was created from.
+    If warm is not None, it gives the initial state and the covariance of the proposal (see warm_start). Otherwise, the chain is started from the priors (see cold_start).
+    If targets is not None, the convergence is checked every check_every iterations, and the chain stops as soon as the targets are reached (see has_converged).
+    Return the results in the format given by results_from_column, with the number of iterations run, the diagnostics of the convergence and the acceptance rate. Return None if the direct model failed for the initial state.
+    If progress is not None, progress(done, total) is called after every iteration.
+    """
+    rng = np.random.default_rng(seed)
+    bounds, _ = prior_bounds(all_priors)
+    start, covariance = warm if warm is not None else cold_start(col, all_priors, nb_cells, rng)
+    cholesky = np.linalg.cholesky(covariance)
+
+    state = reflect(np.asarray(start, dtype=np.float64), bounds)
+    current = solve(col, to_parameter_set(all_priors, state), nb_cells)
+    if current is None:
+        return None
+    energy, temps, flows = current
+    best_state, best_energy = state, energy
+    temps_quantiles = StreamingQuantiles(quantiles, temps.shape)
+    flows_quantiles = StreamingQuantiles(quantiles, flows.shape)
+    states = np.empty((nb_iter, len(state)), dtype=np.float64)
+    nb_accepted = 0
+    iterations = nb_iter
+    converged = False
+
+    for i in range(nb_iter):
+        proposal = reflect(state + cholesky @ rng.standard_normal(len(state)), bounds)
+        candidate = solve(col, to_parameter_set(all_priors, proposal), nb_cells)
+        if candidate is not None and np.log(rng.random()) < energy - candidate[0]:
+            state = proposal
+            energy, temps, flows = candidate
+            nb_accepted += 1
+            if energy < best_energy:
+                best_state, best_energy = state, energy
+        states[i] = state
+        temps_quantiles.add(temps)
+        flows_quantiles.add(flows)
+        if progress is not None:
+            progress(i + 1, nb_iter)
+        if targets is not None and i + 1 >= MIN_ITERATIONS and (i + 1) % check_every == 0 and has_converged(convergence(states[:i+1]), targets):
+            iterations = i + 1
+            converged = True
+            break
+
+    states = states[:iterations]
+    #Leave the column in the state of the best parameters, as pyheatmy does.
+    best = to_parameter_set(all_priors, best_state)
+    solve(col, best, nb_cells)
+    measures = np.array([t for _, t in col_dict["T_measures"]], dtype=np.float64)
+    sensors = list(col.get_id_sensors())
+    temps_values = temps_quantiles.values()
+    return {"quantiles" : list(quantiles),
+            "depths" : np.asarray(col.get_depths_solve(), dtype=np.float64),
+            "times" : list(col.get_times_solve()),
+            "sensors" : sensors,
+            "temps" : temps_values,
+            "flows" : flows_quantiles.values(),
+            "RMSE" : {quantile : quantile_RMSE(temps, measures, sensors) for quantile, temps in temps_values.items()},
+            "best" : best,
+            "distributions" : [states[:, i:i+len(PARAMETERS)] for i in range(0, states.shape[1], len(PARAMETERS))],
+            "iterations" : iterations,
+            "diagnostics" : convergence(states),
+            "converged" : converged,
+            "acceptance" : nb_accepted/max(1, iterations)}
+
+def compact_states(distributions : list[np.ndarray], burn_in : float = 0, thinning : int = 1, max_samples : int | None = None, seed : int | None = None):
+    """
+    Return the states of the chain which should be stored for every layer: the first burn_in fraction of the iterations is removed, then only one state in thinning is kept. If there are still more than max_samples states, max_samples of them are drawn uniformly without replacement, as a reservoir sample would, and kept in the order of the chain.
+    The same states are kept for all the layers, as the parameters of the layers are not independent.
+    """
+    nb_states = min(len(distribution) for distribution in distributions)
+    indexes = np.arange(int(burn_in*nb_states), nb_states, max(1, thinning))
+    if max_samples is not None and len(indexes) > max_samples:
+        rng = np.random.default_rng(seed)
+        indexes = np.sort(rng.choice(indexes, size=max_samples, replace=False))
+    return [distribution[indexes] for distribution in distributions]
+
+def results_from_column(col, nb_iter : int):
+    """
+    Return the results of pyheatmy's MCMC as a dictionnary with the following keys:
+        -"quantiles": the quantiles computed
+        -"depths", "times": the depths and dates of the results
+        -"sensors": the cells of the three thermometers (starting at 1)
+        -"temps": a dictionnary whose keys are the quantiles and values are the temperatures (depth x date, in K)
+        -"flows": a dictionnary whose keys are the quantiles and values are the water flows at the top of the column
+        -"RMSE": a dictionnary whose keys are the quantiles and values are the RMSE of the three thermometers and the total RMSE
+        -"best": the best parameter set, in the format expected by layersListCreator
+        -"distributions": the states of the chain for every layer, as an array with the columns -log10(K), porosity, thermal conductivity and heat capacity
+        -"iterations": the number of iterations run (pyheatmy always runs nb_iter iterations)
+        -"diagnostics": the diagnostics of the convergence of the chain, see convergence
+        -"converged": True if the chain was stopped because it converged, False if it ran until the maximal number of iterations
+        -"acceptance": the acceptance rate of the chain, or None if it is unknown
+    """
+    quantiles = list(col.get_quantiles())
+    best = [[layer.name, layer.zLow, layer.params.moinslog10K, layer.params.n, layer.params.lambda_s, layer.params.rhos_cs] for layer in col.get_best_layers()]
+    distributions = [np.asarray(params, dtype=np.float64) for params in col.get_all_params()]
+    nb_states = min(len(distribution) for distribution in distributions)
+    return {"quantiles" : quantiles,
+            "depths" : np.asarray(col.get_depths_mcmc(), dtype=np.float64),
+            "times" : list(col.get_times_mcmc()),
+            "sensors" : list(col.get_id_sensors()),
+            "temps" : {quantile : col.get_temps_quantile(quantile) for quantile in quantiles},
+            "flows" : {quantile : col.get_flows_quantile(quantile)[0,:] for quantile in quantiles},
+            "RMSE" : {quantile : col.get_RMSE_quantile(quantile) for quantile in quantiles},
+            "best" : best,
+            "distributions" : distributions,
+            "iterations" : nb_iter,
+            "diagnostics" : convergence(np.hstack([distribution[:nb_states] for distribution in distributions])),
+            "converged" : False,
+            "acceptance" : None}
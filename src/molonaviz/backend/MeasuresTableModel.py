@@ -0,0 +1,101 @@
+"""
+This file regroups the table model used to display the measures of a sampling point in a table view.
+"""
+from collections import OrderedDict
+from PyQt5 import QtCore
+from PyQt5.QtSql import QSqlQuery #Used only for type hints
+
+class MeasuresTableModel(QtCore.QAbstractTableModel):
+    """
+    A read-only table model which only fetches from the database the rows which are displayed.
+    Rows are sorted by date and split into pages of page_size rows. A page is read with a query like "Date >= key ORDER BY Date LIMIT page_size", where the key is the first date of the page, instead of skipping all the previous rows.
+    The page keys are only looked for when a page is displayed, and are then kept. Reading a page also gives the key of the next one, so scrolling through the table doesn't need any other query. When the user jumps to a page whose key is unknown, it is found from the closest known key before it.
+    Only the max_pages most recently used pages are kept in memory.
+    Three queries must be given. They should be prepared but not executed:
+        -count_query gives the number of rows
+        -key_query gives the date of a single row, sorted by date: it must have two placeholders, :start for a page key and :offset for the number of rows to skip from this key.
+        -page_query gives the rows of a page, sorted by date: it must have two placeholders, :start for the page key and :limit for the number of rows.
+    Dates must be unique, as it is the case for the measures of a sampling point.
+    """
+    def __init__(self, count_query : QSqlQuery, key_query : QSqlQuery, page_query : QSqlQuery, page_size : int = 500, max_pages : int = 20):
+        super().__init__()
+        self.key_query = key_query
+        self.key_query.setForwardOnly(True)
+        self.page_query = page_query
+        self.page_query.setForwardOnly(True)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = OrderedDict() #Page number -> list of rows, from the least to the most recently used
+
+        count_query.exec()
+        self.nb_rows = count_query.value(0) if count_query.next() else 0
+        self.keys = {0 : ""} #Page number -> first date of the page. The empty string is before any date.
+
+        #Execute the query once for an empty page so the column names are known.
+        self.headers = []
+        self.page_query.bindValue(":start", "")
+        self.page_query.bindValue(":limit", 0)
+        if self.page_query.exec():
+            record = self.page_query.record()
+            self.headers = [record.fieldName(i) for i in range(record.count())]
+
+    def rowCount(self, parent = QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.nb_rows
+
+    def columnCount(self, parent = QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def headerData(self, section, orientation, role = QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return section + 1
+
+    def data(self, index, role = QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        page = self.page(index.row() // self.page_size)
+        row = index.row() % self.page_size
+        if row >= len(page):
+            return None
+        return page[row][index.column()]
+
+    def page(self, page_number : int):
+        """
+        Return the rows of the given page, reading them from the database if the page is not in memory.
+        """
+        if page_number in self.pages:
+            self.pages.move_to_end(page_number)
+            return self.pages[page_number]
+        rows = []
+        key = self.page_key(page_number) if page_number*self.page_size < self.nb_rows else None
+        if key is not None:
+            #One more row is read: it is the first row of the next page.
+            self.page_query.bindValue(":start", key)
+            self.page_query.bindValue(":limit", self.page_size + 1)
+            self.page_query.exec()
+            while self.page_query.next():
+                rows.append([self.page_query.value(i) for i in range(len(self.headers))])
+            if len(rows) > self.page_size:
+                self.keys[page_number + 1] = rows.pop()[0]
+        self.pages[page_number] = rows
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False) #Forget the least recently used page
+        return rows
+
+    def page_key(self, page_number : int):
+        """
+        Return the first date of the given page, or None if there is no such page. If it is unknown, it is read from the database by skipping the rows after the closest known key.
+        """
+        if page_number not in self.keys:
+            known = max(page for page in self.keys if page < page_number)
+            self.key_query.bindValue(":start", self.keys[known])
+            self.key_query.bindValue(":offset", (page_number - known)*self.page_size)
+            self.key_query.exec()
+            self.keys[page_number] = self.key_query.value(0) if self.key_query.next() else None
+        return self.keys[page_number]
@@ -0,0 +1,78 @@
+"""
+This file regroups the optimiser, a fast deterministic alternative to the MCMC.
+The parameters of the layers minimising the total RMSE of the direct model are searched with the Nelder-Mead method, within the ranges of the priors. Several independent restarts are run in a pool of processes (see map_direct_models in backend/Ensemble.py) and the best one is kept.
+The search is made in the unit hypercube, so that all the parameters have the same scale: the heat capacity is several orders of magnitude larger than the porosity.
+This file doesn't depend on Qt.
+"""
+import itertools
+import numpy as np
+
+from .Ensemble import map_direct_models
+
+FAILED_RMSE = 1e30 #RMSE given to the parameter sets for which the direct model failed
+
+def to_parameter_set(layers : list[list], bounds : np.ndarray, x : np.ndarray):
+    """
+    Return the parameter set in the format expected by layersListCreator for the point x of the unit hypercube.
+    layers gives the name and depth of every layer (the other values are ignored), and bounds the (min, max) of the four parameters: -log10(K), porosity, thermal conductivity and heat capacity.
+    """
+    values = (bounds[:, 0] + np.clip(x, 0, 1).reshape(len(layers), 4) * (bounds[:, 1] - bounds[:, 0])).tolist()
+    return [[layer[0], layer[1]] + v for layer, v in zip(layers, values)]
+
+def to_unit(layers : list[list], bounds : np.ndarray):
+    """
+    Return the point of the unit hypercube corresponding to the parameters given in layers. This is the inverse of to_parameter_set.
+    """
+    values = np.array([layer[2:6] for layer in layers], dtype=np.float64)
+    return np.clip((values - bounds[:, 0]) / (bounds[:, 1] - bounds[:, 0]), 0, 1).reshape(-1)
+
+def total_RMSE(params : list[list], nb_cells : int):
+    """
+    Run the direct model with the given parameter set and return its total RMSE, or FAILED_RMSE if the direct model failed.
+    """
+    from pyheatmy import layersListCreator
+    from .Ensemble import _column
+    try:
+        _column.compute_solve_transi(layersListCreator(params), nb_cells, verbose=False)
+        rmse = float(_column.get_RMSE()[3])
+        return rmse if np.isfinite(rmse) else FAILED_RMSE
+    except Exception:
+        return FAILED_RMSE
+
+def optimise_from(start : np.ndarray, layers : list[list], bounds : np.ndarray, nb_cells : int, max_evaluations : int):
+    """
+    Run the Nelder-Mead method from the point start of the unit hypercube. Return the best parameter set, its total RMSE and the number of direct models run.
+    """
+    from scipy.optimize import minimize #scipy is slow to import: it is only imported when a computation is needed.
+    result = minimize(lambda x: total_RMSE(to_parameter_set(layers, bounds, x), nb_cells), start, method="Nelder-Mead",
+                      bounds=[(0, 1)]*len(start), options={"maxfev" : max_evaluations, "xatol" : 1e-3, "fatol" : 1e-6})
+    return to_parameter_set(layers, bounds, result.x), float(result.fun), int(result.nfev)
+
+def starting_points(layers : list[list], bounds : np.ndarray, nb_restarts : int, seed : int | None = None):
+    """
+    Return the starting points of the restarts: the first one is given by the parameters in layers, the other ones are drawn uniformly in the unit hypercube.
+    """
+    rng = np.random.default_rng(seed)
+    starts = [to_unit(layers, bounds)]
+    starts += list(rng.random((nb_restarts - 1, 4*len(layers))))
+    return starts
+
+def run_optimiser(col_dict : dict, layers : list[list], bounds : list[tuple[float, float]], nb_restarts : int, nb_cells : int, max_evaluations : int, nb_workers : int | None = None, progress = None, seed : int | None = None):
+    """
+    Search the parameters of the layers minimising the total RMSE. Return the best parameter set (in the format expected by layersListCreator), its total RMSE and the total number of direct models run, or None if every restart failed.
+    layers gives the parameters of every layer ([name, depth, -log10(K), porosity, thermal conductivity, heat capacity]): they are used as the starting point of the first restart. bounds gives the (min, max) of the four parameters, which are the same for every layer.
+    The restarts are run in nb_workers processes: see map_direct_models. If progress is not None, progress(done, total) is called every time a restart is over.
+    """
+    bounds = np.array(bounds, dtype=np.float64).reshape(4, 2)
+    starts = starting_points(layers, bounds, nb_restarts, seed)
+    results = map_direct_models(optimise_from, col_dict, nb_workers, starts, itertools.repeat(layers), itertools.repeat(bounds), itertools.repeat(nb_cells), itertools.repeat(max_evaluations))
+    best, nb_evaluations = None, 0
+    for done, (params, rmse, nfev) in enumerate(results, start=1):
+        nb_evaluations += nfev
+        if rmse < FAILED_RMSE and (best is None or rmse < best[1]):
+            best = (params, rmse)
+        if progress is not None:
+            progress(done, nb_restarts)
+    if best is None:
+        return None
+    return best[0], best[1], nb_evaluations
@@ -0,0 +1,86 @@
+"""
+This file regroups the on-disk cache used to keep the results of a point out of memory.
+"""
+import os
+import shutil
+import uuid
+import numpy as np
+
+class ResultsCache:
+    """
+    A cache storing groups of numpy arrays as .npy files in a directory (one sub-directory per group).
+    Arrays are opened with np.load(mmap_mode='r'): they are only read from the disk when they are used, and the memory can be released by the operating system at any time.
+    A group is only considered to be in the cache once all its arrays have been written.
+    Every time a group is saved, it is written to a new sub-directory: this way, a file which is still mapped (for example by a view) is never overwritten.
+    """
+    COMPLETE = "complete" #Name of the file marking a group as fully written
+
+    def __init__(self, directory : str):
+        self.directory = directory
+
+    def group_directories(self, name : str):
+        """
+        Return the paths of all the directories holding the given group, complete or not.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return [os.path.join(self.directory, d) for d in os.listdir(self.directory) if d.rsplit("_", 1)[0] == name]
+
+    def find(self, name : str):
+        """
+        Return the path of the directory holding the given group, or None if the group is not in the cache.
+        """
+        for directory in self.group_directories(name):
+            if os.path.isfile(os.path.join(directory, self.COMPLETE)):
+                return directory
+        return None
+
+    def contains(self, name : str):
+        return self.find(name) is not None
+
+    def save(self, name : str, arrays : dict[str, np.ndarray]):
+        """
+        Write the given arrays in the cache as the group name, replacing any previous version of this group.
+        The arrays are then loaded again from the cache and returned, so the caller may drop the arrays it holds in memory.
+        """
+        self.remove(name)
+        directory = os.path.join(self.directory, f"{name}_{uuid.uuid4().hex}")
+        os.makedirs(directory)
+        for key, array in arrays.items():
+            np.save(os.path.join(directory, f"{key}.npy"), np.asarray(array), allow_pickle=False)
+        open(os.path.join(directory, self.COMPLETE), "w").close()
+        return self.load(name)
+
+    def load(self, name : str):
+        """
+        Return a dictionnary with all the arrays of the given group, memory-mapped in read-only mode. If the group is not in the cache, return an empty dictionnary.
+        """
+        directory = self.find(name)
+        if directory is None:
+            return {}
+        arrays = {}
+        for file in os.listdir(directory):
+            if file.endswith(".npy"):
+                arrays[file[:-4]] = np.load(os.path.join(directory, file), mmap_mode="r", allow_pickle=False)
+        return arrays
+
+    def remove(self, name : str):
+        """
+        Remove the given group from the cache.
+        The group is first marked as incomplete so it is never loaded again: on some systems, files still mapped can't be deleted. They will be deleted the next time the cache is cleared.
+        """
+        for directory in self.group_directories(name):
+            try:
+                os.remove(os.path.join(directory, self.COMPLETE))
+            except OSError:
+                pass
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def clear(self):
+        """
+        Remove every group from the cache.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        for d in os.listdir(self.directory):
+            self.remove(d.rsplit("_", 1)[0])
@@ -1,9 +1,18 @@
+import os
 from PyQt5.QtSql import QSqlQueryModel, QSqlQuery, QSqlDatabase #QSqlDatabase in used only for type hints
 import pandas as pd
 
 from ..interactions.InnerMessages import ComputationsState
-from .GraphsModels import PressureDataModel, TemperatureDataModel, SolvedTemperatureModel, HeatFluxesModel, WaterFluxModel, ParamsDistributionModel
+from .GraphsModels import PressureDataModel, TemperatureDataModel, SolvedTemperatureModel, HeatFluxesModel, WaterFluxModel, ParamsDistributionModel, SweepModel
+from .MeasuresTableModel import MeasuresTableModel
+from .ResultsCache import ResultsCache
+from .Ensemble import ENSEMBLE_TABLES
+from .Sweep import SWEEP_TABLES
+from .MCMCSampler import MCMC_TABLES, MCMC_COLUMNS
+from .ComputationRuns import RUN_COLUMNS, FINISHED_RUN, DIRECT_MODEL_RUN, MCMC_RUN, add_missing_columns, create_run_tables
+from .StudySummary import update_point_summary
 from ..utils.general import databaseDateFormat, databaseDateToDatetime
+from ..utils.profiling import profiled, count_rows
 
 class SPointCoordinator:
     """
@@ -24,14 +33,24 @@ class SPointCoordinator:
         self.samplingPointID = spointID_query.value(0)
 
         self.pointID = self.find_or_create_point_ID()
+        self.cleaned_measures_version = 0 #Incremented every time the cleaned measures change, so data prepared from them knows when it is outdated.
+        self.create_missing_tables()
+
+        #The largest results are cached next to the database, in a directory specific to this point and then to each run (see run_cache).
+        self.cache_directory = os.path.join(os.path.dirname(self.con.databaseName()), "Cache", f"Point{self.pointID}")
+        self.attach_legacy_results()
+        #By default, the results of the last run are displayed: see set_run.
+        self.runID = self.last_run()
+        self.cache = self.run_cache(self.runID)
 
         #Create all models (empty for now)
         self.pressuremodel = PressureDataModel([])
         self.tempmodel = TemperatureDataModel([])
-        self.tempmap_model = SolvedTemperatureModel([])
-        self.heatfluxes_model = HeatFluxesModel([])
+        self.tempmap_model = SolvedTemperatureModel([], self.cache)
+        self.heatfluxes_model = HeatFluxesModel([], self.cache)
         self.waterflux_model = WaterFluxModel([])
         self.paramsdistr_model = ParamsDistributionModel([])
+        self.sweep_model = SweepModel([])
 
     def find_or_create_point_ID(self):
         """
@@ -47,6 +66,51 @@ class SPointCoordinator:
             return insertPoint.lastInsertId()
         return select_pointID.value(0)
 
+    def create_missing_tables(self):
+        """
+        Create the tables and columns added after the first versions of Molonaviz if they don't exist: the quantile bands given by the ensemble engine, the results of the parameter sweeps, the settings of the MCMC, the method of the water flows and the history of the computations.
+        """
+        query = QSqlQuery(self.con)
+        for create_table in ENSEMBLE_TABLES + SWEEP_TABLES + MCMC_TABLES:
+            query.exec(create_table)
+        #The Method and Run columns tell which analytical method gave a water flow, and in which run. They are NULL for the flows given by pyheatmy, which are linked to their run through their quantile.
+        add_missing_columns(self.con, [("WaterFlow", "Method", "VARCHAR"), ("WaterFlow", "Run", "INTEGER REFERENCES ComputationRun (ID)")] + [("MCMCRun", name, sql_type) for name, sql_type in MCMC_COLUMNS])
+        create_run_tables(self.con)
+
+    def attach_legacy_results(self):
+        """
+        Results computed with older versions of Molonaviz are not linked to any run: if this point has some, create a run holding them.
+        The type of this run is deduced from the number of quantiles. Its settings, start and duration are unknown.
+        """
+        query = QSqlQuery(self.con)
+        query.exec(f"SELECT COUNT(*) FROM Quantile WHERE PointKey = {self.pointID} AND Run IS NULL")
+        query.next()
+        nb_quantiles = query.value(0)
+        if nb_quantiles == 0:
+            return
+        query.exec(f"SELECT COUNT(*) FROM Depth WHERE PointKey = {self.pointID} AND Cells IS NULL")
+        query.next()
+        nb_cells = query.value(0)
+
+        insertRun = QSqlQuery(self.con)
+        insertRun.prepare("INSERT INTO ComputationRun (Type, NbCells, PointKey) VALUES (:Type, :NbCells, :PointKey)")
+        insertRun.bindValue(":Type", DIRECT_MODEL_RUN if nb_quantiles == 1 else MCMC_RUN)
+        insertRun.bindValue(":NbCells", nb_cells)
+        insertRun.bindValue(":PointKey", self.pointID)
+        insertRun.exec()
+        runID = insertRun.lastInsertId()
+
+        self.con.transaction()
+        for table, name, _ in RUN_COLUMNS:
+            if name == "Run":
+                query.exec(f"UPDATE {table} SET Run = {runID} WHERE PointKey = {self.pointID} AND Run IS NULL")
+        query.exec(f"UPDATE Depth SET Cells = {nb_cells} WHERE PointKey = {self.pointID} AND Cells IS NULL")
+        self.con.commit()
+        self.update_run_RMSE(runID)
+        #The results of this point were cached before runs existed: this cache is no longer used.
+        ResultsCache(self.cache_directory).clear()
+        self.update_summary()
+
     def get_pressure_model(self):
         return self.pressuremodel
 
@@ -65,6 +129,60 @@ class SPointCoordinator:
     def get_params_distr_model(self):
         return self.paramsdistr_model
 
+    def get_sweep_model(self):
+        return self.sweep_model
+
+    def last_run(self):
+        """
+        Return the ID of the last finished run of this point, or None if nothing was computed.
+        """
+        select_run = QSqlQuery(self.con)
+        select_run.exec(f"SELECT MAX(ID) FROM ComputationRun WHERE PointKey = {self.pointID} AND {FINISHED_RUN}")
+        select_run.next()
+        return select_run.value(0) if not select_run.isNull(0) else None
+
+    def all_runs(self):
+        """
+        Return a list of dictionnaries describing the finished runs of this point, from the oldest to the newest: their ID ("ID"), type ("Type", see backend/ComputationRuns.py), a description of their settings ("Settings"), number of cells ("NbCells"), the date at which they were launched ("Start"), their duration in seconds ("Duration") and the total RMSE of their direct model ("RMSE"). Unknown values are None.
+        """
+        select_runs = self.build_runs()
+        select_runs.exec()
+        runs = []
+        record = select_runs.record()
+        while select_runs.next():
+            runs.append({record.fieldName(i) : select_runs.value(i) if not select_runs.isNull(i) else None for i in range(record.count())})
+        return runs
+
+    def set_run(self, runID : int | None):
+        """
+        Choose the run whose results are given by the models and the other methods of this class (None if nothing was computed). The models must then be refreshed.
+        The results of every run are cached separately, so the results of a run which was already displayed are not read from the database again.
+        """
+        self.runID = runID
+        self.cache = self.run_cache(runID)
+        self.tempmap_model.cache = self.cache
+        self.heatfluxes_model.cache = self.cache
+        self.paramsdistr_model.clear_cache()
+
+    def run_cache(self, runID : int | None):
+        """
+        Return the cache holding the results of the given run, or None if runID is None.
+        """
+        if runID is None:
+            return None
+        return ResultsCache(os.path.join(self.cache_directory, f"Run{runID}"))
+
+    def update_run_RMSE(self, runID : int):
+        """
+        Store the total RMSE of the direct model of the given run in the ComputationRun table, so the runs can be compared without reading their results.
+        """
+        update_run = QSqlQuery(self.con)
+        update_run.exec(f"""UPDATE ComputationRun
+                        SET RMSE = (SELECT RMSE.RMSETotal FROM RMSE
+                                    JOIN Quantile ON RMSE.Quantile = Quantile.ID
+                                    WHERE Quantile.Run = {runID} AND Quantile.Quantile = 0)
+                        WHERE ID = {runID}""")
+
     def get_spoint_infos(self):
         """
         Return the path to the scheme, the path to notice and a model containing the informations about the sampling point.
@@ -96,14 +214,13 @@ class SPointCoordinator:
         """
         Return a model with all direct information from the database.
         If raw_measures is true, the raw measures from the point are displayed, else cleaned measures are displayed
+        The model only reads from the database the rows which are displayed: see MeasuresTableModel.
         """
-        if raw_measures:
-            select_query = self.build_raw_measures(full_query=True)
-        else:
-            select_query = self.build_cleaned_measures(full_query=True)
-        select_query.exec()
-        self.tableModel = QSqlQueryModel()
-        self.tableModel.setQuery(select_query)
+        page_size = 500
+        count_query = self.build_measures_count(raw_measures)
+        key_query = self.build_measures_page_key(raw_measures)
+        page_query = self.build_measures_page(raw_measures)
+        self.tableModel = MeasuresTableModel(count_query, key_query, page_query, page_size = page_size)
         return self.tableModel
 
     def all_raw_measures(self):
@@ -134,7 +251,7 @@ class SPointCoordinator:
 
     def layers_depths(self):
         """
-        Return a list with all the depths of the layers. It may be empty.
+        Return a list with all the depths of the layers of the current run. It may be empty.
         """
         select_depths_layers = self.build_layers_query()
         select_depths_layers.exec()
@@ -184,6 +301,71 @@ class SPointCoordinator:
         selectdepth.next()
         return selectdepth.value(0)
 
+    def all_quantiles(self):
+        """
+        Return a list with all the quantiles computed in the current run. It may be empty. If the direct model has been computed, 0 is in this list.
+        """
+        select_quantiles = self.build_quantiles()
+        select_quantiles.exec()
+        quantiles = []
+        while select_quantiles.next():
+            quantiles.append(select_quantiles.value(0))
+        return quantiles
+
+    def ensemble_quantiles(self):
+        """
+        Return a list with the quantiles of the bands computed by the ensemble engine in the current run. It may be empty.
+        """
+        select_quantiles = self.build_ensemble_quantiles()
+        select_quantiles.exec()
+        quantiles = []
+        while select_quantiles.next():
+            quantiles.append(select_quantiles.value(0))
+        return quantiles
+
+    def analytical_methods(self):
+        """
+        Return a list with the methods of the water flows estimated by the analytical flux engine in the current run. It may be empty.
+        """
+        select_methods = self.build_analytical_methods()
+        select_methods.exec()
+        methods = []
+        while select_methods.next():
+            methods.append(select_methods.value(0))
+        return methods
+
+    def mcmc_run(self):
+        """
+        Return a dictionnary describing the MCMC of the current run: the maximal number of iterations ("MaxIterations"), the number of iterations run ("Iterations"), if it was warm-started ("WarmStart") or stopped because it converged ("Converged"), its acceptance rate ("AcceptanceRate"), the diagnostics of its convergence ("ESS", "RHat", "Geweke") and how the stored parameters distribution was compacted (see compact_states in backend/MCMCSampler.py): the fraction of the chain removed as burn-in ("BurnIn"), the thinning ("Thinning"), the maximal number of stored states ("MaxSamples") and the number of stored states ("StoredSamples"). Unknown values are None.
+        Return None if the current run isn't an MCMC.
+        """
+        select_run = self.build_mcmc_run()
+        select_run.exec()
+        if not select_run.next():
+            return None
+        record = select_run.record()
+        return {record.fieldName(i) : select_run.value(i) if not select_run.isNull(i) else None for i in range(record.count())}
+
+    def sweep_size(self):
+        """
+        Return the number of runs of the last parameter sweep made for this point (0 if there is none).
+        """
+        select_count = QSqlQuery(self.con)
+        select_count.exec(f"SELECT COUNT(*) FROM SweepRun WHERE PointKey = {self.pointID}")
+        select_count.next()
+        return select_count.value(0)
+
+    def dates_range(self):
+        """
+        Return the first and last dates (in datetime format) of the measures of this point, or None, None if there are no cleaned measures.
+        """
+        select_range = self.build_dates_range()
+        select_range.exec()
+        select_range.next()
+        if select_range.value(0) is None or select_range.value(0) == "":
+            return None, None
+        return databaseDateToDatetime(select_range.value(0)), databaseDateToDatetime(select_range.value(1))
+
     def calibration_infos(self):
         """
         Return three values corresponding to the intercept, differential pressure (DuDH), and differential temperature (DuDT).
@@ -211,36 +393,71 @@ class SPointCoordinator:
     def refresh_params_distr(self, layer : float):
         """
         Refresh the parameter distribution model for the given layer.
+        If the distribution of this layer has already been read, no query needs to be executed.
         """
+        self.paramsdistr_model.set_layer(layer)
+        if self.paramsdistr_model.is_cached():
+            self.paramsdistr_model.new_queries([])
+            return
         select_params = self.build_params_distribution(layer)
         self.paramsdistr_model.new_queries([select_params])
 
-    def refresh_all_models(self, raw_measures_plot : bool, layer : float):
+    def refresh_heat_fluxes(self):
         """
-        Refresh all models.
-        If some models have their own function to be refreshed, then these functions should be called to prevent code duplication
+        Refresh the model giving the advective, conductive and total heat fluxes.
+        If the fluxes are in the cache, no query needs to be executed.
         """
-        self.refresh_measures_plots(raw_measures_plot)
-
-        #Plot the heat fluxes
+        if self.heatfluxes_model.is_cached():
+            self.heatfluxes_model.new_queries([])
+            return
         select_heatfluxes= self.build_result_queries(result_type="2DMap",option="HeatFlows") #This is a list
         select_depths = self.build_depths()
         select_dates = self.build_dates()
-        self.heatfluxes_model.new_queries([select_dates,select_depths]+select_heatfluxes)
+        #Only the direct model has heat flows: the other quantiles are the bands given by the ensemble engine.
+        select_bands = [self.build_ensemble_heat_flows()] if len(self.ensemble_quantiles()) > 0 else []
+        self.heatfluxes_model.new_queries([select_dates,select_depths]+select_heatfluxes[:1]+select_bands)
 
-        #Plot the water fluxes
+    def refresh_water_flux(self):
+        """
+        Refresh the model giving the water fluxes.
+        """
         select_waterflux= self.build_result_queries(result_type="WaterFlux") #This is already a list
+        if len(select_waterflux) > 0:
+            select_waterflux += [self.build_ensemble_water_flow(quantile) for quantile in self.ensemble_quantiles()]
+        select_waterflux += [self.build_analytical_water_flow(method) for method in self.analytical_methods()]
         self.waterflux_model.new_queries(select_waterflux)
 
-        #Plot the temperatures
+    def refresh_sweep(self):
+        """
+        Refresh the model giving the runs of the parameter sweep and the sensitivity indices.
+        """
+        self.sweep_model.new_queries([self.build_sweep_runs(), self.build_sensitivity_indices()])
+
+    def refresh_temp_map(self):
+        """
+        Refresh the model giving the solved temperatures for all quantiles.
+        If the temperatures are in the cache, no query needs to be executed.
+        """
+        if self.tempmap_model.is_cached():
+            self.tempmap_model.new_queries([])
+            return
         select_tempmap = self.build_result_queries(result_type="2DMap",option="Temperature") #This is a list of temperatures for all quantiles
         select_depths = self.build_depths()
         select_dates = self.build_dates()
         self.tempmap_model.new_queries([select_dates,select_depths]+select_tempmap)
 
-        #Histogramms
+    def refresh_all_models(self, raw_measures_plot : bool, layer : float):
+        """
+        Refresh all models.
+        Each group of models can also be refreshed on its own: this should be preferred when only some of the models are displayed, as loading all of them can take a long time.
+        """
+        self.refresh_measures_plots(raw_measures_plot)
+        self.refresh_heat_fluxes()
+        self.refresh_water_flux()
+        self.refresh_temp_map()
         self.refresh_params_distr(layer)
 
+    @profiled()
     def insert_cleaned_measures(self, dfCleaned : pd.DataFrame):
         """
         Insert the cleaned measures into the database.
@@ -263,6 +480,7 @@ class SPointCoordinator:
         query_measures = self.build_insert_cleaned_measures()
         query_measures.bindValue(":PointKey", self.pointID)
 
+        count_rows(len(dfCleaned))
         self.con.transaction()
         for row in dfCleaned.itertuples():
             query_dates.bindValue(":Date", row[1])
@@ -276,6 +494,8 @@ class SPointCoordinator:
             query_measures.bindValue(":Pressure", row[7])
             query_measures.exec()
         self.con.commit()
+        self.cleaned_measures_version += 1
+        self.update_summary()
 
     def delete_processed_data(self):
         """
@@ -299,16 +519,28 @@ class SPointCoordinator:
             deleteDate.bindValue(":Date", dateID.value(0))
             deleteDate.exec()
         self.con.commit()
+        self.cleaned_measures_version += 1
+        self.update_summary()
         #Note: the Point has not been removed, but it doesn't matter. The find_or_create_point_ID function is here for this reason.
 
 
     def delete_computations(self):
         """
-        Delete every computations made for this point. This function builds and execute the DELETE queries. Be careful, calling it will clear the database for this point!
+        Delete every computations made for this point, in all runs. This function builds and execute the DELETE queries. Be careful, calling it will clear the database for this point!
+        The cached results are also deleted.
         """
+        for run in self.all_runs():
+            self.run_cache(run["ID"]).clear()
+        self.set_run(None)
         deleteTableQuery = QSqlQuery(self.con)
         #Careful: should have joins as WaterFlow.PointKey !=Samplingpoint.name
         deleteTableQuery.exec(f'DELETE FROM WaterFlow WHERE WaterFlow.PointKey=(SELECT Point.ID FROM Point WHERE Point.ID ={self.pointID})')
+        deleteTableQuery.exec(f'DELETE FROM EnsembleWaterFlow WHERE PointKey = {self.pointID}')
+        deleteTableQuery.exec(f'DELETE FROM EnsembleHeatFlows WHERE PointKey = {self.pointID}')
+        deleteTableQuery.exec(f'DELETE FROM SweepRun WHERE PointKey = {self.pointID}')
+        deleteTableQuery.exec(f'DELETE FROM SensitivityIndex WHERE PointKey = {self.pointID}')
+        deleteTableQuery.exec(f'DELETE FROM MCMCRun WHERE PointKey = {self.pointID}')
+        deleteTableQuery.exec(f'DELETE FROM ComputationRun WHERE PointKey = {self.pointID}')
         deleteTableQuery.exec(f'DELETE FROM RMSE WHERE PointKey=(SELECT Point.ID FROM Point WHERE Point.ID ={self.pointID})')
         deleteTableQuery.exec(f'DELETE FROM TemperatureAndHeatFlows WHERE PointKey=(SELECT Point.ID FROM Point WHERE Point.ID  = {self.pointID})')
         deleteTableQuery.exec(f'DELETE FROM ParametersDistribution WHERE ParametersDistribution.PointKey=(SELECT Point.ID FROM Point WHERE Point.ID = {self.pointID})')
@@ -325,16 +557,51 @@ class SPointCoordinator:
                             TempUncertainty = NULL,
                             IncertPressure = NULL
                         WHERE ID = {self.pointID}""")
+        self.update_summary()
+
+    def delete_run(self, runID : int):
+        """
+        Delete the results of the given run and its cached results. The depths are kept as long as another run of this point uses them.
+        If the given run is the current one, the last remaining run becomes the current one.
+        """
+        self.run_cache(runID).clear()
+        quantiles = f"(SELECT ID FROM Quantile WHERE Run = {runID})"
+        layers = f"(SELECT ID FROM Layer WHERE Run = {runID})"
+        deleteTableQuery = QSqlQuery(self.con)
+        self.con.transaction()
+        for table in ["WaterFlow", "TemperatureAndHeatFlows", "RMSE"]:
+            deleteTableQuery.exec(f"DELETE FROM {table} WHERE Quantile IN {quantiles}")
+        deleteTableQuery.exec(f"DELETE FROM WaterFlow WHERE Run = {runID}") #Analytical flows
+        for table in ["ParametersDistribution", "BestParameters"]:
+            deleteTableQuery.exec(f"DELETE FROM {table} WHERE Layer IN {layers}")
+        for table, name, _ in RUN_COLUMNS:
+            if name == "Run":
+                deleteTableQuery.exec(f"DELETE FROM {table} WHERE Run = {runID}")
+        deleteTableQuery.exec(f"DELETE FROM ComputationRun WHERE ID = {runID}")
+        deleteTableQuery.exec(f"""DELETE FROM Depth WHERE PointKey = {self.pointID}
+                        AND Cells NOT IN (SELECT NbCells FROM ComputationRun WHERE PointKey = {self.pointID} AND NbCells IS NOT NULL)""")
+        self.con.commit()
+        if runID == self.runID:
+            self.set_run(self.last_run())
+        self.update_summary()
+
+    def update_summary(self):
+        """
+        Recompute the summary of this point displayed in the study dashboard. This should be called every time the cleaned measures or the computations change.
+        """
+        update_point_summary(self.con, self.pointID)
 
     def computation_type(self):
         """
-        Return a symbolic name (via an enumeration) representing the state of the database.
+        Return a symbolic name (via an enumeration) representing the state of the database. The computations are the ones of the current run.
         """
         quant = QSqlQuery(self.con)
         quant.prepare(f"""SELECT COUNT(*) FROM Quantile
                 JOIN Point
                 ON Quantile.PointKey = Point.ID
-                WHERE Point.ID = {self.pointID}""")
+                WHERE Point.ID = {self.pointID}
+                AND Quantile.Run = :Run""")
+        quant.bindValue(":Run", self.runID)
         quant.exec()
         quant.next()
         comp = QSqlQuery(self.con)
@@ -400,7 +667,7 @@ class SPointCoordinator:
 
     def build_layers_query(self):
         """
-        Build and return a query giving the depths of all the layers.
+        Build and return a query giving the depths of all the layers of the current run.
         """
         query = QSqlQuery(self.con)
         query.prepare(f"""
@@ -408,8 +675,10 @@ class SPointCoordinator:
             JOIN Point
             ON Layer.PointKey = Point.ID
             WHERE Point.ID = {self.pointID}
+            AND Layer.Run = :Run
             ORDER BY Layer.Depth
         """)
+        query.bindValue(":Run", self.runID)
         return query
 
     def build_params_query(self, depth : float):
@@ -423,8 +692,10 @@ class SPointCoordinator:
             JOIN Point
             ON BestParameters.PointKey = Point.ID
             WHERE Point.ID = {self.pointID}
+            AND Layer.Run = :Run
             AND Layer.Depth = {depth}
         """)
+        query.bindValue(":Run", self.runID)
         return query
 
     def build_params_distribution(self, layer : float):
@@ -439,8 +710,10 @@ class SPointCoordinator:
             JOIN Layer
             ON ParametersDistribution.Layer = Layer.ID
             WHERE Layer.Depth = {layer}
+            AND Layer.Run = :Run
             AND Point.ID = {self.pointID}
         """)
+        query.bindValue(":Run", self.runID)
         return query
 
     def build_global_RMSE_query(self):
@@ -455,8 +728,10 @@ class SPointCoordinator:
             JOIN Point
             ON Quantile.PointKey = Point.ID
             WHERE Point.ID = {self.pointID}
+            AND Quantile.Run = :Run
             ORDER BY Quantile.Quantile
         """)
+        query.bindValue(":Run", self.runID)
         return query
 
     def build_therm_RMSE(self):
@@ -471,8 +746,10 @@ class SPointCoordinator:
             JOIN Point
             ON Quantile.PointKey = Point.ID
             WHERE Point.ID = {self.pointID}
+            AND Quantile.Run = :Run
             AND Quantile.Quantile = 0
         """)
+        query.bindValue(":Run", self.runID)
         return query
 
     def build_thermo_depth(self, id : int):
@@ -486,10 +763,14 @@ class SPointCoordinator:
                 SELECT Depth.Depth FROM Depth
                 JOIN RMSE
                 ON Depth.ID = RMSE.{field}
+                JOIN Quantile
+                ON RMSE.Quantile = Quantile.ID
                 JOIN Point
                 ON RMSE.PointKey = Point.ID
                 WHERE Point.ID = {self.pointID}
+                AND Quantile.Run = :Run
             """)
+            query.bindValue(":Run", self.runID)
             return query
 
     def build_raw_measures(self, full_query : bool = False, field : str = ""):
@@ -570,6 +851,74 @@ class SPointCoordinator:
             """)
             return query
 
+    def measures_table_sql(self, raw_measures : bool):
+        """
+        Return three strings used to build the queries of the measures table:
+        -the column holding the date
+        -the columns to display (the same as build_raw_measures or build_cleaned_measures with full_query set to True)
+        -the FROM and WHERE clauses selecting the measures of this point
+        """
+        if raw_measures:
+            date = "RawMeasuresTemp.Date"
+            columns = "RawMeasuresTemp.Date, RawMeasuresTemp.Temp1, RawMeasuresTemp.Temp2, RawMeasuresTemp.Temp3, RawMeasuresTemp.Temp4, RawMeasuresPress.TempBed, RawMeasuresPress.Voltage"
+            from_where = f"""
+                FROM RawMeasuresTemp, RawMeasuresPress
+                JOIN SamplingPoint AS SP_press ON RawMeasuresPress.SamplingPoint = SP_press.ID
+                JOIN SamplingPoint AS SP_temp ON RawMeasuresTemp.SamplingPoint = SP_temp.ID
+                WHERE RawMeasuresTemp.Date = RawMeasuresPress.Date
+                AND SP_press.ID = {self.samplingPointID}
+                AND SP_temp.ID = {self.samplingPointID}
+            """
+        else:
+            date = "Date.Date"
+            columns = "Date.Date, CleanedMeasures.Temp1, CleanedMeasures.Temp2, CleanedMeasures.Temp3, CleanedMeasures.Temp4, CleanedMeasures.TempBed, CleanedMeasures.Pressure"
+            from_where = f"""
+                FROM CleanedMeasures
+                JOIN Date
+                ON CleanedMeasures.Date = Date.ID
+                JOIN Point
+                ON CleanedMeasures.PointKey = Point.ID
+                WHERE Point.ID = {self.pointID}
+            """
+        return date, columns, from_where
+
+    def build_measures_count(self, raw_measures : bool):
+        """
+        Build and return a query giving the number of rows in the measures table.
+        """
+        date, columns, from_where = self.measures_table_sql(raw_measures)
+        query = QSqlQuery(self.con)
+        query.prepare(f"SELECT COUNT(*) {from_where}")
+        return query
+
+    def build_measures_page_key(self, raw_measures : bool):
+        """
+        Build and return a query giving the date of the row of the measures table which is :offset rows after the date :start.
+        """
+        date, columns, from_where = self.measures_table_sql(raw_measures)
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT {date} {from_where}
+            AND {date} >= :start
+            ORDER BY {date}
+            LIMIT 1 OFFSET :offset
+        """)
+        return query
+
+    def build_measures_page(self, raw_measures : bool):
+        """
+        Build and return a query giving at most :limit rows of the measures table, starting from the date :start.
+        """
+        date, columns, from_where = self.measures_table_sql(raw_measures)
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT {columns} {from_where}
+            AND {date} >= :start
+            ORDER BY {date}
+            LIMIT :limit
+        """)
+        return query
+
     def build_result_queries(self,result_type ="",option=""):
         """
         Return a list of queries according to the user's wish. The list will either be of length 1 (the model was not computed before), or more than one: in this case, there are as many queries as there are quantiles: the first query corresponds to the default model (quantile 0)
@@ -594,7 +943,7 @@ class SPointCoordinator:
 
     def define_result_queries(self,result_type ="",option="",quantile = 0):
         """
-        Build and return ONE AND ONLY ONE query concerning the results.
+        Build and return ONE AND ONLY ONE query concerning the results of the current run.
         -quantile must be a float, and is either 0 (direct result), 0.05,0.5 or 0.95
         -option can be a string (which 2D map should be displayed or a date for the umbrellas) or a float (depth required by user)
         """
@@ -610,9 +959,11 @@ class SPointCoordinator:
                 JOIN Point
                 ON Quantile.PointKey = Point.ID
                 WHERE Point.ID = {self.pointID}
+                AND Quantile.Run = :Run
                 AND Quantile.Quantile = {quantile}
                 ORDER BY Date.Date
             """)
+            query.bindValue(":Run", self.runID)
             return query
         elif result_type =="2DMap":
             if option=="Temperature":
@@ -627,9 +978,11 @@ class SPointCoordinator:
                     JOIN Point
                     ON Quantile.PointKey = Point.ID
                     WHERE Point.ID = {self.pointID}
+                    AND Quantile.Run = :Run
                     AND Quantile.Quantile = {quantile}
                     ORDER BY Date.Date, Depth.Depth
-                """) #Column major: order by date
+                """)
+                query.bindValue(":Run", self.runID) #Column major: order by date
                 return query
             elif option=="HeatFlows":
                 query.prepare(f"""
@@ -643,14 +996,16 @@ class SPointCoordinator:
                     JOIN Point
                     ON Quantile.PointKey = Point.ID
                     WHERE Point.ID = {self.pointID}
+                    AND Quantile.Run = :Run
                     AND Quantile.Quantile = {quantile}
                     ORDER BY Date.Date, Depth.Depth
                 """)
+                query.bindValue(":Run", self.runID)
                 return query
 
     def build_depths(self):
         """
-        Build and return all the depths values.
+        Build and return all the depths values of the current run. They are shared by all the runs with the same number of cells.
         """
         query = QSqlQuery(self.con)
         query.prepare(f"""
@@ -658,8 +1013,10 @@ class SPointCoordinator:
             JOIN Point
             ON Depth.PointKey = Point.ID
             WHERE Point.ID = {self.pointID}
+            AND Depth.Cells = (SELECT ComputationRun.NbCells FROM ComputationRun WHERE ComputationRun.ID = :Run)
             ORDER BY Depth.Depth
         """)
+        query.bindValue(":Run", self.runID)
         return query
 
     def build_dates(self):
@@ -676,9 +1033,22 @@ class SPointCoordinator:
         """)
         return query
 
+    def build_dates_range(self):
+        """
+        Build and return the first and last dates for this point.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT MIN(Date.Date), MAX(Date.Date) FROM Date
+            JOIN Point
+            ON Date.PointKey = Point.ID
+            WHERE Point.ID = {self.pointID}
+        """)
+        return query
+
     def build_quantiles(self):
         """
-        Build and return the quantiles values.
+        Build and return the quantiles values of the current run.
         """
         query = QSqlQuery(self.con)
         query.prepare(f"""
@@ -686,8 +1056,142 @@ class SPointCoordinator:
             JOIN Point
             ON Quantile.PointKey = Point.ID
             WHERE Point.ID = {self.pointID}
+            AND Quantile.Run = :Run
             ORDER BY Quantile.Quantile
         """)
+        query.bindValue(":Run", self.runID)
+        return query
+
+    def build_ensemble_quantiles(self):
+        """
+        Build and return the quantiles of the bands computed by the ensemble engine for the current run.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT DISTINCT EnsembleWaterFlow.Quantile FROM EnsembleWaterFlow
+            WHERE EnsembleWaterFlow.PointKey = {self.pointID}
+            AND EnsembleWaterFlow.Run = :Run
+            ORDER BY EnsembleWaterFlow.Quantile
+        """)
+        query.bindValue(":Run", self.runID)
+        return query
+
+    def build_ensemble_water_flow(self, quantile : float):
+        """
+        Build and return the band of the water flow for the given quantile, in the same format as the water flow queries given by define_result_queries. The label of the band is used instead of the quantile.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT Date.Date, EnsembleWaterFlow.WaterFlow, 'Ensemble quantile ' || EnsembleWaterFlow.Quantile FROM EnsembleWaterFlow
+            JOIN Date
+            ON EnsembleWaterFlow.Date = Date.ID
+            WHERE EnsembleWaterFlow.PointKey = {self.pointID}
+            AND EnsembleWaterFlow.Run = :Run
+            AND EnsembleWaterFlow.Quantile = {quantile}
+            ORDER BY Date.Date
+        """)
+        query.bindValue(":Run", self.runID)
+        return query
+
+    def build_ensemble_heat_flows(self):
+        """
+        Build and return the bands of the heat flows for all quantiles.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT EnsembleHeatFlows.Quantile, EnsembleHeatFlows.AdvectiveFlow, EnsembleHeatFlows.ConductiveFlow, EnsembleHeatFlows.TotalFlow FROM EnsembleHeatFlows
+            JOIN Date
+            ON EnsembleHeatFlows.Date = Date.ID
+            JOIN Depth
+            ON EnsembleHeatFlows.Depth = Depth.ID
+            WHERE EnsembleHeatFlows.PointKey = {self.pointID}
+            AND EnsembleHeatFlows.Run = :Run
+            ORDER BY EnsembleHeatFlows.Quantile, Date.Date, Depth.Depth
+        """)
+        query.bindValue(":Run", self.runID)
+        return query
+
+    def build_analytical_methods(self):
+        """
+        Build and return the methods of the water flows estimated by the analytical flux engine in the current run.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT DISTINCT WaterFlow.Method FROM WaterFlow
+            WHERE WaterFlow.PointKey = {self.pointID}
+            AND WaterFlow.Run = :Run
+            AND WaterFlow.Method IS NOT NULL
+            ORDER BY WaterFlow.Method
+        """)
+        query.bindValue(":Run", self.runID)
+        return query
+
+    def build_analytical_water_flow(self, method : str):
+        """
+        Build and return the water flow estimated with the given analytical method, in the same format as the water flow queries given by define_result_queries. The method is used as a label instead of the quantile.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT Date.Date, WaterFlow.WaterFlow, WaterFlow.Method FROM WaterFlow
+            JOIN Date
+            ON WaterFlow.Date = Date.ID
+            WHERE WaterFlow.PointKey = {self.pointID}
+            AND WaterFlow.Run = :Run
+            AND WaterFlow.Method = :Method
+            ORDER BY Date.Date
+        """)
+        query.bindValue(":Run", self.runID)
+        query.bindValue(":Method", method)
+        return query
+
+    def build_mcmc_run(self):
+        """
+        Build and return a query giving the settings and the convergence of the MCMC of the current run.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT MaxIterations, Iterations, WarmStart, Converged, AcceptanceRate, ESS, RHat, Geweke, BurnIn, Thinning, MaxSamples, StoredSamples FROM MCMCRun
+            WHERE PointKey = {self.pointID}
+            AND Run = :Run
+        """)
+        query.bindValue(":Run", self.runID)
+        return query
+
+    def build_runs(self):
+        """
+        Build and return a query giving the finished runs of this point, from the oldest to the newest.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT ID, Type, Settings, NbCells, Start, Duration, RMSE FROM ComputationRun
+            WHERE PointKey = {self.pointID} AND {FINISHED_RUN}
+            ORDER BY ID
+        """)
+        return query
+
+    def build_sweep_runs(self):
+        """
+        Build and return the runs of the parameter sweep: the design, the values of the parameters (NULL if the parameter wasn't swept) and the outputs.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT SweepRun.Design, SweepRun.Permeability, SweepRun.Porosity, SweepRun.ThermConduct, SweepRun.HeatCapacity,
+            SweepRun.RMSE1, SweepRun.RMSE2, SweepRun.RMSE3, SweepRun.RMSETotal, SweepRun.MeanWaterFlow FROM SweepRun
+            WHERE SweepRun.PointKey = {self.pointID}
+            ORDER BY SweepRun.ID
+        """)
+        return query
+
+    def build_sensitivity_indices(self):
+        """
+        Build and return the sensitivity indices of the parameter sweep.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""
+            SELECT SensitivityIndex.Parameter, SensitivityIndex.Output, SensitivityIndex.Index1, SensitivityIndex.Index2 FROM SensitivityIndex
+            WHERE SensitivityIndex.PointKey = {self.pointID}
+            ORDER BY SensitivityIndex.ID
+        """)
         return query
 
     def build_max_depth(self):
@@ -1,9 +1,12 @@
+import logging
 from ast import literal_eval
 import pandas as pd
 
 from PyQt5.QtSql import QSqlQuery, QSqlDatabase #QSqlDatabase in used only for type hints
 from ..utils.general import displayCriticalMessage
 
+logger = logging.getLogger(__name__)
+
 class StudyAndLabManager:
     """
     A concrete class to handle high-level operations on laboratories and studies, such as adding a lab to the database or creating a new study.
@@ -36,7 +39,7 @@ class StudyAndLabManager:
         insertStudy.bindValue(":Name",studyName)
         insertStudy.bindValue(":Labo",labID)
         insertStudy.exec()
-        print(f"The study {studyName} has been added to the database.")
+        logger.info(f"The study {studyName} has been added to the database.")
 
     def is_study_in_database(self, studyName : str):
         """
@@ -91,7 +94,7 @@ class StudyAndLabManager:
         """
         insert_lab = self.build_insert_lab(labName)
         insert_lab.exec()
-        print(f"The lab {labName} has been added to the database.")
+        logger.info(f"The lab {labName} has been added to the database.")
         return insert_lab.lastInsertId()
 
     def insert_detectors(self, labID : int|str, thermometersDF : list[pd.DataFrame], psensorsDF : list[pd.DataFrame], shaftsDF : list[pd.DataFrame]):
@@ -116,7 +119,7 @@ class StudyAndLabManager:
             insertQuery.bindValue(":Error",sigma)
             insertQuery.bindValue(":Labo",labID)
             insertQuery.exec()
-        print("The thermometers have been added to the database.") #TODO: Maybe a little check before asserting this?
+        logger.info("The thermometers have been added to the database.") #TODO: Maybe a little check before asserting this?
 
         insertPsensor = self.build_insert_psensor()
         for df in psensorsDF:
@@ -143,7 +146,7 @@ class StudyAndLabManager:
             insertPsensor.bindValue(":ThermoModel",thermo_model)
             insertPsensor.bindValue(":Labo",labID)
             insertPsensor.exec()
-        print("The thermometers have been added to the database.") #TODO: Maybe a little check before asserting this?
+        logger.info("The thermometers have been added to the database.") #TODO: Maybe a little check before asserting this?
 
         insertShaft = self.build_insert_shaft()
         for df in shaftsDF:
@@ -165,7 +168,7 @@ class StudyAndLabManager:
             insertShaft.bindValue(":ThermoModel",thermo_model)
             insertShaft.bindValue(":Labo",labID)
             insertShaft.exec()
-        print("The shafts have been added to the database.")#TODO: Maybe a little check before asserting this?
+        logger.info("The shafts have been added to the database.")#TODO: Maybe a little check before asserting this?
 
     def build_similar_lab(self, labName : str):
         """
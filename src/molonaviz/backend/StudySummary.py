@@ -0,0 +1,167 @@
+"""
+This file regroups the functions and classes used to summarise the results of all the points of a study.
+The summary of every point is precomputed and stored in the PointSummary table, so the summary of a study can be displayed without reading the results of every point.
+"""
+import numpy as np
+from PyQt5.QtSql import QSqlQueryModel, QSqlQuery, QSqlDatabase #QSqlDatabase in used only for type hints
+
+from ..utils.general import databaseDatesToDatetime64
+from .ComputationRuns import PYHEATMY_RUNS, create_run_tables, latest_run
+
+SUMMARY_TABLE = """CREATE TABLE IF NOT EXISTS PointSummary (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            PointKey        INTEGER UNIQUE REFERENCES Point (ID),
+            NbMeasures      INTEGER,
+            FirstDate       DATETIME,
+            LastDate        DATETIME,
+            Coverage        REAL,
+            MeanWaterFlow   REAL,
+            WaterFlowQ05    REAL,
+            WaterFlowQ50    REAL,
+            WaterFlowQ95    REAL,
+            RMSE            REAL,
+            BestParameters  VARCHAR
+        )"""
+
+def create_summary_table(con : QSqlDatabase):
+    """
+    Create the PointSummary table if it doesn't exist: databases created with older versions of Molonaviz don't have it.
+    """
+    query = QSqlQuery(con)
+    query.exec(SUMMARY_TABLE)
+
+def update_point_summary(con : QSqlDatabase, pointID : int):
+    """
+    Compute the summary of the point with the given ID from the database and store it in the PointSummary table, replacing the previous one.
+    This should be called every time the cleaned measures or the computations of a point change. The results summarised are the ones of the last run of the point made with pyheatmy.
+    """
+    create_summary_table(con)
+    create_run_tables(con)
+    run = latest_run(pointID, PYHEATMY_RUNS)
+
+    #Data coverage: number of cleaned measures compared to the number of measures expected with the usual time step.
+    dates = QSqlQuery(con)
+    dates.setForwardOnly(True)
+    dates.exec(f"""SELECT Date.Date FROM CleanedMeasures
+                    JOIN Date ON CleanedMeasures.Date = Date.ID
+                    WHERE CleanedMeasures.PointKey = {pointID}
+                    ORDER BY Date.Date""")
+    all_dates = []
+    while dates.next():
+        all_dates.append(dates.value(0))
+    nb_measures = len(all_dates)
+    first_date, last_date, coverage = None, None, None
+    if nb_measures > 0:
+        first_date, last_date = all_dates[0], all_dates[-1]
+        coverage = 1.
+        if nb_measures > 1:
+            times = databaseDatesToDatetime64(all_dates)
+            steps = np.diff(times)
+            time_step = np.median(steps)
+            if time_step > np.timedelta64(0):
+                coverage = min(1., float(nb_measures / ((times[-1] - times[0]) / time_step + 1)))
+
+    #Water flow given by the direct model (quantile 0)
+    flows = QSqlQuery(con)
+    flows.setForwardOnly(True)
+    flows.exec(f"""SELECT WaterFlow.WaterFlow FROM WaterFlow
+                    JOIN Quantile ON WaterFlow.Quantile = Quantile.ID
+                    WHERE WaterFlow.PointKey = {pointID} AND Quantile.Quantile = 0 AND Quantile.Run IS {run}""")
+    all_flows = []
+    while flows.next():
+        all_flows.append(flows.value(0))
+    mean_flow, q05, q50, q95 = None, None, None, None
+    if len(all_flows) > 0:
+        all_flows = np.array(all_flows, dtype=np.float64)
+        mean_flow = float(np.mean(all_flows))
+        q05, q50, q95 = (float(q) for q in np.percentile(all_flows, [5, 50, 95]))
+
+    rmse = QSqlQuery(con)
+    rmse.exec(f"""SELECT RMSE.RMSETotal FROM RMSE
+                    JOIN Quantile ON RMSE.Quantile = Quantile.ID
+                    WHERE RMSE.PointKey = {pointID} AND Quantile.Quantile = 0 AND Quantile.Run IS {run}""")
+    total_rmse = rmse.value(0) if rmse.next() else None
+
+    #Best parameters: one line per layer.
+    params = QSqlQuery(con)
+    params.exec(f"""SELECT Layer.Name, Layer.Depth, BestParameters.Permeability, BestParameters.ThermConduct, BestParameters.Porosity, BestParameters.Capacity FROM BestParameters
+                    JOIN Layer ON BestParameters.Layer = Layer.ID
+                    WHERE BestParameters.PointKey = {pointID} AND Layer.Run IS {run}
+                    ORDER BY Layer.Depth""")
+    layers = []
+    while params.next():
+        layers.append(f"{params.value(0)} ({params.value(1)} m): -log10(K)={params.value(2):.4g}, lambda_s={params.value(3):.4g}, n={params.value(4):.4g}, rho_s*c_s={params.value(5):.4g}")
+    best_params = "\n".join(layers) if len(layers) > 0 else None
+
+    insert = QSqlQuery(con)
+    insert.prepare("""INSERT OR REPLACE INTO PointSummary (PointKey, NbMeasures, FirstDate, LastDate, Coverage, MeanWaterFlow, WaterFlowQ05, WaterFlowQ50, WaterFlowQ95, RMSE, BestParameters)
+                    VALUES (:PointKey, :NbMeasures, :FirstDate, :LastDate, :Coverage, :MeanWaterFlow, :WaterFlowQ05, :WaterFlowQ50, :WaterFlowQ95, :RMSE, :BestParameters)""")
+    for name, value in ((":PointKey", pointID), (":NbMeasures", nb_measures), (":FirstDate", first_date), (":LastDate", last_date),
+                        (":Coverage", coverage), (":MeanWaterFlow", mean_flow), (":WaterFlowQ05", q05), (":WaterFlowQ50", q50),
+                        (":WaterFlowQ95", q95), (":RMSE", total_rmse), (":BestParameters", best_params)):
+        insert.bindValue(name, value)
+    insert.exec()
+
+class StudySummary:
+    """
+    A concrete class giving the summary of all the sampling points of a study.
+    The summaries are read from the PointSummary table: the points which don't have a summary yet (for example, if they were computed with an older version of Molonaviz) are summarised once when the summary is refreshed.
+    To bind the frontend view displaying the summary, a getter is implemented returning the model.
+    """
+    def __init__(self, con : QSqlDatabase, studyName : str):
+        self.con = con
+        self.studyName = studyName
+        create_summary_table(self.con)
+        self.summaryModel = QSqlQueryModel()
+
+    def get_summary_model(self):
+        return self.summaryModel
+
+    def refresh_summary(self):
+        """
+        Summarise the points which don't have a summary, then refresh the summary model.
+        """
+        missing = self.build_missing_summaries()
+        missing.exec()
+        pointsIDs = []
+        while missing.next():
+            pointsIDs.append(missing.value(0))
+        self.con.transaction()
+        for pointID in pointsIDs:
+            update_point_summary(self.con, pointID)
+        self.con.commit()
+
+        summary = self.build_summary_query()
+        summary.exec()
+        self.summaryModel.setQuery(summary)
+
+    def build_missing_summaries(self):
+        """
+        Build and return a query giving the IDs of the points in this study which don't have a summary.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""SELECT Point.ID FROM Point
+                        JOIN SamplingPoint ON Point.SamplingPoint = SamplingPoint.ID
+                        JOIN Study ON SamplingPoint.Study = Study.ID
+                        LEFT JOIN PointSummary ON PointSummary.PointKey = Point.ID
+                        WHERE Study.Name = '{self.studyName}' AND PointSummary.ID IS NULL""")
+        return query
+
+    def build_summary_query(self):
+        """
+        Build and return a query giving the summary of every sampling point in this study. The sampling points which were never opened have an empty summary.
+        """
+        query = QSqlQuery(self.con)
+        query.prepare(f"""SELECT SamplingPoint.Name AS Point, PointSummary.NbMeasures AS "Measures",
+                            PointSummary.FirstDate AS "First date", PointSummary.LastDate AS "Last date",
+                            ROUND(100 * PointSummary.Coverage, 1) AS "Coverage (%)",
+                            PointSummary.MeanWaterFlow AS "Mean water flow (m/s)", PointSummary.WaterFlowQ05 AS "Water flow 5%",
+                            PointSummary.WaterFlowQ50 AS "Water flow 50%", PointSummary.WaterFlowQ95 AS "Water flow 95%",
+                            PointSummary.RMSE AS "RMSE (°C)", PointSummary.BestParameters AS "Best parameters"
+                        FROM SamplingPoint
+                        JOIN Study ON SamplingPoint.Study = Study.ID
+                        LEFT JOIN Point ON Point.SamplingPoint = SamplingPoint.ID
+                        LEFT JOIN PointSummary ON PointSummary.PointKey = Point.ID
+                        WHERE Study.Name = '{self.studyName}'
+                        ORDER BY SamplingPoint.Name""")
+        return query
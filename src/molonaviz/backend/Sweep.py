@@ -0,0 +1,201 @@
+"""
+This file regroups the parameter sweeps, used to study how the RMSE and the water flow respond to the parameters of the layers.
+A design (a set of parameter values) is built from the ranges given by the user, the direct model is run for each of them in a pool of processes (see map_direct_models in backend/Ensemble.py), and sensitivity indices are computed from the results. Three designs are available:
+    -"Grid": every combination of evenly spaced values. The indices are the first-order and total variance-based indices of the grid, computed exactly.
+    -"Morris": random trajectories changing one parameter at a time. The indices are mu* (mean of the absolute elementary effects) and sigma (standard deviation of the elementary effects).
+    -"Sobol": quasi-random samples in the Saltelli layout. The indices are the first-order and total Sobol indices (Saltelli 2010 and Jansen estimators).
+A swept parameter takes the same value in every layer: the other parameters are the ones given for each layer.
+This file doesn't depend on Qt.
+"""
+import itertools
+import numpy as np
+
+from .Ensemble import map_direct_models
+
+#Names of the parameters (also the columns of the SweepRun table), in the order used for a layer by layersListCreator: -log10(K), porosity, thermal conductivity, heat capacity.
+PARAMETERS = ["Permeability", "Porosity", "ThermConduct", "HeatCapacity"]
+#Outputs of a run. The sensitivity indices are computed for the last two ones.
+OUTPUTS = ["RMSE1", "RMSE2", "RMSE3", "RMSETotal", "MeanWaterFlow"]
+ANALYSED_OUTPUTS = ["RMSETotal", "MeanWaterFlow"]
+#Names of the two indices computed for every design.
+INDEX_NAMES = {"Grid" : ("First order", "Total"),
+               "Morris" : ("mu*", "sigma"),
+               "Sobol" : ("First order", "Total")}
+MORRIS_LEVELS = 4 #Number of levels of the Morris grid
+
+#Tables holding the runs and the sensitivity indices. They are created when a point is opened, as databases created with older versions of Molonaviz don't have them.
+SWEEP_TABLES = ["""CREATE TABLE IF NOT EXISTS SweepRun (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            Design          VARCHAR,
+            Permeability    REAL,
+            Porosity        REAL,
+            ThermConduct    REAL,
+            HeatCapacity    REAL,
+            RMSE1           REAL,
+            RMSE2           REAL,
+            RMSE3           REAL,
+            RMSETotal       REAL,
+            MeanWaterFlow   REAL,
+            PointKey        INTEGER REFERENCES Point (ID)
+        )""",
+        """CREATE TABLE IF NOT EXISTS SensitivityIndex (
+            ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+            Parameter   VARCHAR,
+            Output      VARCHAR,
+            Index1      REAL,
+            Index2      REAL,
+            PointKey    INTEGER REFERENCES Point (ID)
+        )"""]
+
+def build_design(design : str, ranges : dict, nb_samples : int = 0, seed : int | None = None):
+    """
+    Build the design of the sweep in the unit hypercube, as an array with one row per run and one column per parameter of ranges.
+    ranges is a dictionnary whose keys are the swept parameters (see PARAMETERS) and values are (min, max, number of values): the number of values is only used by the "Grid" design. nb_samples is the number of trajectories of the "Morris" design, or the number of base samples of the "Sobol" design (rounded up to a power of 2).
+    """
+    nb_parameters = len(ranges)
+    rng = np.random.default_rng(seed)
+    if design == "Grid":
+        axes = [np.linspace(0, 1, nb_values) if nb_values > 1 else np.array([0.5]) for (_, _, nb_values) in ranges.values()]
+        return np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, nb_parameters)
+    elif design == "Morris":
+        #Every trajectory starts from a random point of the grid, and each step increases one parameter by delta.
+        delta = MORRIS_LEVELS / (2*(MORRIS_LEVELS - 1))
+        starts = np.arange(MORRIS_LEVELS)[np.arange(MORRIS_LEVELS) / (MORRIS_LEVELS - 1) <= 1 - delta + 1e-12] / (MORRIS_LEVELS - 1)
+        trajectories = []
+        for _ in range(nb_samples):
+            point = rng.choice(starts, size=nb_parameters)
+            trajectory = [point.copy()]
+            for parameter in rng.permutation(nb_parameters):
+                point[parameter] += delta
+                trajectory.append(point.copy())
+            trajectories.extend(trajectory)
+        return np.array(trajectories, dtype=np.float64)
+    elif design == "Sobol":
+        from scipy.stats import qmc #scipy is slow to import: it is only imported when a computation is needed.
+        m = max(0, int(np.ceil(np.log2(max(1, nb_samples)))))
+        samples = qmc.Sobol(d=2*nb_parameters, scramble=True, seed=seed).random_base2(m)
+        A, B = samples[:, :nb_parameters], samples[:, nb_parameters:]
+        blocks = [A, B]
+        for parameter in range(nb_parameters):
+            AB = A.copy()
+            AB[:, parameter] = B[:, parameter]
+            blocks.append(AB)
+        return np.concatenate(blocks)
+    raise ValueError(f"Unknown design: {design}")
+
+def scale_design(unit_design : np.ndarray, ranges : dict):
+    """
+    Convert a design in the unit hypercube to the values of the parameters.
+    """
+    bounds = np.array([(low, high) for (low, high, _) in ranges.values()], dtype=np.float64).reshape(-1, 2)
+    return bounds[:, 0] + unit_design * (bounds[:, 1] - bounds[:, 0])
+
+def sweep_parameter_sets(layers : list[list], parameters : list[str], values : np.ndarray):
+    """
+    Return a list of parameter sets in the format expected by layersListCreator, one per row of values. layers gives the parameters of every layer ([name, depth, -log10(K), porosity, thermal conductivity, heat capacity]): the swept parameters are replaced by the values of the row in every layer.
+    """
+    columns = [2 + PARAMETERS.index(parameter) for parameter in parameters]
+    parameter_sets = []
+    for row in values:
+        params = [list(layer) for layer in layers]
+        for layer in params:
+            for column, value in zip(columns, row):
+                layer[column] = float(value)
+        parameter_sets.append(params)
+    return parameter_sets
+
+def solve_sweep_run(params : list[list], nb_cells : int):
+    """
+    Run the direct model with the given parameter set. Return the outputs of the run (see OUTPUTS), or NaN if the direct model failed.
+    """
+    from pyheatmy import layersListCreator
+    from .Ensemble import _column
+    try:
+        _column.compute_solve_transi(layersListCreator(params), nb_cells, verbose=False)
+        depths = _column.get_depths_solve()
+        rmse = [float(r) for r in _column.get_RMSE()]
+        return np.array(rmse + [float(np.mean(_column.get_flows_solve(depths[0])))], dtype=np.float64)
+    except Exception:
+        return np.full(len(OUTPUTS), np.nan)
+
+def run_sweep(col_dict : dict, parameter_sets : list, nb_cells : int, nb_workers : int | None = None, progress = None):
+    """
+    Run the direct model for every parameter set and return the outputs as an array with one row per run and one column per output (see OUTPUTS).
+    The direct models are run in nb_workers processes: see map_direct_models. If progress is not None, progress(done, total) is called every time a direct model is over.
+    """
+    outputs = np.full((len(parameter_sets), len(OUTPUTS)), np.nan)
+    results = map_direct_models(solve_sweep_run, col_dict, nb_workers, parameter_sets, itertools.repeat(nb_cells))
+    for done, result in enumerate(results, start=1):
+        outputs[done-1] = result
+        if progress is not None:
+            progress(done, len(parameter_sets))
+    return outputs
+
+def sensitivity_indices(design : str, unit_design : np.ndarray, y : np.ndarray):
+    """
+    Return the two sensitivity indices of every parameter (columns of unit_design) for the output y, as two arrays. See INDEX_NAMES for the meaning of the indices.
+    Runs whose output is NaN are ignored when possible.
+    """
+    if design == "Grid":
+        return grid_indices(unit_design, y)
+    elif design == "Morris":
+        return morris_indices(unit_design, y)
+    elif design == "Sobol":
+        return sobol_indices(unit_design.shape[1], y)
+    raise ValueError(f"Unknown design: {design}")
+
+def grid_indices(unit_design : np.ndarray, y : np.ndarray):
+    """
+    First-order and total indices of a full grid: the variance of the means of y for every value of a parameter, and the mean of the variances of y when all the other parameters are fixed, relative to the variance of y.
+    """
+    nb_parameters = unit_design.shape[1]
+    valid = ~np.isnan(y)
+    X, y = unit_design[valid], y[valid]
+    variance = np.var(y)
+    first, total = np.zeros(nb_parameters), np.zeros(nb_parameters)
+    if len(y) == 0 or variance == 0:
+        return first, total
+    for parameter in range(nb_parameters):
+        _, groups = np.unique(X[:, parameter], return_inverse=True)
+        means = np.bincount(groups, weights=y) / np.bincount(groups)
+        first[parameter] = np.average((means - y.mean())**2, weights=np.bincount(groups)) / variance
+        others = np.delete(X, parameter, axis=1)
+        _, groups = np.unique(others, axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+        counts = np.bincount(groups)
+        means = np.bincount(groups, weights=y) / counts
+        total[parameter] = np.mean((y - means[groups])**2) / variance
+    return first, total
+
+def morris_indices(unit_design : np.ndarray, y : np.ndarray):
+    """
+    mu* and sigma of the elementary effects, computed along the trajectories of a Morris design.
+    """
+    nb_parameters = unit_design.shape[1]
+    effects = [[] for _ in range(nb_parameters)]
+    for start in range(0, len(y) - nb_parameters, nb_parameters + 1):
+        for step in range(start, start + nb_parameters):
+            change = unit_design[step+1] - unit_design[step]
+            parameter = int(np.argmax(np.abs(change)))
+            effect = (y[step+1] - y[step]) / change[parameter]
+            if not np.isnan(effect):
+                effects[parameter].append(effect)
+    mu_star = np.array([np.mean(np.abs(e)) if len(e) > 0 else np.nan for e in effects])
+    sigma = np.array([np.std(e, ddof=1) if len(e) > 1 else np.nan for e in effects])
+    return mu_star, sigma
+
+def sobol_indices(nb_parameters : int, y : np.ndarray):
+    """
+    First-order (Saltelli 2010) and total (Jansen) Sobol indices, computed from the outputs of a design in the Saltelli layout: A, B, then A with the column of each parameter taken from B.
+    """
+    N = len(y) // (nb_parameters + 2)
+    yA, yB = y[:N], y[N:2*N]
+    variance = np.nanvar(np.concatenate([yA, yB]))
+    first, total = np.zeros(nb_parameters), np.zeros(nb_parameters)
+    if N == 0 or variance == 0:
+        return first, total
+    for parameter in range(nb_parameters):
+        yAB = y[(2+parameter)*N:(3+parameter)*N]
+        first[parameter] = np.nanmean(yB*(yAB - yA)) / variance
+        total[parameter] = 0.5*np.nanmean((yA - yAB)**2) / variance
+    return first, total
@@ -7,17 +7,71 @@ CREATE TABLE BestParameters (ID INTEGER PRIMARY KEY AUTOINCREMENT, Permeability
 -- Table: CleanedMeasures
 CREATE TABLE CleanedMeasures (ID INTEGER PRIMARY KEY AUTOINCREMENT, Date INTEGER REFERENCES Date (ID), TempBed REAL NOT NULL, Temp1 REAL NOT NULL, Temp2 REAL NOT NULL, Temp3 REAL NOT NULL, Temp4 REAL NOT NULL, Pressure REAL NOT NULL, PointKey INTEGER REFERENCES Point (ID));
 
+-- Table: ComputationRun
+CREATE TABLE ComputationRun (
+            ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+            Type        VARCHAR,
+            Settings    VARCHAR,
+            NbCells     INTEGER,
+            Start       DATETIME,
+            Duration    REAL,
+            RMSE        REAL,
+            PointKey    INTEGER REFERENCES Point (ID)
+        );
+
 -- Table: Date
 CREATE TABLE Date (ID INTEGER PRIMARY KEY AUTOINCREMENT, Date DATETIME, PointKey REFERENCES Point (ID));
 
 -- Table: Depth
-CREATE TABLE Depth (ID INTEGER PRIMARY KEY AUTOINCREMENT, Depth REAL, PointKey REFERENCES Point (ID));
+CREATE TABLE Depth (ID INTEGER PRIMARY KEY AUTOINCREMENT, Depth REAL, PointKey REFERENCES Point (ID), Cells INTEGER);
+
+-- Table: EnsembleHeatFlows
+CREATE TABLE EnsembleHeatFlows (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            Quantile        REAL,
+            AdvectiveFlow   REAL,
+            ConductiveFlow  REAL,
+            TotalFlow       REAL,
+            Date            INTEGER REFERENCES Date (ID),
+            Depth           INTEGER REFERENCES Depth (ID),
+            PointKey        INTEGER REFERENCES Point (ID),
+            Run             INTEGER REFERENCES ComputationRun (ID)
+        );
+
+-- Table: EnsembleWaterFlow
+CREATE TABLE EnsembleWaterFlow (
+            ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+            Quantile    REAL,
+            WaterFlow   REAL,
+            Date        INTEGER REFERENCES Date (ID),
+            PointKey    INTEGER REFERENCES Point (ID),
+            Run         INTEGER REFERENCES ComputationRun (ID)
+        );
 
 -- Table: Labo
 CREATE TABLE Labo (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR NOT NULL UNIQUE);
 
 -- Table: Layer
-CREATE TABLE Layer (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR, Depth REAL, PointKey REFERENCES Point (ID));
+CREATE TABLE Layer (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR, Depth REAL, PointKey REFERENCES Point (ID), Run INTEGER REFERENCES ComputationRun (ID));
+
+-- Table: MCMCRun
+CREATE TABLE MCMCRun (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            MaxIterations   INTEGER,
+            Iterations      INTEGER,
+            WarmStart       INTEGER,
+            AcceptanceRate  REAL,
+            ESS             REAL,
+            RHat            REAL,
+            Geweke          REAL,
+            Converged       INTEGER,
+            BurnIn          REAL,
+            Thinning        INTEGER,
+            MaxSamples      INTEGER,
+            StoredSamples   INTEGER,
+            PointKey        INTEGER REFERENCES Point (ID),
+            Run             INTEGER REFERENCES ComputationRun (ID)
+        );
 
 -- Table: ParametersDistribution
 CREATE TABLE ParametersDistribution (ID INTEGER PRIMARY KEY AUTOINCREMENT, Permeability REAL, ThermConduct REAL, Porosity REAL, HeatCapacity REAL, Layer INTEGER REFERENCES Layer (ID), PointKey INTEGER REFERENCES Point (ID));
@@ -25,11 +79,27 @@ CREATE TABLE ParametersDistribution (ID INTEGER PRIMARY KEY AUTOINCREMENT, Perme
 -- Table: Point
 CREATE TABLE Point (ID INTEGER PRIMARY KEY AUTOINCREMENT, SamplingPoint INTEGER REFERENCES SamplingPoint (ID), IncertK REAL, IncertLambda REAL, DiscretStep INTEGER, IncertRho REAL, TempUncertainty REAL, IncertPressure REAL);
 
+-- Table: PointSummary
+CREATE TABLE PointSummary (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            PointKey        INTEGER UNIQUE REFERENCES Point (ID),
+            NbMeasures      INTEGER,
+            FirstDate       DATETIME,
+            LastDate        DATETIME,
+            Coverage        REAL,
+            MeanWaterFlow   REAL,
+            WaterFlowQ05    REAL,
+            WaterFlowQ50    REAL,
+            WaterFlowQ95    REAL,
+            RMSE            REAL,
+            BestParameters  VARCHAR
+        );
+
 -- Table: PressureSensor
 CREATE TABLE PressureSensor (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR, Datalogger VARCHAR, Calibration DATETIME, Intercept REAL, DuDH REAL, DuDT REAL, Error REAL, ThermoModel INTEGER REFERENCES Thermometer (ID), Labo INTEGER REFERENCES Labo (ID));
 
 -- Table: Quantile
-CREATE TABLE Quantile (ID INTEGER PRIMARY KEY AUTOINCREMENT, Quantile REAL NOT NULL, PointKey REFERENCES Point (ID));
+CREATE TABLE Quantile (ID INTEGER PRIMARY KEY AUTOINCREMENT, Quantile REAL NOT NULL, PointKey REFERENCES Point (ID), Run INTEGER REFERENCES ComputationRun (ID));
 
 -- Table: RawMeasuresPress
 CREATE TABLE RawMeasuresPress (ID INTEGER PRIMARY KEY AUTOINCREMENT, Date DATETIME NOT NULL, TempBed REAL, Voltage REAL, SamplingPoint INTEGER REFERENCES SamplingPoint (ID));
@@ -43,12 +113,38 @@ CREATE TABLE RMSE (ID INTEGER PRIMARY KEY AUTOINCREMENT, Depth1 INTEGER REFERENC
 -- Table: SamplingPoint
 CREATE TABLE SamplingPoint (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR, Notice VARCHAR, Setup DATETIME, LastTransfer DATETIME, "Offset" REAL, RiverBed REAL, Shaft INTEGER REFERENCES Shaft (ID), PressureSensor INTEGER REFERENCES PressureSensor (ID), Study INTEGER REFERENCES Study (ID), Scheme VARCHAR, CleanupScript VARCHAR);
 
+-- Table: SensitivityIndex
+CREATE TABLE SensitivityIndex (
+            ID          INTEGER PRIMARY KEY AUTOINCREMENT,
+            Parameter   VARCHAR,
+            Output      VARCHAR,
+            Index1      REAL,
+            Index2      REAL,
+            PointKey    INTEGER REFERENCES Point (ID)
+        );
+
 -- Table: Shaft
 CREATE TABLE Shaft (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR NOT NULL, Datalogger VARCHAR NOT NULL, Depth1 REAL NOT NULL, Depth2 REAL NOT NULL, Depth3 REAL NOT NULL, Depth4 REAL NOT NULL, ThermoModel INTEGER REFERENCES Thermometer (ID), Labo INTEGER REFERENCES Labo (ID));
 
 -- Table: Study
 CREATE TABLE Study (ID INTEGER PRIMARY KEY AUTOINCREMENT, Name VARCHAR NOT NULL UNIQUE, Labo INTEGER REFERENCES Labo (ID));
 
+-- Table: SweepRun
+CREATE TABLE SweepRun (
+            ID              INTEGER PRIMARY KEY AUTOINCREMENT,
+            Design          VARCHAR,
+            Permeability    REAL,
+            Porosity        REAL,
+            ThermConduct    REAL,
+            HeatCapacity    REAL,
+            RMSE1           REAL,
+            RMSE2           REAL,
+            RMSE3           REAL,
+            RMSETotal       REAL,
+            MeanWaterFlow   REAL,
+            PointKey        INTEGER REFERENCES Point (ID)
+        );
+
 -- Table: TemperatureAndHeatFlows
 CREATE TABLE TemperatureAndHeatFlows (
             ID              INTEGER  PRIMARY KEY AUTOINCREMENT,
@@ -71,7 +167,9 @@ CREATE TABLE WaterFlow (
             WaterFlow           REAL,
             Date                INTEGER REFERENCES Date (ID),
             PointKey            INTEGER REFERENCES Point (ID),
-            Quantile            INTEGER REFERENCES Quantile (ID)
+            Quantile            INTEGER REFERENCES Quantile (ID),
+            Method              VARCHAR,
+            Run                 INTEGER REFERENCES ComputationRun (ID)
         );
 
 COMMIT TRANSACTION;
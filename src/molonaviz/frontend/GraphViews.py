@@ -2,7 +2,6 @@
 This file regroups different view inheriting from matplotlib's canvas. They are used to display data as graphs.
 """
 import matplotlib
-import matplotlib.pyplot as plt
 matplotlib.use('Qt5Agg')
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 import matplotlib.dates as mdates
@@ -13,10 +12,15 @@ import numpy as np
 from ..interactions.MoloModel import MoloModel
 from ..interactions.MoloView import MoloView
 from ..utils.general import dateToMdates
+from ..utils.decimation import MinMaxPyramid, ImagePyramid
+from ..utils.profiling import profiled
 
 class GraphView(MoloView, FigureCanvasQTAgg):
     """
     Abstract class to implement a graph view, inheriting both from the MoloView and the matplotlib canvas.
+
+    Graph views never clear their axes: the artists displaying the data (curves, images, histograms...) are created once and then updated in place.
+    After a full draw, the static parts of the axes (background, grid, ticks...) are rendered without the data artists and cached. If an update does not change anything static (limits, labels, legend...), only the data artists are drawn on top of this cached background and blitted to the screen.
     """
     def __init__(self, molomodel : MoloModel | None, width=5, height=5, dpi=100):
         MoloView.__init__(self, molomodel)
@@ -26,6 +30,50 @@ class GraphView(MoloView, FigureCanvasQTAgg):
         self.fig.tight_layout(h_pad=5, pad=5)
         self.axes = self.fig.add_subplot(111)
 
+        self.background = None #Cached rendering of the axes without the data artists
+        self.mpl_connect("draw_event", self.cacheBackground)
+
+    def dataArtists(self):
+        """
+        Return the list of the artists which depend on the data. This must be overloaded for child classes.
+        """
+        return []
+
+    def cacheBackground(self, event):
+        """
+        This is called by matplotlib after every full draw. Render the axes without the data artists and cache the result, then put the full rendering back so nothing changes on the screen.
+        """
+        if self.is_saving():
+            #The figure is being exported: event.renderer is not the one of the canvas.
+            return
+        fullRendering = self.copy_from_bbox(self.fig.bbox)
+        artists = self.dataArtists()
+        for artist in artists:
+            artist.set_visible(False)
+        self.axes.draw(event.renderer)
+        self.background = self.copy_from_bbox(self.axes.bbox)
+        for artist in artists:
+            artist.set_visible(True)
+        self.restore_region(fullRendering)
+
+    def refresh(self, staticChanged : bool):
+        """
+        Show the modifications made to the artists. If something static changed (or if no background was cached yet), a full draw is needed. Otherwise, only repaint the data artists over the cached background.
+        """
+        if staticChanged or self.background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self.background)
+        for artist in self.dataArtists():
+            self.axes.draw_artist(artist)
+        self.blit(self.axes.bbox)
+
+    def limits(self):
+        """
+        Return the current limits of the axes.
+        """
+        return self.axes.get_xlim(), self.axes.get_ylim()
+
 class GraphView1D(GraphView):
     """
     Abstract class to represent 1D views (such the pressure and temperature plots).
@@ -34,6 +82,8 @@ class GraphView1D(GraphView):
     There are two main attributes in this class:
         -self.x is a 1D array and will be displayed one the x-axis
         -self.y is a dictionnary of 1D array : the keys are the labels which should be displayed. This is useful to plot many graphs on the same view (quantiles for example).
+
+    To keep pan and zoom fluid with long time series, the curves are not drawn with every sample. A min/max pyramid is built for each curve when the data changes, and only the visible range is decimated to roughly the width of the canvas in pixels whenever the x-limits change.
     """
     def __init__(self, molomodel: MoloModel | None, time_dependent=False, title="", ylabel="", xlabel=""):
         super().__init__(molomodel)
@@ -45,14 +95,27 @@ class GraphView1D(GraphView):
         self.ylabel=ylabel
         self.title = title
         self.time_dependent = time_dependent
+        #Decimation: one pyramid per curve.
+        self.pyramids = {}
+        #The curves currently displayed: keys are the labels, values are matplotlib lines. This is not internal data, and is not cleared when calling resetData.
+        self.lines = {}
+
+        self.axes.set_xlabel(self.xlabel)
+        self.axes.set_title(self.title)
+        self.axes.grid(True)
+        if self.time_dependent:
+            formatter = mdates.DateFormatter("%y/%m/%d %H:%M")
+            self.axes.xaxis.set_major_formatter(formatter)
+            self.axes.xaxis.set_major_locator(MaxNLocator(4))
+            self.axes.tick_params(axis="x", labelrotation=15)
+        self.axes.callbacks.connect("xlim_changed", self.onXlimChanged)
 
+    @profiled()
     def onUpdate(self):
-        self.axes.clear()
         self.resetData()
         self.retrieveData()
         self.setup_x()
         self.plotData()
-        self.draw()
 
     def setup_x(self):
         """
@@ -60,27 +123,80 @@ class GraphView1D(GraphView):
         """
         if self.time_dependent:
             self.x = dateToMdates(self.x)
-            formatter = mdates.DateFormatter("%y/%m/%d %H:%M")
-            self.axes.xaxis.set_major_formatter(formatter)
-            self.axes.xaxis.set_major_locator(MaxNLocator(4))
-            plt.setp(self.axes.get_xticklabels(), rotation = 15)
-        else:
-            pass
+
+    def curvePoints(self, label, data):
+        """
+        Return the points of the curve with the given label which should be drawn. By default, build the min/max pyramid for this curve and decimate the whole range.
+        """
+        self.pyramids[label] = MinMaxPyramid(self.x, data)
+        return self.pyramids[label].decimate(nb_pixels=self.widthInPixels())
 
     def plotData(self):
-        for index, (label, data) in enumerate(self.y.items()):
-            if len(self.x) == len(data):
-                self.axes.plot(self.x, data, label=label)
-        self.axes.legend(loc='best')
+        previousLimits = self.limits()
+        labels = [label for label, data in self.y.items() if len(self.x) == len(data)]
+
+        #Remove the curves which should not be displayed anymore, then update or create the others.
+        for label in list(self.lines.keys()):
+            if label not in labels:
+                self.lines.pop(label).remove()
+        for label in labels:
+            x, y = self.curvePoints(label, self.y[label])
+            if label in self.lines:
+                self.lines[label].set_data(x, y)
+            else:
+                self.lines[label], = self.axes.plot(x, y, label=label)
+
+        legendChanged = self.updateLegend(labels)
+        ylabelChanged = self.axes.get_ylabel() != self.ylabel
         self.axes.set_ylabel(self.ylabel)
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.refresh(legendChanged or ylabelChanged or self.limits() != previousLimits)
 
-        self.axes.set_xlabel(self.xlabel)
-        self.axes.set_title(self.title)
-        self.axes.grid(True)
+    def updateLegend(self, labels : list):
+        """
+        Rebuild the legend if the displayed curves changed. Return True if the legend was modified.
+        """
+        legend = self.axes.get_legend()
+        current = [text.get_text() for text in legend.get_texts()] if legend is not None else []
+        #Matplotlib does not show empty labels or labels starting with an underscore.
+        shown = [str(label) for label in labels if str(label) and not str(label).startswith("_")]
+        if current == shown:
+            return False
+        if legend is not None:
+            legend.remove()
+        if len(shown) > 0:
+            self.axes.legend(loc='best')
+        return True
+
+    def dataArtists(self):
+        artists = list(self.lines.values())
+        if self.axes.get_legend() is not None:
+            artists.append(self.axes.get_legend())
+        return artists
+
+    def widthInPixels(self):
+        """
+        Return the width of the axes on the screen, in pixels.
+        """
+        return int(self.axes.get_window_extent().width)
+
+    def onXlimChanged(self, axes):
+        """
+        This is called by matplotlib when the user zooms or pans: decimate the visible range again.
+        There is no need to draw here, as matplotlib will redraw the canvas once the limits have changed.
+        """
+        xmin, xmax = axes.get_xlim()
+        nb_pixels = self.widthInPixels()
+        for label, pyramid in self.pyramids.items():
+            if label in self.lines:
+                x, y = pyramid.decimate(xmin, xmax, nb_pixels)
+                self.lines[label].set_data(x, y)
 
     def resetData(self):
         self.x = []
         self.y = {}
+        self.pyramids = {}
 
 class GraphView2D(GraphView):
     """
@@ -89,6 +205,9 @@ class GraphView2D(GraphView):
         -self.x is a 1D array and will be displayed on the x-axis
         -self.y is a 1D array and will be displayed one the y-axis
         -self.cmap is a 2D array: the value self.y[i,j] is actually the value of a pixel.
+    The image and its colorbar are created once, then updated in place.
+
+    The full map is never given to matplotlib. Instead, an image pyramid is built when the data changes, and the image only holds the tiles covering the visible range, downsampled to about the width of the canvas in pixels. Zooming in refines the tiles.
     """
     def __init__(self, molomodel: MoloModel | None,time_dependent=False,title="",xlabel = "",ylabel=""):
         super().__init__(molomodel)
@@ -100,15 +219,28 @@ class GraphView2D(GraphView):
         self.x = []
         self.y = []
         self.cmap = []
+        self.image = None
         self.colorbar = None
+        self.pyramid = None
+        self.tilesKey = None #Identifies the tiles currently displayed
 
+        self.axes.set_title(self.title)
+        self.axes.set_ylabel(self.ylabel)
+        self.axes.set_xlabel(self.xlabel)
+        if self.time_dependent:
+            self.axes.xaxis_date()
+            formatter = mdates.DateFormatter("%y/%m/%d %H:%M")
+            self.axes.xaxis.set_major_formatter(formatter)
+            self.axes.xaxis.set_major_locator(MaxNLocator(4))
+            self.axes.tick_params(axis="x", labelrotation=15)
+        self.axes.callbacks.connect("xlim_changed", self.onXlimChanged)
+
+    @profiled()
     def onUpdate(self):
-        self.axes.clear()
         self.resetData()
         self.retrieveData()
         self.setup_x()
         self.plotData()
-        self.draw()
 
     def setup_x(self):
         """
@@ -116,60 +248,139 @@ class GraphView2D(GraphView):
         """
         if self.time_dependent:
             self.x = dateToMdates(self.x)
-            formatter = mdates.DateFormatter("%y/%m/%d %H:%M")
-            self.axes.xaxis.set_major_formatter(formatter)
-            self.axes.xaxis.set_major_locator(MaxNLocator(4))
-            plt.setp(self.axes.get_xticklabels(), rotation = 15)
-        else:
-            pass
 
     def plotData(self):
-        if self.cmap.shape[1] ==len(self.x) and self.cmap.shape[0] == len(self.y):
+        if len(self.x) > 0 and self.cmap.shape[1] ==len(self.x) and self.cmap.shape[0] == len(self.y):
             #View is not empty and should display something
-            image = self.axes.imshow(self.cmap, cmap=cm.Spectral_r, aspect="auto", extent=[self.x[0], self.x[-1], float(self.y[-1]), float(self.y[0])], data="float")
-            self.colorbar = self.fig.colorbar(image) # Add a colorbar
-            self.axes.xaxis_date()
-            self.axes.set_title(self.title)
-            self.axes.set_ylabel(self.ylabel)
-            self.axes.set_xlabel(self.xlabel)
+            previousLimits = self.limits()
+            self.pyramid = ImagePyramid(self.x, self.cmap)
+            self.tilesKey = None
+            clim = (np.nanmin(self.cmap), np.nanmax(self.cmap))
+            staticChanged = self.image is None or self.image.get_clim() != clim
+            if self.image is None:
+                #The image is created with a single column: the visible tiles are set right after.
+                self.image = self.axes.imshow(self.cmap[:, :1], cmap=cm.Spectral_r, aspect="auto", vmin=clim[0], vmax=clim[1], extent=(self.x[0], self.x[-1], float(self.y[-1]), float(self.y[0])))
+                self.colorbar = self.fig.colorbar(self.image) # Add a colorbar
+            elif self.image.get_clim() != clim:
+                self.image.set_clim(*clim)
+                self.colorbar.update_normal(self.image)
+            #Show the full map: this calls onXlimChanged if the limits are modified.
+            self.axes.set_xlim(self.x[0], self.x[-1])
+            self.axes.set_ylim(float(self.y[-1]), float(self.y[0]))
+            self.showVisibleTiles()
+            self.refresh(staticChanged or self.limits() != previousLimits)
+        elif self.image is not None:
+            #The model is now empty: remove the image and its colorbar.
+            self.colorbar.remove()
+            self.image.remove()
+            self.colorbar = None
+            self.image = None
+            self.pyramid = None
+            self.refresh(True)
+
+    def showVisibleTiles(self):
+        """
+        Put in the image the tiles of the pyramid covering the visible range.
+        """
+        if self.pyramid is None or self.image is None:
+            return
+        xmin, xmax = self.axes.get_xlim()
+        tiles, (left, right), key = self.pyramid.view(xmin, xmax, int(self.axes.get_window_extent().width))
+        if key == self.tilesKey:
+            return
+        self.tilesKey = key
+        self.image.set_data(tiles)
+        self.image.set_extent((left, right, float(self.y[-1]), float(self.y[0])))
+
+    def onXlimChanged(self, axes):
+        """
+        This is called by matplotlib when the user zooms or pans. There is no need to draw here, as matplotlib will redraw the canvas once the limits have changed.
+        """
+        self.showVisibleTiles()
+
+    def dataArtists(self):
+        return [self.image] if self.image is not None else []
 
     def resetData(self):
         self.x = []
         self.y = []
         self.cmap = []
-        if self.colorbar:
-            # If a colorbar exists, remove it
-            self.colorbar.remove()
 
 class GraphViewHisto(GraphView):
     """
     Abstract class to display histograms.
+    The histogram is drawn as a single step patch, whose values and edges are updated in place. The counts are computed and kept by the model (see ParamsDistributionModel), so changing the number of bins only redraws the patch. The kernel density estimate of the distribution may be drawn over the histogram.
+    Concrete classes must give the name of the parameter they display, as expected by the model.
     """
+    parameter = ""
+
     def __init__(self, molomodel: MoloModel | None, bins=60, color ='green', title="", xlabel = ""):
         super().__init__(molomodel)
         self.bins = bins
-        self.data = []
+        self.counts = []
+        self.edges = []
+        self.density = ([], [])
+        self.showDensity = False
         self.color = color
         self.title = title
         self.xlabel = xlabel
+        self.patch = None
+        self.densityLine = None
+
+        self.axes.set_title(self.title)
+        self.axes.set_xlabel(self.xlabel)
 
     def updateBins(self,bins):
         self.bins = bins
 
+    def updateShowDensity(self, showDensity : bool):
+        self.showDensity = showDensity
+
+    @profiled()
     def onUpdate(self):
-        self.axes.clear()
         self.resetData()
         self.retrieveData()
         self.plotData()
-        self.draw()
+
+    def resetData(self):
+        self.counts = []
+        self.edges = []
+        self.density = ([], [])
+
+    def retrieveData(self):
+        self.counts, self.edges = self.model.get_histogram(self.parameter, self.bins)
+        if self.showDensity:
+            self.density = self.model.get_density(self.parameter)
 
     def plotData(self):
-        self.axes.hist(self.data, edgecolor='black', bins=self.bins, alpha=.3, density=True, color=self.color)
-        self.axes.set_title(self.title)
-        self.axes.set_xlabel(self.xlabel)
+        previousLimits = self.limits()
+        if len(self.counts) == 0:
+            if self.patch is not None:
+                self.patch.remove()
+                self.patch = None
+        elif self.patch is None:
+            self.patch = self.axes.stairs(self.counts, self.edges, fill=True, alpha=.3, facecolor=self.color, edgecolor='black')
+        else:
+            self.patch.set_data(self.counts, self.edges)
+
+        if len(self.density[0]) == 0:
+            if self.densityLine is not None:
+                self.densityLine.remove()
+                self.densityLine = None
+        elif self.densityLine is None:
+            self.densityLine, = self.axes.plot(*self.density, color=self.color)
+        else:
+            self.densityLine.set_data(*self.density)
 
-    def resetData(self):
-        self.data = []
+        if self.patch is None and self.densityLine is None:
+            self.refresh(True)
+            return
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.refresh(self.limits() != previousLimits)
+
+    def dataArtists(self):
+        return [artist for artist in [self.patch, self.densityLine] if artist is not None]
 
 class PressureView(GraphView1D):
     """
@@ -180,7 +391,7 @@ class PressureView(GraphView1D):
 
     def retrieveData(self):
         self.x  = self.model.get_dates()
-        self.y  = {"":np.float64(self.model.get_pressure())} #No label required for this one.
+        self.y  = {"":self.model.get_pressure()} #No label required for this one.
 
     def showVoltageLabel(self, show_voltage : bool):
         """
@@ -200,7 +411,7 @@ class TemperatureView(GraphView1D):
 
     def retrieveData(self):
         self.x  = self.model.get_dates()
-        self.y  = {f"Sensor n°{i}":np.float64(temp) for i,temp in enumerate(self.model.get_temperatures())}
+        self.y  = {f"Sensor n°{i}":temp for i,temp in enumerate(self.model.get_temperatures())}
 
 class UmbrellaView(GraphView1D):
     """
@@ -213,19 +424,12 @@ class UmbrellaView(GraphView1D):
     def retrieveData(self):
         self.x,self.y = self.model.get_depth_by_temp(self.nb_dates)
 
-    def plotData(self):
+    def curvePoints(self, label, data):
         """
         This function needs to be overloaded for the umbrellas, as the plot function must be like plot(temps, depth) with depths being fixed.
+        There are only a few depths, so there is no need to decimate the curves.
         """
-        for index, (label, data) in enumerate(self.y.items()):
-            if len(self.x) == len(data):
-                self.axes.plot( data,self.x, label=label)
-        self.axes.legend(loc='best')
-        self.axes.set_ylabel(self.ylabel)
-
-        self.axes.set_xlabel(self.xlabel)
-        self.axes.set_title(self.title)
-        self.axes.grid(True)
+        return data, self.x
 
 class TempDepthView(GraphView1D):
     """
@@ -266,7 +470,10 @@ class WaterFluxView(GraphView1D):
         if all_flows != {}:
             #The model is not empty so the view should display something
             for index, (key,value) in enumerate(all_flows.items()):
-                if key!=0:
+                if isinstance(key, str):
+                    #Band computed by the ensemble engine or flow estimated by the analytical flux engine: the key already is a label.
+                    self.y[key] = value
+                elif key!=0:
                     self.y[f"Quantile {key}"] = value
 
 class TempMapView(GraphView2D):
@@ -285,11 +492,16 @@ class AdvectiveFlowView(GraphView2D):
     """
     Concrete class for the advective flow map.
     """
-    def __init__(self, molomodel: MoloModel | None, time_dependent=True, title="Advective flow (W/m²)", xlabel="", ylabel="Depth (m)"):
+    def __init__(self, molomodel: MoloModel | None, time_dependent=True, title="Advective flow (W/m²)", xlabel="", ylabel="Depth (m)", quantile=0):
         super().__init__(molomodel, time_dependent, title, xlabel, ylabel)
+        self.quantile = quantile #0 for the direct model, else a quantile band computed by the ensemble engine
+
+    def updateOptions(self, quantile):
+        self.quantile = quantile
+        super().resetData()
 
     def retrieveData(self):
-        self.cmap = self.model.get_advective_flow()
+        self.cmap = self.model.get_advective_flow(self.quantile)
         self.x = self.model.get_dates()
         self.y = self.model.get_depths()
 
@@ -297,11 +509,16 @@ class ConductiveFlowView(GraphView2D):
     """
     Concrete class for the conductive flow map.
     """
-    def __init__(self, molomodel: MoloModel | None, time_dependent=True, title="Convective flow (W/m²)", xlabel="", ylabel="Depth (m)"):
+    def __init__(self, molomodel: MoloModel | None, time_dependent=True, title="Convective flow (W/m²)", xlabel="", ylabel="Depth (m)", quantile=0):
         super().__init__(molomodel, time_dependent, title, xlabel, ylabel)
+        self.quantile = quantile #0 for the direct model, else a quantile band computed by the ensemble engine
+
+    def updateOptions(self, quantile):
+        self.quantile = quantile
+        super().resetData()
 
     def retrieveData(self):
-        self.cmap = self.model.get_conductive_flow()
+        self.cmap = self.model.get_conductive_flow(self.quantile)
         self.x = self.model.get_dates()
         self.y = self.model.get_depths()
 
@@ -309,11 +526,16 @@ class TotalFlowView(GraphView2D):
     """
     Concrete class for the total heat flow map.
     """
-    def __init__(self, molomodel: MoloModel | None, time_dependent=True, title="Total energy flow (W/m²)", xlabel="", ylabel="Depth (m)"):
+    def __init__(self, molomodel: MoloModel | None, time_dependent=True, title="Total energy flow (W/m²)", xlabel="", ylabel="Depth (m)", quantile=0):
         super().__init__(molomodel, time_dependent, title, xlabel, ylabel)
+        self.quantile = quantile #0 for the direct model, else a quantile band computed by the ensemble engine
+
+    def updateOptions(self, quantile):
+        self.quantile = quantile
+        super().resetData()
 
     def retrieveData(self):
-        self.cmap = self.model.get_total_flow()
+        self.cmap = self.model.get_total_flow(self.quantile)
         self.x = self.model.get_dates()
         self.y = self.model.get_depths()
 
@@ -321,38 +543,150 @@ class Log10KView(GraphViewHisto):
     """
     Concrete class to display the distribution of the -Log10K paramter
     """
+    parameter = "log10k"
+
     def __init__(self, molomodel: MoloModel | None, bins=60, color='green', title="A posteriori histogram of the permeability", xlabel = "-log10(K)"):
         super().__init__(molomodel, bins, color, title, xlabel)
 
-    def retrieveData(self):
-        self.data = self.model.get_log10k()
-
 class PorosityView(GraphViewHisto):
     """
     Concrete class to display the distribution of the porosity paramter
     """
+    parameter = "porosity"
+
     def __init__(self, molomodel: MoloModel | None, bins=60, color='blue', title="A posteriori histogram of the porosity"):
         super().__init__(molomodel, bins, color, title)
 
-    def retrieveData(self):
-        self.data = self.model.get_porosity()
-
 class ConductivityView(GraphViewHisto):
     """
     Concrete class to display the distribution of the conductivity paramter
     """
+    parameter = "conductivity"
+
     def __init__(self, molomodel: MoloModel | None, bins=60, color='orange', title="A posteriori histogram of the thermal conductivity"):
         super().__init__(molomodel, bins, color, title)
 
-    def retrieveData(self):
-        self.data = self.model.get_conductivity()
-
 class CapacityView(GraphViewHisto):
     """
     Concrete class to display the distribution of the capacity paramter
     """
+    parameter = "capacity"
+
     def __init__(self, molomodel: MoloModel | None, bins=60, color='pink', title="A posteriori histogram of the thermal capacity"):
         super().__init__(molomodel, bins, color, title)
 
+class ResponseSurfaceView(GraphView):
+    """
+    Concrete class to display the response of an output of the parameter sweep to the swept parameters.
+    If a second parameter is given, every run is a point of the (x, y) plane coloured by the output. Otherwise, the output is plotted against the parameter.
+    """
+    def __init__(self, molomodel: MoloModel | None, options=["RMSETotal", None, None]):
+        super().__init__(molomodel)
+        self.output, self.xparameter, self.yparameter = options
+        self.x = []
+        self.y = []
+        self.z = []
+        self.scatter = None
+        self.colorbar = None
+
+    def updateOptions(self, options):
+        self.output, self.xparameter, self.yparameter = options
+
+    @profiled()
+    def onUpdate(self):
+        self.resetData()
+        self.retrieveData()
+        self.plotData()
+
     def retrieveData(self):
-        self.data = self.model.get_capacity()
\ No newline at end of file
+        parameters = self.model.get_parameters()
+        if self.xparameter not in parameters:
+            return
+        self.z = self.model.get_output(self.output)
+        self.x = self.model.get_values(self.xparameter)
+        if self.yparameter in parameters and self.yparameter != self.xparameter:
+            self.y = self.model.get_values(self.yparameter)
+
+    def plotData(self):
+        #The type of the plot may change: the artists are rebuilt.
+        if self.colorbar is not None:
+            self.colorbar.remove()
+            self.colorbar = None
+        if self.scatter is not None:
+            self.scatter.remove()
+            self.scatter = None
+        self.axes.set_title(self.output if len(self.x) > 0 else "")
+        self.axes.set_xlabel(self.xparameter if len(self.x) > 0 else "")
+        if len(self.x) > 0 and len(self.y) > 0:
+            self.scatter = self.axes.scatter(self.x, self.y, c=self.z, cmap=cm.Spectral_r)
+            self.colorbar = self.fig.colorbar(self.scatter, ax=self.axes)
+            self.axes.set_ylabel(self.yparameter)
+        elif len(self.x) > 0:
+            self.scatter = self.axes.scatter(self.x, self.z, color="blue", s=10)
+            self.axes.set_ylabel(self.output)
+        else:
+            self.axes.set_ylabel("")
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.refresh(True)
+
+    def dataArtists(self):
+        return [self.scatter] if self.scatter is not None else []
+
+    def resetData(self):
+        self.x = []
+        self.y = []
+        self.z = []
+
+class SensitivityView(GraphView):
+    """
+    Concrete class to display the two sensitivity indices of every swept parameter for an output of the parameter sweep, as grouped bars.
+    """
+    def __init__(self, molomodel: MoloModel | None, output="RMSETotal"):
+        super().__init__(molomodel)
+        self.output = output
+        self.indices = {}
+        self.names = ("", "")
+        self.bars = []
+
+    def updateOptions(self, output):
+        self.output = output
+
+    @profiled()
+    def onUpdate(self):
+        self.resetData()
+        self.retrieveData()
+        self.plotData()
+
+    def retrieveData(self):
+        self.indices = self.model.get_indices(self.output)
+        self.names = self.model.get_index_names()
+
+    def plotData(self):
+        for bars in self.bars:
+            bars.remove()
+        self.bars = []
+        legend = self.axes.get_legend()
+        if legend is not None:
+            legend.remove()
+        parameters = list(self.indices.keys())
+        positions = np.arange(len(parameters))
+        for i, name in enumerate(self.names):
+            if len(parameters) == 0:
+                break
+            self.bars.append(self.axes.bar(positions + (i - 0.5)*0.4, [self.indices[p][i] for p in parameters], width=0.4, label=name))
+        self.axes.set_xticks(positions)
+        self.axes.set_xticklabels(parameters)
+        self.axes.set_title(f"Sensitivity indices ({self.output})" if len(parameters) > 0 else "")
+        if len(parameters) > 0:
+            self.axes.legend(loc="best")
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.refresh(True)
+
+    def dataArtists(self):
+        return [patch for bars in self.bars for patch in bars]
+
+    def resetData(self):
+        self.indices = {}
+        self.names = ("", "")
@@ -1,21 +1,26 @@
-import csv
-from PyQt5 import QtWidgets, QtCore, uic, QtGui
+import logging
+from PyQt5 import QtWidgets, QtCore, QtGui
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 
 from ..interactions.Containers import SamplingPoint
 from ..interactions.InnerMessages import ComputationsState
 from ..backend.SPointCoordinator import SPointCoordinator
 from ..backend.Compute import Compute
+from ..backend.Export import Export
+from ..backend.Sweep import OUTPUTS, ANALYSED_OUTPUTS
 
-from .GraphViews import PressureView, TemperatureView,UmbrellaView,TempDepthView,TempMapView,AdvectiveFlowView, ConductiveFlowView, TotalFlowView, WaterFluxView, Log10KView, ConductivityView, PorosityView, CapacityView
+from .GraphViews import PressureView, TemperatureView,UmbrellaView,TempDepthView,TempMapView,AdvectiveFlowView, ConductiveFlowView, TotalFlowView, WaterFluxView, Log10KView, ConductivityView, PorosityView, CapacityView, ResponseSurfaceView, SensitivityView
 from .dialogExportCleanedMeasures import DialogExportCleanedMeasures
+from .dialogExport import DialogExport
 from .dialogConfirm import DialogConfirm
 from .dialogsCleanup import DialogCleanup
 from .dialogCompute import DialogCompute
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
+from ..utils.general import displayCriticalMessage
 
+logger = logging.getLogger(__name__)
 
-From_SamplingPointViewer = uic.loadUiType(get_ui_asset("SamplingPointViewer.ui"))[0]
+From_SamplingPointViewer = get_ui_class("SamplingPointViewer.ui")
 
 class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
 
@@ -29,6 +34,12 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         self.computeEngine = Compute(self.coordinator)
         self.computeEngine.DirectModelFinished.connect(self.updateAllViews)
         self.computeEngine.MCMCFinished.connect(self.updateAllViews)
+        self.computeEngine.EnsembleFinished.connect(self.updateAllViews)
+        self.computeEngine.SweepFinished.connect(self.updateAllViews)
+        self.computeEngine.OptimiserFailed.connect(self.updateAllViews)
+        self.computeEngine.AnalyticalFinished.connect(self.updateAllViews)
+        self.exportEngine = Export(self.coordinator)
+        self.exportEngine.exportFinished.connect(self.endExport)
 
         self.setupUi(self)
 
@@ -61,9 +72,17 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         self.conductivity_view = ConductivityView(paramsDistrModel)
         self.porosity_view = PorosityView(paramsDistrModel)
         self.capacity_view = CapacityView(paramsDistrModel)
+        sweepModel = self.coordinator.get_sweep_model()
+        self.response_view = ResponseSurfaceView(sweepModel)
+        self.sensitivity_view = SensitivityView(sweepModel)
 
         self.layoutsRules = self.initialiseLayoutsRules()
 
+        #Models are only loaded when the tab displaying them becomes visible: a tab is stale until it has been loaded.
+        self.tabLoaders = self.initialiseTabLoaders()
+        self.staleTabs = set()
+        self.tabWidget.currentChanged.connect(self.loadCurrentTab)
+
         #This allows to create 4 graphs in a square with one vertical and one horizontal splitter.
         self.tempSplitterHorizLeft.splitterMoved.connect(self.adjustTempRightSplitter)
         self.tempSplitterHorizRight.splitterMoved.connect(self.adjustTempLeftSplitter)
@@ -77,13 +96,23 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         self.radioButtonTherm2.clicked.connect(self.refreshTempDepthView)
         self.radioButtonTherm3.clicked.connect(self.refreshTempDepthView)
         self.checkBoxDirectModel.stateChanged.connect(self.refreshTempDepthView)
+        self.comboBoxHeatFlows.currentIndexChanged.connect(self.changeDisplayedHeatFlows)
+        self.comboBoxSweepOutput.currentIndexChanged.connect(self.changeDisplayedSweep)
+        self.comboBoxSweepX.currentIndexChanged.connect(self.changeDisplayedSweep)
+        self.comboBoxSweepY.currentIndexChanged.connect(self.changeDisplayedSweep)
         self.pushButtonReset.clicked.connect(self.reset)
         self.pushButtonCleanUp.clicked.connect(self.cleanup)
         self.pushButtonCompute.clicked.connect(self.compute)
+        self.comboBoxRun.currentIndexChanged.connect(self.changeDisplayedRun)
+        self.pushButtonDeleteRun.clicked.connect(self.deleteRun)
         self.pushButtonExportMeasures.clicked.connect(self.exportMeasures)
+        self.pushButtonExportResults.clicked.connect(self.exportResults)
         self.checkBoxRawData.stateChanged.connect(self.changeMeasuresState)
         self.pushButtonRefreshBins.clicked.connect(self.refreshbins)
         self.horizontalSliderBins.valueChanged.connect(self.labelUpdate)
+        #The histograms are kept by the model: moving the slider only redraws them.
+        self.horizontalSliderBins.valueChanged.connect(self.refreshbins)
+        self.checkBoxDensity.stateChanged.connect(self.refreshbins)
 
         #Enable or disable computations buttons
         self.handleComputationsButtons()
@@ -92,7 +121,6 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         self.setWidgetInfos()
         self.setInfoTab()
         self.setupCheckboxesQuantiles()
-        self.setPressureAndTemperatureTables()
         self.updateAllViews()
 
     def initialiseLayoutsRules(self):
@@ -115,9 +143,54 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
                             self.log10KVBox : (self.logk_view, default_message),
                             self.conductivityVBox : (self.conductivity_view, default_message),
                             self.porosityVBox : (self.porosity_view, default_message),
-                            self.capacityVBox : (self.capacity_view, default_message)}
+                            self.capacityVBox : (self.capacity_view, default_message),
+                            self.responseSurfaceVBox : (self.response_view, "No parameter sweep has been computed yet"),
+                            self.sensitivityIndicesVBox : (self.sensitivity_view, "No parameter sweep has been computed yet")}
         return layoutsRules
 
+    def initialiseTabLoaders(self):
+        """
+        Build a dictionnary whose keys are the tabs of this window and values are the functions which should be called to load the models displayed in this tab.
+        Tabs which don't display any model aren't in this dictionnary.
+        """
+        tabLoaders = {self.tabDataArrayAndPlots : self.loadMeasures,
+                        self.tabFluxes : self.loadFluxes,
+                        self.tabTemperature : self.coordinator.refresh_temp_map,
+                        self.tabdistribution : self.loadParamsDistr,
+                        self.tabSensitivity : self.loadSweep}
+        return tabLoaders
+
+    def invalidateTabs(self, tabs):
+        """
+        Mark the given tabs as stale, then load the current tab if it is one of them. The other tabs will be loaded when the user switches to them.
+        """
+        self.staleTabs.update(tabs)
+        self.loadCurrentTab()
+
+    def loadCurrentTab(self):
+        """
+        If the current tab is stale, ask the backend to refresh the models it displays. Otherwise, the models already hold the right data and nothing needs to be done.
+        """
+        tab = self.tabWidget.currentWidget()
+        if tab in self.staleTabs:
+            self.staleTabs.discard(tab)
+            self.tabLoaders[tab]()
+
+    def loadMeasures(self):
+        self.setPressureAndTemperatureTables()
+        self.coordinator.refresh_measures_plots(self.checkBoxRawData.isChecked())
+
+    def loadFluxes(self):
+        self.coordinator.refresh_water_flux()
+        self.coordinator.refresh_heat_fluxes()
+
+    def loadParamsDistr(self):
+        self.coordinator.refresh_params_distr(self.comboBoxSelectLayer.currentText())
+
+    def loadSweep(self):
+        self.coordinator.refresh_sweep()
+        self.setupComboBoxesSweep()
+
     def handleComputationsButtons(self):
         """
         Disable or enable the compute button if no computations were made.
@@ -138,43 +211,43 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         res = dlg.exec()
         if res == QtWidgets.QDialog.Accepted:
             pressPath, tempPath = dlg.getFilesNames()
-            pressfile = open(pressPath, 'w')
-            presswriter = csv.writer(pressfile)
-            presswriter.writerow(["Date", "Differential pressure (m)", "Temperature (°C)"])
-            tempfile = open(tempPath, 'w')
-            tempwriter = csv.writer(tempfile)
-            tempwriter.writerow(["Date", "Temperature 1 (°C)", "Temperature 2 (°C)", "Temperature 3 (°C)", "Temperature 4 (°C)"])
-
-            measures = self.coordinator.all_cleaned_measures()
-            for temprow, pressrow in measures:
-                presswriter.writerow(pressrow)
-                tempwriter.writerow(temprow)
-            pressfile.close()
-            tempfile.close()
-            print("The cleaned measures have been exported successfully.")
+            self.exportEngine.export([("CleanedPressures", pressPath), ("CleanedTemperatures", tempPath)])
+
+    def exportResults(self):
+        """
+        Export the measures and results chosen by the user. The export is done in the background.
+        """
+        dlg = DialogExport(self.samplingPoint, self.coordinator.all_quantiles(), self.coordinator.dates_range())
+        dlg.setWindowModality(QtCore.Qt.ApplicationModal)
+        res = dlg.exec()
+        if res == QtWidgets.QDialog.Accepted:
+            start, end = dlg.getDatesRange()
+            self.exportEngine.export(dlg.getTargets(), dlg.getFormat(), dlg.getQuantiles(), start, end)
+
+    def endExport(self, error : str):
+        """
+        This is called when an export is over.
+        """
+        if error:
+            displayCriticalMessage("The export failed.", error)
+        else:
+            logger.info("The export has been completed successfully.")
 
     def changeMeasuresState(self):
         """
         Refresh type of data displayed (raw or processed) when the checkbox "Show Raw Measures" changes state.
         """
-        self.setPressureAndTemperatureTables()
         self.graphpress.showVoltageLabel(self.checkBoxRawData.isChecked())
-        self.coordinator.refresh_measures_plots(self.checkBoxRawData.isChecked())
         self.linkAllViewsLayouts()
+        self.invalidateTabs([self.tabDataArrayAndPlots])
 
     def refreshbins(self):
         bins = self.horizontalSliderBins.value()
-        self.logk_view.updateBins(bins)
-        self.logk_view.onUpdate()
-
-        self.conductivity_view.updateBins(bins)
-        self.conductivity_view.onUpdate()
-
-        self.porosity_view.updateBins(bins)
-        self.porosity_view.onUpdate()
-
-        self.capacity_view.updateBins(bins)
-        self.capacity_view.onUpdate()
+        showDensity = self.checkBoxDensity.isChecked()
+        for view in [self.logk_view, self.conductivity_view, self.porosity_view, self.capacity_view]:
+            view.updateBins(bins)
+            view.updateShowDensity(showDensity)
+            view.onUpdate()
 
     def labelUpdate(self):
         self.labelBins.setText(str(self.horizontalSliderBins.value()))
@@ -206,24 +279,70 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
 
     def setupComboBoxLayers(self):
         """
-        Setup the Combo box and which will be used to display the parameters.
+        Setup the Combo box and which will be used to display the parameters. This is only called by updateAllViews, which then refreshes all the tabs.
         """
         layers = self.coordinator.layers_depths()
         for layer in layers:
             self.comboBoxSelectLayer.addItem(str(layer))
         if len(layers) > 0:
             # By default, show the parameters associated with the first layer.
-            self.changeDisplayedParams(layers[0])
+            self.changeDisplayedParams(layers[0], refresh=False)
 
-    def changeDisplayedParams(self, layer : float):
+    def changeDisplayedParams(self, layer : float, refresh : bool = True):
         """
         Display in the table view the parameters corresponding to the given layer, and update histograms.
+        If refresh is False, the histograms are not refreshed: the caller must invalidate the distribution tab itself.
         """
         self.paramsModel = self.coordinator.get_params_model(layer)
         self.tableViewParams.setModel(self.paramsModel)
         #Resize the table view so it looks pretty
         self.tableViewParams.resizeColumnsToContents()
-        self.coordinator.refresh_params_distr(layer)
+        if refresh:
+            self.invalidateTabs([self.tabdistribution])
+
+    def setupComboBoxRuns(self):
+        """
+        Fill the combobox used to choose which run is displayed, and select the run displayed by the coordinator. The tooltip of every run gives its settings and duration.
+        """
+        self.comboBoxRun.blockSignals(True)
+        self.comboBoxRun.clear()
+        for i, run in enumerate(self.coordinator.all_runs()):
+            text = f"{i+1}. {run['Type']}"
+            if run["Start"] is not None:
+                text += f" ({run['Start']})"
+            if run["RMSE"] is not None:
+                text += f", RMSE: {run['RMSE']:.2f} °C"
+            tooltip = [run["Settings"]] if run["Settings"] is not None else []
+            if run["Duration"] is not None:
+                tooltip.append(f"Duration: {run['Duration']:.1f} s")
+            self.comboBoxRun.addItem(text, run["ID"])
+            self.comboBoxRun.setItemData(i, "\n".join(tooltip), QtCore.Qt.ToolTipRole)
+        self.comboBoxRun.setCurrentIndex(self.comboBoxRun.findData(self.coordinator.runID))
+        self.comboBoxRun.blockSignals(False)
+        self.pushButtonDeleteRun.setEnabled(self.comboBoxRun.count() > 0)
+
+    def changeDisplayedRun(self):
+        """
+        This is called when the user chooses which run should be displayed. The results of the runs which were already displayed are read from the cache.
+        """
+        self.coordinator.set_run(self.comboBoxRun.currentData())
+        self.updateAllViews()
+
+    def deleteRun(self):
+        """
+        Delete the results of the run currently displayed, then display the last remaining run.
+        """
+        runID = self.comboBoxRun.currentData()
+        if runID is None:
+            return
+        if self.computeEngine.is_running():
+            logger.warning("Please wait for the computation to end before deleting a run")
+            return
+        dlg = DialogConfirm("Are you sure you want to delete the results of this run? This cannot be undone.")
+        res = dlg.exec()
+        if res == QtWidgets.QDialog.Accepted:
+            self.coordinator.delete_run(runID)
+            self.updateAllViews()
 
     def setupCheckboxesQuantiles(self):
         """
@@ -242,6 +361,14 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
             self.quantilesLayout.addWidget(quantile_checkbox,i,0)
             self.quantilesLayout.addWidget(QtWidgets.QLabel(f"RMSE: {rmse:.2f} °C "),i,1)
             i +=1
+        mcmc_run = self.coordinator.mcmc_run()
+        if mcmc_run is not None:
+            text = f"MCMC: {mcmc_run['Iterations']}/{mcmc_run['MaxIterations']} iterations"
+            if mcmc_run["Converged"]:
+                text += " (converged)"
+            label = QtWidgets.QLabel(text)
+            label.setToolTip("\n".join(f"{name}: {value:.3g}" if isinstance(value, float) else f"{name}: {value}" for name, value in [("Effective sample size", mcmc_run["ESS"]), ("R-hat", mcmc_run["RHat"]), ("Geweke |z|", mcmc_run["Geweke"]), ("Acceptance rate", mcmc_run["AcceptanceRate"]), ("Stored states", mcmc_run["StoredSamples"])] if value is not None))
+            self.quantilesLayout.addWidget(label,i,0,1,2)
 
         #Display the RMSE for each thermometer or 0 if it has not been computed yet (ie select_RMSE_therm has only None values)
         self.labelRMSETherm1.setText(f"RMSE: {thermRMSE[0] if thermRMSE[0] else 0:.2f} °C")
@@ -265,6 +392,60 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
                 continue
             self.quantilesLayout.itemAt(i).widget().setParent(None)
 
+    def setupComboBoxHeatFlows(self):
+        """
+        Fill the combobox used to choose which heat flows are displayed: the direct model, or one of the bands computed by the ensemble engine.
+        """
+        self.comboBoxHeatFlows.blockSignals(True)
+        self.comboBoxHeatFlows.clear()
+        self.comboBoxHeatFlows.addItem("Direct model", 0)
+        for quantile in self.coordinator.ensemble_quantiles():
+            self.comboBoxHeatFlows.addItem(f"Ensemble quantile {quantile}", quantile)
+        self.comboBoxHeatFlows.blockSignals(False)
+        self.changeDisplayedHeatFlows()
+
+    def changeDisplayedHeatFlows(self):
+        """
+        This is called when the user chooses which heat flows should be displayed.
+        """
+        quantile = self.comboBoxHeatFlows.currentData()
+        for view in [self.advective_view, self.conductive_view, self.totalflux_view]:
+            view.updateOptions(quantile if quantile is not None else 0)
+            view.onUpdate()
+
+    def setupComboBoxesSweep(self):
+        """
+        Fill the comboboxes used to choose the output and the parameters displayed in the response surface. The comboboxes keep their choice if it is still available.
+        """
+        model = self.coordinator.get_sweep_model()
+        parameters = model.get_parameters()
+        choices = [(self.comboBoxSweepOutput, ANALYSED_OUTPUTS + [output for output in OUTPUTS if output not in ANALYSED_OUTPUTS]),
+                   (self.comboBoxSweepX, parameters),
+                   (self.comboBoxSweepY, ["None"] + parameters)]
+        for comboBox, items in choices:
+            current = comboBox.currentText()
+            comboBox.blockSignals(True)
+            comboBox.clear()
+            comboBox.addItems(items)
+            if current in items:
+                comboBox.setCurrentText(current)
+            elif comboBox is self.comboBoxSweepY and len(parameters) > 1:
+                comboBox.setCurrentText(parameters[1])
+            comboBox.blockSignals(False)
+        self.changeDisplayedSweep()
+
+    def changeDisplayedSweep(self):
+        """
+        This is called when the user chooses the output or the parameters of the parameter sweep which should be displayed.
+        """
+        output = self.comboBoxSweepOutput.currentText()
+        y = self.comboBoxSweepY.currentText()
+        self.response_view.updateOptions([output, self.comboBoxSweepX.currentText(), None if y == "None" else y])
+        self.response_view.onUpdate()
+        #Sensitivity indices are only computed for some outputs.
+        self.sensitivity_view.updateOptions(output if output in ANALYSED_OUTPUTS else ANALYSED_OUTPUTS[0])
+        self.sensitivity_view.onUpdate()
+
     def refreshTempDepthView(self):
         """
         This method is called when a checkbox showing a quantile or a radio buttion is changed. New curves should be plotted in the Temperature per Depth View.
@@ -304,24 +485,25 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         #Resize the table view so it looks pretty
         self.tableViewDataArray.resizeColumnsToContents()
         width = self.tableViewDataArray.verticalHeader().width()
-        for i in range(self.tableViewDataArray.model().rowCount()):
+        for i in range(self.tableViewDataArray.model().columnCount()):
             width += self.tableViewDataArray.columnWidth(i)
         width +=20 #Approximate width of the splitter bar
         self.tableViewDataArray.setFixedWidth(width)
 
     def updateAllViews(self):
         """
-        Update all the views displaying results by asking the backend to refresh the models.
+        Update all the views displaying results. Only the models displayed in the current tab are refreshed right away: the other ones are refreshed when their tab becomes visible.
         """
+        self.setupComboBoxRuns()
         self.comboBoxSelectLayer.clear()
         self.setupComboBoxLayers()
-        self.setPressureAndTemperatureTables()
         self.setupCheckboxesQuantiles()
         self.refreshTempDepthView()
+        self.setupComboBoxHeatFlows()
 
         self.linkAllViewsLayouts()
 
-        self.coordinator.refresh_all_models(self.checkBoxRawData.isChecked(), self.comboBoxSelectLayer.currentText())
+        self.invalidateTabs(self.tabLoaders.keys())
 
     def linkAllViewsLayouts(self):
         """
@@ -335,7 +517,8 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         MCMC_layouts = [self.log10KVBox, self.conductivityVBox, self.porosityVBox, self.capacityVBox]
         direct_model_layouts = [self.waterFluxVBox, self.advectiveFluxVBox, self.totalFluxVBox, self.conductiveFluxVBox, self.topRightVLayout, self.botLeftVLayout, self.botRightVLayout]
         cleaned_measures_layouts = [self.pressVBox, self.tempVBox]
-        all_layouts =  cleaned_measures_layouts + direct_model_layouts + MCMC_layouts
+        sweep_layouts = [self.responseSurfaceVBox, self.sensitivityIndicesVBox]
+        all_layouts =  cleaned_measures_layouts + direct_model_layouts + MCMC_layouts + sweep_layouts
         compute_type = self.coordinator.computation_type()
 
         if (compute_type == ComputationsState.RAW_MEASURES) and (not self.checkBoxRawData.isChecked()):
@@ -350,7 +533,16 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
             filled_layouts = cleaned_measures_layouts + direct_model_layouts
         elif compute_type == ComputationsState.MCMC:
             empty_layouts =[]
-            filled_layouts = all_layouts
+            filled_layouts = cleaned_measures_layouts + direct_model_layouts + MCMC_layouts
+        #The analytical water flows don't need the direct model.
+        if self.waterFluxVBox in empty_layouts and len(self.coordinator.analytical_methods()) > 0:
+            empty_layouts = [layout for layout in empty_layouts if layout is not self.waterFluxVBox]
+            filled_layouts = filled_layouts + [self.waterFluxVBox]
+        #A parameter sweep doesn't depend on the other computations.
+        if self.coordinator.sweep_size() > 0:
+            filled_layouts = filled_layouts + sweep_layouts
+        else:
+            empty_layouts = empty_layouts + sweep_layouts
 
         #Clear all layouts
         for layout in all_layouts:
@@ -397,11 +589,25 @@ class SamplingPointViewer(QtWidgets.QWidget, From_SamplingPointViewer):
         dlg = DialogCompute(self.coordinator.max_depth())
         res = dlg.exec()
         if res == QtWidgets.QDialog.Accepted:
-            self.coordinator.delete_computations()
-            if dlg.computationIsMCMC():
+            if dlg.computationIsSweep():
+                #Parameter sweep: the previous computations are kept, only the previous sweep is replaced.
+                self.computeEngine.compute_sweep(*dlg.getInputSweep())
+                return
+            if dlg.computationIsAnalytical():
+                #Analytical estimation of the water flow: it is saved in a new run, as the other computations.
+                self.computeEngine.compute_analytical(*dlg.getInputAnalytical())
+                return
+            #The computation is saved in a new run: the previous runs are kept. The MCMC is warm-started from the run currently displayed.
+            previous = self.computeEngine.stored_parameters(self.coordinator.runID) if dlg.computationIsWarmStarted() else None
+            if dlg.computationIsOptimiser():
+                #Optimiser, then direct model with the best parameters
+                self.computeEngine.compute_optimiser(*dlg.getInputOptimiser())
+            elif dlg.computationIsMCMC():
                 #MCMC
                 nb_iter, all_priors, nb_cells, quantiles = dlg.getInputMCMC()
-                self.computeEngine.compute_MCMC(nb_iter, all_priors, nb_cells, quantiles)
+                ensemble_size, nb_workers = dlg.getInputEnsemble()
+                targets, check_every = dlg.getInputConvergence()
+                self.computeEngine.compute_MCMC(nb_iter, all_priors, nb_cells, quantiles, ensemble_size, nb_workers, previous, targets, check_every, dlg.getInputStorage())
             else:
                 #Direct Model
                 params, nb_cells = dlg.getInputDirectModel()
@@ -0,0 +1,34 @@
+from PyQt5 import QtWidgets
+
+from ..backend.StudySummary import StudySummary
+from ..utils.get_files import get_ui_class
+
+From_StudyDashboard = get_ui_class("StudyDashboard.ui")
+
+class StudyDashboard(QtWidgets.QWidget, From_StudyDashboard):
+    """
+    A widget displaying the summary of all the sampling points of a study in a table (one row per point).
+    The summaries are precomputed every time the results of a point change, so this widget doesn't need to open the points.
+    """
+    def __init__(self, studySummary : StudySummary):
+        # Call constructor of parent classes
+        super(StudyDashboard, self).__init__()
+        QtWidgets.QWidget.__init__(self)
+        self.setupUi(self)
+
+        self.studySummary = studySummary
+        self.labelStudy.setText(f"Summary of the points in the study {self.studySummary.studyName}")
+        self.setWindowTitle(f"Study Dashboard: {self.studySummary.studyName}")
+        self.tableViewSummary.setModel(self.studySummary.get_summary_model())
+        self.tableViewSummary.setWordWrap(True)
+
+        self.pushButtonRefresh.clicked.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Read the summaries again from the database.
+        """
+        self.studySummary.refresh_summary()
+        self.tableViewSummary.resizeColumnsToContents()
+        self.tableViewSummary.resizeRowsToContents()
@@ -4,7 +4,8 @@ from ..utils.general import convertDates
 
 from ..backend.SamplingPointManager import SamplingPointManager
 from ..backend.SPointCoordinator import SPointCoordinator
-from .SamplingPointViewer import SamplingPointViewer
+from ..backend.StudySummary import StudySummary
+from .StudyDashboard import StudyDashboard
 
 class StudyHandler:
     """
@@ -13,6 +14,7 @@ class StudyHandler:
         -open and close a study
         -call the backend to add or remove sampling points (SamplingPointManager)
         -open subwindows showing the results and computations related to sampling points in this study.
+        -open a subwindow showing the summary of all sampling points in this study.
     An instance of this class is always linked to a study.
     """
     def __init__(self, con : QSqlDatabase, studyName : str):
@@ -69,12 +71,20 @@ class StudyHandler:
         Open the sampling point with the name spointName.
         Return a viewer instance which can be added to a subwindow like a widget.
         """
+        #The viewer is imported when the first point is opened, as it imports matplotlib and pyheatmy which are slow to import.
+        from .SamplingPointViewer import SamplingPointViewer
         self.spointCoordinator = SPointCoordinator(self.con, self.studyName, spointName)
         samplingPoint = self.spointManager.get_spoint(spointName)
         self.spointViewer = SamplingPointViewer(self.spointCoordinator, samplingPoint)
         self.spointViewer.setWindowTitle(self.studyName)
         return self.spointViewer
 
+    def openDashboard(self):
+        """
+        Return a widget displaying the summary of all the sampling points in this study, which can be added to a subwindow.
+        """
+        return StudyDashboard(StudySummary(self.con, self.studyName))
+
     def close(self):
         """
         Close all subwindows and related processes.
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.figure import Figure
@@ -7,6 +8,8 @@ from matplotlib.widgets import RectangleSelector
 
 import matplotlib.dates as mdates
 
+from ..utils.decimation import MinMaxPyramid
+
 
 def createEmptyDf():
         """
@@ -29,6 +32,7 @@ class CompareCanvas(FigureCanvasQTAgg):
         - the reference data is the background, which correponds to the raw data
         - the cleaned data is immutable, and corresponds to the pre-processing using outliers methods. It cannot be changed
         - the selected data, which is a subset of the elements in reference_data no in cleaned data.
+    Each of these three sets is decimated (see MinMaxPyramid) so that only the visible range is drawn, with about two points per pixel.
     """
     def __init__(self, reference_data : pd.DataFrame):
         self.fig = Figure()
@@ -37,6 +41,7 @@ class CompareCanvas(FigureCanvasQTAgg):
         self.reference_data = reference_data
         self.cleaned_data = createEmptyDf()
         self.selected_data = createEmptyDf()
+        self.pyramids = [] #List of tuples (MinMaxPyramid, matplotlib collection)
 
     def setReferenceData(self, data):
         """
@@ -69,25 +74,58 @@ class CompareCanvas(FigureCanvasQTAgg):
         # - All \ ({cleaned} u {selected_points})
         # The goal is to make merges on the dataframes to reflect these changes. BUT, it's not simple because of the Timestamps. I hate pandas!
 
+        self.pyramids = []
         # {cleaned}
-        self.cleaned_data.plot.scatter(x ="Date", y = field, c = '#FF6D6D', s = 1, ax = self.axes)
+        self.scatterDecimated(self.cleaned_data, field, '#FF6D6D')
 
         # {selected_points} \ {cleaned}
         modified_u_selected = self.cleaned_data.merge(self.selected_data, on=["Date", "Temp1","Temp2", "Temp3", "Temp4", "TempBed", "Pressure"], how = 'outer', indicator = True)
         selected_only = modified_u_selected[modified_u_selected["_merge"] == 'right_only']
 
-        selected_only.plot.scatter(x ="Date", y = field, c = '#E52EA8', s = 1, ax = self.axes)
+        self.scatterDecimated(selected_only, field, '#E52EA8')
 
         # All \ ({cleaned} u {selected_points})
         modified_u_selected.drop(labels="_merge", axis = 1, inplace = True)
         all_but_modified_and_selected = self.reference_data.merge(modified_u_selected, on=["Date", "Temp1","Temp2", "Temp3", "Temp4", "TempBed", "Pressure"], how = 'left', indicator = True)
         untouched = all_but_modified_and_selected[all_but_modified_and_selected["_merge"] == "left_only"]
 
-        untouched.plot.scatter(x ="Date", y = field, c = 'b', s = 1, ax = self.axes)
+        self.scatterDecimated(untouched, field, 'b')
 
+        self.axes.set_xlabel("Date")
+        self.axes.set_ylabel(field)
         self.format_xaxis()
+        #Clearing the axes also clears their callbacks, so this must be done every time the data is plotted.
+        self.axes.callbacks.connect("xlim_changed", self.onXlimChanged)
         self.fig.canvas.draw()
 
+    def scatterDecimated(self, df : pd.DataFrame, field : str, color : str):
+        """
+        Build a min/max pyramid for the given field of the dataframe, then scatter the decimated points.
+        """
+        x = mdates.date2num(df["Date"].to_numpy())
+        y = df[field].to_numpy(dtype=np.float64)
+        order = np.argsort(x, kind="stable") #The merges may not preserve the order of the dates.
+        pyramid = MinMaxPyramid(x[order], y[order])
+        x, y = pyramid.decimate(nb_pixels=self.widthInPixels())
+        collection = self.axes.scatter(x, y, c=color, s=1)
+        self.pyramids.append((pyramid, collection))
+
+    def widthInPixels(self):
+        """
+        Return the width of the axes on the screen, in pixels.
+        """
+        return int(self.axes.get_window_extent().width)
+
+    def onXlimChanged(self, axes):
+        """
+        This is called by matplotlib when the user zooms or pans: decimate the visible range again.
+        """
+        xmin, xmax = axes.get_xlim()
+        nb_pixels = self.widthInPixels()
+        for pyramid, collection in self.pyramids:
+            x, y = pyramid.decimate(xmin, xmax, nb_pixels)
+            collection.set_offsets(np.column_stack((x, y)))
+
     def format_xaxis(self):
         formatter = mdates.DateFormatter("%y/%m/%d %H:%M")
         self.axes.xaxis.set_major_formatter(formatter)
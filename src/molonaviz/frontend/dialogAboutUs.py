@@ -1,8 +1,8 @@
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 from PyQt5.QtGui import QPixmap
-from ..utils.get_files import get_ui_asset, get_imgs
+from ..utils.get_files import get_imgs, get_ui_class
 
-From_DialogAboutUs = uic.loadUiType(get_ui_asset("dialogAboutUs.ui"))[0]
+From_DialogAboutUs = get_ui_class("dialogAboutUs.ui")
 
 class DialogAboutUs(QtWidgets.QDialog,From_DialogAboutUs):
     """
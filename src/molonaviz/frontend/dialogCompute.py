@@ -1,10 +1,11 @@
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets, QtCore
 from math import log10
 from PyQt5.QtWidgets import QTableWidgetItem
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
+from ..backend.Sweep import PARAMETERS, INDEX_NAMES
 
 
-From_DialogCompute = uic.loadUiType(get_ui_asset("dialogCompute.ui"))[0]
+From_DialogCompute = get_ui_class("dialogCompute.ui")
 
 class DialogCompute(QtWidgets.QDialog, From_DialogCompute):
     def __init__(self, maxdepth : int):
@@ -17,6 +18,8 @@ class DialogCompute(QtWidgets.QDialog, From_DialogCompute):
         self.setupUi(self)
 
         self.defaultValues = {"Perm": 1e-5, "Poro": 0.15, "ThConduct": 3.4, "ThCap": 5e6} #Default values displayed for the layers
+        #Default ranges displayed for the parameter sweep (min, max, number of values): the permeability is given as -log10(K), as for the MCMC.
+        self.defaultRanges = {"Permeability": ("3", "9", "5"), "Porosity": ("0.01", "0.25", "5"), "ThermConduct": ("1", "5", "5"), "HeatCapacity": ("1e6", "1e7", "5")}
         self.maxdepth = maxdepth * 100
 
         #Prevent the user from writing something in the spin box.
@@ -28,7 +31,19 @@ class DialogCompute(QtWidgets.QDialog, From_DialogCompute):
         self.pushButtonRestoreDefault.clicked.connect(self.setDefaultValues)
         self.pushButtonRun.clicked.connect(self.run)
 
-        self.groupBoxMCMC.setChecked(False)
+        #The MCMC, the parameter sweep and the analytical estimation can't be launched at the same time: checking one of them unchecks the others.
+        self.exclusiveGroupBoxes = [self.groupBoxMCMC, self.groupBoxSweep, self.groupBoxAnalytical]
+        for groupBox in self.exclusiveGroupBoxes:
+            groupBox.setChecked(False)
+            groupBox.toggled.connect(lambda checked, groupBox=groupBox: checked and self.uncheckOthers(groupBox))
+        #The optimiser doesn't give a parameters distribution: the uncertainty can't be propagated.
+        self.groupBoxOptimiser.toggled.connect(lambda checked: checked and self.groupBoxEnsemble.setChecked(False))
+        self.groupBoxEnsemble.toggled.connect(lambda checked: checked and self.groupBoxOptimiser.setChecked(False))
+        self.comboBoxSweepDesign.addItems(list(INDEX_NAMES.keys()))
+        self.tableWidgetSweep.setRowCount(len(PARAMETERS))
+        self.tableWidgetSweep.setVerticalHeaderLabels(["-log10(K)", "Porosity", "Thermal conductivity", "Heat capacity"])
+        for shallow, deep in [(1, 2), (2, 3), (3, 4), (1, 3)]:
+            self.comboBoxAnalyticalSensors.addItem(f"{shallow} and {deep}", (shallow, deep))
 
         self.setDefaultValues()
 
@@ -59,6 +74,45 @@ class DialogCompute(QtWidgets.QDialog, From_DialogCompute):
         self.lineEditThermalCapacitySigma.setText("100")
 
         self.lineEditQuantiles.setText("0.05,0.5,0.95")
+        self.checkBoxWarmStart.setChecked(False)
+        self.groupBoxConvergence.setChecked(False)
+        self.spinBoxConvergenceESS.setValue(400)
+        self.doubleSpinBoxConvergenceRHat.setValue(1.05)
+        self.doubleSpinBoxConvergenceGeweke.setValue(2.0)
+        self.spinBoxConvergenceCheck.setValue(100)
+        self.spinBoxStorageBurnIn.setValue(10)
+        self.spinBoxStorageThinning.setValue(1)
+        self.spinBoxStorageMaxSamples.setValue(5000)
+        self.groupBoxEnsemble.setChecked(False)
+        self.spinBoxEnsembleSize.setValue(200)
+        self.spinBoxEnsembleWorkers.setValue(0)
+        self.groupBoxOptimiser.setChecked(False)
+        self.spinBoxOptimiserRestarts.setValue(8)
+        self.spinBoxOptimiserEvaluations.setValue(300)
+        self.spinBoxOptimiserWorkers.setValue(0)
+
+        #Parameter sweep. The checkbox in the first column tells if the parameter is swept.
+        self.comboBoxSweepDesign.setCurrentIndex(0)
+        self.spinBoxSweepSamples.setValue(16)
+        self.spinBoxSweepWorkers.setValue(0)
+        for i, parameter in enumerate(PARAMETERS):
+            for j, value in enumerate(self.defaultRanges[parameter]):
+                self.tableWidgetSweep.setItem(i, j, QTableWidgetItem(value))
+            self.tableWidgetSweep.item(i, 0).setFlags(self.tableWidgetSweep.item(i, 0).flags() | QtCore.Qt.ItemIsUserCheckable)
+            self.tableWidgetSweep.item(i, 0).setCheckState(QtCore.Qt.Checked if i < 2 else QtCore.Qt.Unchecked)
+        self.tableWidgetSweep.resizeColumnsToContents()
+
+        #Analytical estimation
+        self.comboBoxAnalyticalSensors.setCurrentIndex(0)
+        self.spinBoxAnalyticalWindow.setValue(1)
+
+    def uncheckOthers(self, groupBox : QtWidgets.QGroupBox):
+        """
+        Uncheck the computations which can't be launched with the one of the given group box.
+        """
+        for other in self.exclusiveGroupBoxes:
+            if other is not groupBox:
+                other.setChecked(False)
 
     def updateNBLayers(self, nb_layers : int):
         """
@@ -88,6 +142,30 @@ class DialogCompute(QtWidgets.QDialog, From_DialogCompute):
         """
         return self.groupBoxMCMC.isChecked()
 
+    def computationIsOptimiser(self):
+        """
+        Return True if the user wishes to search the best parameters with the optimiser instead of the MCMC.
+        """
+        return self.groupBoxMCMC.isChecked() and self.groupBoxOptimiser.isChecked()
+
+    def computationIsWarmStarted(self):
+        """
+        Return True if the MCMC should start from the results of the run currently displayed rather than from the priors.
+        """
+        return self.computationIsMCMC() and self.checkBoxWarmStart.isChecked()
+
+    def computationIsAnalytical(self):
+        """
+        Return True if the user wishes to estimate the water flow with the analytical flux engine instead of the direct model.
+        """
+        return self.groupBoxAnalytical.isChecked()
+
+    def computationIsSweep(self):
+        """
+        Return True if the user wishes to compute a parameter sweep instead of the direct model.
+        """
+        return self.groupBoxSweep.isChecked()
+
     def getInputDirectModel(self):
         """
         Return the values entered by the user for direct model computations as a list of list and the number of cells. The list of list corresponds to the parameters for each layer.
@@ -155,3 +233,64 @@ class DialogCompute(QtWidgets.QDialog, From_DialogCompute):
         quantiles = [float(quantile) for quantile in quantiles]
 
         return nb_iter, all_priors, nb_cells, quantiles
+
+    def getInputOptimiser(self):
+        """
+        Return the values entered by the user for the optimiser, in the order expected by Compute.compute_optimiser: the parameters of the layers (see getInputDirectModel), the ranges of the four parameters given for the MCMC, the number of restarts, the number of cells, the maximum number of direct models per restart and the number of processes (None for one per processor).
+        """
+        layers, nb_cells = self.getInputDirectModel()
+        bounds = [(float(self.lineEditKMin.text()), float(self.lineEditKMax.text())),
+                  (float(self.lineEditPorosityMin.text()), float(self.lineEditPorosityMax.text())),
+                  (float(self.lineEditThermalConductivityMin.text()), float(self.lineEditThermalConductivityMax.text())),
+                  (float(self.lineEditThermalCapacityMin.text()), float(self.lineEditThermalCapacityMax.text()))]
+        nb_workers = self.spinBoxOptimiserWorkers.value()
+        return layers, bounds, self.spinBoxOptimiserRestarts.value(), nb_cells, self.spinBoxOptimiserEvaluations.value(), nb_workers if nb_workers > 0 else None
+
+    def getInputEnsemble(self):
+        """
+        Return the number of parameter sets which should be drawn from the parameters distribution after the MCMC, and the number of processes used to run them (None for one per processor).
+        If the user doesn't want the uncertainty to be propagated to the flows, return 0, None.
+        """
+        if not self.groupBoxEnsemble.isChecked():
+            return 0, None
+        nb_workers = self.spinBoxEnsembleWorkers.value()
+        return self.spinBoxEnsembleSize.value(), nb_workers if nb_workers > 0 else None
+
+    def getInputConvergence(self):
+        """
+        Return the targets the MCMC must reach to stop before the maximal number of iterations (a dictionnary with the keys "ESS", "RHat" and "Geweke"), and the number of iterations between two checks of the convergence.
+        If the user doesn't want the MCMC to stop early, return None, 0.
+        """
+        if not self.groupBoxConvergence.isChecked():
+            return None, 0
+        targets = {"ESS" : self.spinBoxConvergenceESS.value(),
+                   "RHat" : self.doubleSpinBoxConvergenceRHat.value(),
+                   "Geweke" : self.doubleSpinBoxConvergenceGeweke.value()}
+        return targets, self.spinBoxConvergenceCheck.value()
+
+    def getInputStorage(self):
+        """
+        Return how the parameters distribution given by the MCMC should be compacted before it is stored: the fraction of the iterations removed as burn-in, the thinning and the maximal number of states (None if they should all be kept).
+        """
+        max_samples = self.spinBoxStorageMaxSamples.value()
+        return self.spinBoxStorageBurnIn.value()/100, self.spinBoxStorageThinning.value(), max_samples if max_samples > 0 else None
+
+    def getInputSweep(self):
+        """
+        Return the values entered by the user for a parameter sweep, in the order expected by Compute.compute_sweep: the parameters of the layers (see getInputDirectModel), the design, the ranges of the swept parameters, the number of samples, the number of cells and the number of processes (None for one per processor).
+        """
+        layers, nb_cells = self.getInputDirectModel()
+        ranges = {}
+        for i, parameter in enumerate(PARAMETERS):
+            if self.tableWidgetSweep.item(i, 0).checkState() == QtCore.Qt.Checked:
+                ranges[parameter] = (float(self.tableWidgetSweep.item(i, 0).text()), float(self.tableWidgetSweep.item(i, 1).text()), int(self.tableWidgetSweep.item(i, 2).text()))
+        nb_workers = self.spinBoxSweepWorkers.value()
+        return layers, self.comboBoxSweepDesign.currentText(), ranges, self.spinBoxSweepSamples.value(), nb_cells, nb_workers if nb_workers > 0 else None
+
+    def getInputAnalytical(self):
+        """
+        Return the values entered by the user for the analytical estimation of the water flow, in the order expected by Compute.compute_analytical: the numbers of the two thermometers, the porosity, thermal conductivity and heat capacity of the first layer, and the number of days of the fitting window.
+        """
+        layers, _ = self.getInputDirectModel()
+        _, _, _, porosity, conductivity, capacity = layers[0]
+        return self.comboBoxAnalyticalSensors.currentData(), porosity, conductivity, capacity, self.spinBoxAnalyticalWindow.value()
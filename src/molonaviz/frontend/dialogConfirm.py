@@ -1,7 +1,7 @@
-from PyQt5 import QtWidgets, uic
-from ..utils.get_files import get_ui_asset
+from PyQt5 import QtWidgets
+from ..utils.get_files import get_ui_class
 
-From_DialogConfirm = uic.loadUiType(get_ui_asset("dialogConfirm.ui"))[0]
+From_DialogConfirm = get_ui_class("dialogConfirm.ui")
 
 class DialogConfirm(QtWidgets.QDialog,From_DialogConfirm):
     """
@@ -1,7 +1,7 @@
-from PyQt5 import QtWidgets, uic
-from ..utils.get_files import get_ui_asset
+from PyQt5 import QtWidgets
+from ..utils.get_files import get_ui_class
 
-From_DialogCreateStudy = uic.loadUiType(get_ui_asset("dialogCreateStudy.ui"))[0]
+From_DialogCreateStudy = get_ui_class("dialogCreateStudy.ui")
 class DialogCreateStudy(QtWidgets.QDialog,From_DialogCreateStudy):
     """
     Enable the user to pick a laboratory and the name of the study being created.
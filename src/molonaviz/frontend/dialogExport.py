@@ -0,0 +1,109 @@
+import os
+from importlib.util import find_spec
+from PyQt5 import QtWidgets, QtCore
+from ..utils.general import displayCriticalMessage, datetimeToDatabaseDate
+from ..interactions.Containers import SamplingPoint
+from ..backend.Export import EXPORT_FORMATS
+from ..utils.get_files import get_ui_class
+
+From_DialogExport = get_ui_class("dialogExport.ui")
+class DialogExport(QtWidgets.QDialog,From_DialogExport):
+    """
+    Enable the user to choose which measures and results should be exported, in which format and where.
+    """
+    #The datasets the user can export, with the name of the associated file (the name of the point is added at the end).
+    DATASETS = {"Cleaned measures" : ("CleanedMeasures", "cleanedMeasures"),
+                "Solved temperatures" : ("Temperatures", "temperatures"),
+                "Heat flows" : ("HeatFlows", "heatFlows"),
+                "Water flows" : ("WaterFlows", "waterFlows"),
+                "Parameters distribution" : ("ParametersDistribution", "parametersDistribution")}
+    #Python modules required by the formats.
+    FORMATS_MODULES = {"CSV" : None, "Parquet" : "pyarrow", "HDF5" : "h5py"}
+
+    def __init__(self, spoint : SamplingPoint, quantiles : list[float], dates_range : tuple):
+        super(From_DialogExport, self).__init__()
+        QtWidgets.QDialog.__init__(self)
+        self.setupUi(self)
+        self.spoint = spoint
+
+        for export_format in EXPORT_FORMATS:
+            module = self.FORMATS_MODULES[export_format]
+            if module is None or find_spec(module) is not None:
+                self.comboBoxFormat.addItem(export_format)
+
+        for name in self.DATASETS:
+            item = QtWidgets.QListWidgetItem(name)
+            item.setCheckState(QtCore.Qt.Checked)
+            self.listWidgetDatasets.addItem(item)
+
+        for quantile in quantiles:
+            item = QtWidgets.QListWidgetItem(str(quantile))
+            item.setData(QtCore.Qt.UserRole, quantile)
+            item.setCheckState(QtCore.Qt.Checked)
+            self.listWidgetQuantiles.addItem(item)
+
+        start, end = dates_range
+        if start is not None:
+            self.dateTimeEditStart.setDateTime(QtCore.QDateTime(start))
+            self.dateTimeEditEnd.setDateTime(QtCore.QDateTime(end))
+
+        self.pushButtonBrowse.clicked.connect(self.browseDir)
+
+    def accept(self):
+        """
+        This is an overloaded function, called when the user presses the "OK" button.
+        Make sure the directory given by the user is valid and that there is something to export.
+        """
+        if not os.path.isdir(self.lineEditExportDir.text()):
+            displayCriticalMessage("This directory does not exist. Please select another one.")
+            return
+        if len(self.getTargets()) == 0:
+            displayCriticalMessage("Please select the data to export.")
+            return
+        if self.dateTimeEditStart.dateTime() > self.dateTimeEditEnd.dateTime():
+            displayCriticalMessage("The first date must be before the last date.")
+            return
+        super().accept()
+
+    def browseDir(self):
+        """
+        Display a dialog so that the user may choose the target directory
+        """
+        fileDir = QtWidgets.QFileDialog.getExistingDirectory(self, "Select target directory")
+        if fileDir:
+            self.lineEditExportDir.setText(fileDir)
+
+    def getFormat(self):
+        return self.comboBoxFormat.currentText()
+
+    def getTargets(self):
+        """
+        Return a list of tuples (dataset, path) for all the datasets which should be exported.
+        """
+        extension = EXPORT_FORMATS[self.getFormat()]
+        targets = []
+        for i in range(self.listWidgetDatasets.count()):
+            item = self.listWidgetDatasets.item(i)
+            if item.checkState() == QtCore.Qt.Checked:
+                dataset, fileName = self.DATASETS[item.text()]
+                targets.append((dataset, os.path.join(self.lineEditExportDir.text(), f"{fileName}{self.spoint.name}{extension}")))
+        return targets
+
+    def getQuantiles(self):
+        """
+        Return the list of the quantiles which should be exported.
+        """
+        quantiles = []
+        for i in range(self.listWidgetQuantiles.count()):
+            item = self.listWidgetQuantiles.item(i)
+            if item.checkState() == QtCore.Qt.Checked:
+                quantiles.append(item.data(QtCore.Qt.UserRole))
+        return quantiles
+
+    def getDatesRange(self):
+        """
+        Return the first and last dates which should be exported in the database format, or None, None if all dates should be exported.
+        """
+        if not self.groupBoxDates.isChecked():
+            return None, None
+        return datetimeToDatabaseDate(self.dateTimeEditStart.dateTime().toPyDateTime()), datetimeToDatabaseDate(self.dateTimeEditEnd.dateTime().toPyDateTime())
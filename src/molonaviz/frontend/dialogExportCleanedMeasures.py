@@ -1,10 +1,10 @@
 import os
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 from ..utils.general import displayCriticalMessage
 from ..interactions.Containers import SamplingPoint
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
 
-From_DialogExportCleanedMeasures = uic.loadUiType(get_ui_asset("dialogExportCleanedMeasures.ui"))[0]
+From_DialogExportCleanedMeasures = get_ui_class("dialogExportCleanedMeasures.ui")
 class DialogExportCleanedMeasures(QtWidgets.QDialog,From_DialogExportCleanedMeasures):
     """
     Enable the user to pick the path to the directory where the cleaned measures (two .csv files) will be saved.
@@ -1,9 +1,9 @@
 import os
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 from ..utils.general import displayCriticalMessage
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
 
-From_DialogImportLab = uic.loadUiType(get_ui_asset("dialogImportLab.ui"))[0]
+From_DialogImportLab = get_ui_class("dialogImportLab.ui")
 class DialogImportLab(QtWidgets.QDialog,From_DialogImportLab):
     """
     Enable the user to pick the path to the directory required for the creation of a laboratory in the database.
@@ -1,15 +1,18 @@
+import logging
 import os
 import re #Regular expression, to check if a pattern is in a string.
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 import pandas as pd
 from numpy import float64
 from ..utils.general import displayCriticalMessage
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
 
 from .StudyHandler import StudyHandler
 from .LabHandler import LabHandler
 
-From_DialogImportSPoint = uic.loadUiType(get_ui_asset("dialogImportSPoint.ui"))[0]
+logger = logging.getLogger(__name__)
+
+From_DialogImportSPoint = get_ui_class("dialogImportSPoint.ui")
 
 class DialogImportSPoint(QtWidgets.QDialog, From_DialogImportSPoint):
     """
@@ -203,13 +206,13 @@ class DialogImportSPoint(QtWidgets.QDialog, From_DialogImportSPoint):
         try:
             df = pd.read_csv(filePath)
             if df.shape[1] != 3 : # Date + Voltage + Temperature
-                print(f"The number of columns in pressure file {os.path.basename(filePath)} doesn't match. This file will be ignored.")
+                logger.warning(f"The number of columns in pressure file {os.path.basename(filePath)} doesn't match. This file will be ignored.")
                 return False
             if df.dtypes[1]!=float64 or df.dtypes[2]!=float64: #Voltage and Temperature must be floats
-                print(f"The Voltage and Temperature columns are not floats in file {os.path.basename(filePath)}. This file will be ignored.")
+                logger.warning(f"The Voltage and Temperature columns are not floats in file {os.path.basename(filePath)}. This file will be ignored.")
                 return False
         except Exception as e:
-            print(f"An error has occured while reading the file {os.path.basename(filePath)} : {str(e)}. This file will be ignored.")
+            logger.warning(f"An error has occured while reading the file {os.path.basename(filePath)} : {str(e)}. This file will be ignored.")
             return False
         return True
 
@@ -221,13 +224,13 @@ class DialogImportSPoint(QtWidgets.QDialog, From_DialogImportSPoint):
         try:
             df = pd.read_csv(filePath)
             if df.shape[1] != 5 : #Date + 4 Temperatures
-                print(f"The number of columns in temperature file {os.path.basename(filePath)} doesn't match. This file will be ignored.")
+                logger.warning(f"The number of columns in temperature file {os.path.basename(filePath)} doesn't match. This file will be ignored.")
                 return False
             if df.dtypes[1]!=float64 or df.dtypes[2]!=float64 or df.dtypes[3]!=float64 or df.dtypes[4]!=float64: #the 4 temperatures must be floats
-                print(f"The Temperature columns are not floats in file {os.path.basename(filePath)}. This file will be ignored.")
+                logger.warning(f"The Temperature columns are not floats in file {os.path.basename(filePath)}. This file will be ignored.")
                 return False
         except Exception as e:
-            print(f"An error has occured while reading the file {os.path.basename(filePath)} : {str(e)}. This file will be ignored.")
+            logger.warning(f"An error has occured while reading the file {os.path.basename(filePath)} : {str(e)}. This file will be ignored.")
             return False
         return True
 
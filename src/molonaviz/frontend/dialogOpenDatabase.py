@@ -1,8 +1,8 @@
-from PyQt5 import QtWidgets, uic
+from PyQt5 import QtWidgets
 from ..utils.general import displayCriticalMessage
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
 
-From_DialogOpenDatabase = uic.loadUiType(get_ui_asset("dialogOpenDatabase.ui"))[0]
+From_DialogOpenDatabase = get_ui_class("dialogOpenDatabase.ui")
 class DialogOpenDatabase(QtWidgets.QDialog,From_DialogOpenDatabase):
     """
     Enable the user to choose the path of an existing database directory or to create a new database. This "or" is mutually exclusive (only one of these two actions may be made).
@@ -1,7 +1,7 @@
-from PyQt5 import QtWidgets, uic
-from ..utils.get_files import get_ui_asset
+from PyQt5 import QtWidgets
+from ..utils.get_files import get_ui_class
 
-From_DialogOpenSPoint = uic.loadUiType(get_ui_asset("dialogOpenSPoint.ui"))[0]
+From_DialogOpenSPoint = get_ui_class("dialogOpenSPoint.ui")
 class DialogOpenSPoint(QtWidgets.QDialog,From_DialogOpenSPoint):
     """
     Enable the user to choose a point to open from the ones already existing in the study.
@@ -1,7 +1,7 @@
-from PyQt5 import QtWidgets, uic
-from ..utils.get_files import get_ui_asset
+from PyQt5 import QtWidgets
+from ..utils.get_files import get_ui_class
 
-From_DialogOpenStudy = uic.loadUiType(get_ui_asset("dialogOpenStudy.ui"))[0]
+From_DialogOpenStudy = get_ui_class("dialogOpenStudy.ui")
 class DialogOpenStudy(QtWidgets.QDialog,From_DialogOpenStudy):
     """
     Enable the user to choose a study to open from the ones already existing in the database.
@@ -1,7 +1,6 @@
 import pandas as pd
 
-from PyQt5 import QtWidgets, uic
-from scipy import stats
+from PyQt5 import QtWidgets
 
 # from src.backend.SPointCoordinator import SPointCoordinator
 # from src.Containers import SamplingPoint
@@ -10,14 +9,14 @@ import numpy as np
 
 from .cleanupCanvases import CompareCanvas, SelectCanvas, createEmptyDf
 from ..utils.general import convertDates, displayCriticalMessage
-from ..utils.get_files import get_ui_asset
+from ..utils.get_files import get_ui_class
 
 from ..backend.SPointCoordinator import SPointCoordinator
 from ..interactions.Containers import SamplingPoint
 from ..interactions.InnerMessages import CleanupStatus
 
-From_DialogCleanup= uic.loadUiType(get_ui_asset("dialogCleanup.ui"))[0]
-From_DialogSelectPoints= uic.loadUiType(get_ui_asset("dialogSelectPoints.ui"))[0]
+From_DialogCleanup= get_ui_class("dialogCleanup.ui")
+From_DialogSelectPoints= get_ui_class("dialogSelectPoints.ui")
 
 class InvalidCSVStructure(Exception):
     pass
@@ -290,6 +289,7 @@ class DialogCleanup(QtWidgets.QDialog, From_DialogCleanup):
         """
         Applies IQR method to the total dataframe on variable varName. Return a list of the points which should be removed.
         """
+        from scipy import stats #scipy is slow to import: only import it when it is needed.
         mask = (np.abs(stats.zscore(self.data[varName])) > 3)
         return self.data[mask]
 
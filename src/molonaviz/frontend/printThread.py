@@ -1,7 +1,10 @@
-
+import logging
+import threading
+import time
 from PyQt5.QtCore import QObject, pyqtSignal
-from queue import Queue #Used only for type hints
+from queue import Queue, Empty
 
+MESSAGES_LOGGER = "molonaviz" #All the loggers of the package are children of this one.
 
 class InterceptOutput:
     """
@@ -22,17 +25,77 @@ class InterceptOutput:
         """
         pass
 
+class QueueLogHandler(logging.Handler):
+    """
+    A logging handler putting the formatted records in the queue of the application messages, so they are displayed with the messages printed.
+    Records can be emitted from any thread.
+    """
+    def __init__(self, queue : Queue):
+        logging.Handler.__init__(self)
+        self.queue = queue
+        self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s: %(message)s", datefmt="%H:%M:%S"))
+
+    def emit(self, record : logging.LogRecord):
+        try:
+            self.queue.put(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+def install_log_handler(queue : Queue, level : int = logging.INFO):
+    """
+    Send the messages logged by Molonaviz (logging.getLogger(__name__) in any module of the package) to the given queue. Return the handler, so it can be removed.
+    """
+    handler = QueueLogHandler(queue)
+    logger = logging.getLogger(MESSAGES_LOGGER)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    return handler
+
 class Receiver(QObject):
     """
     A QObject meant to run in its own QThread that waits for data to be pushed in its queue. When it has something in the queue, send it to the Main Thread by emitting a custom signal.
+    The text is sent in batches: once something is in the queue, the Receiver waits for interval seconds and sends everything which has been pushed in the meantime with only one signal. This way, many small messages (for example from a verbose computation) don't flood the event loop.
     """
     printMessage = pyqtSignal(str)
+    finished = pyqtSignal()
 
-    def __init__(self, queue : Queue):
+    def __init__(self, queue : Queue, interval : float = 0.1):
         QObject.__init__(self)
         self.queue = queue
+        self.interval = interval
+        self.stopEvent = threading.Event()
 
     def run(self):
+        while not self.stopEvent.is_set():
+            try:
+                chunks = [self.queue.get(timeout=self.interval)]
+            except Empty:
+                continue
+            deadline = time.monotonic() + self.interval
+            while not self.stopEvent.is_set() and (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    chunks.append(self.queue.get(timeout=remaining))
+                except Empty:
+                    break
+            self.sendBatch(chunks)
+        #Send what is left in the queue before stopping.
+        chunks = []
         while True:
-            text = self.queue.get()
+            try:
+                chunks.append(self.queue.get_nowait())
+            except Empty:
+                break
+        self.sendBatch(chunks)
+        self.finished.emit()
+
+    def sendBatch(self, chunks : list):
+        text = "".join(chunk for chunk in chunks if chunk is not None)
+        if text:
             self.printMessage.emit(text)
+
+    def stop(self):
+        """
+        Ask the Receiver to stop. This can be called from any thread: the Receiver sends what is left in the queue, then emits the finished signal.
+        """
+        self.stopEvent.set()
+        self.queue.put(None) #Wake up the Receiver if it is waiting
@@ -1,11 +1,10 @@
 from PyQt5 import QtWidgets
-from .SamplingPointViewer import SamplingPointViewer #Only used for type hints
 
 class SubWindow(QtWidgets.QMdiSubWindow):
     """
     Concrete class for a clean implementation of a subwindow in the case multiple points are opened at the same time.
     """
-    def __init__(self, wdg : SamplingPointViewer):
+    def __init__(self, wdg : QtWidgets.QWidget):
         # Call constructor of parent classes
         super(SubWindow, self).__init__()
         QtWidgets.QMdiSubWindow.__init__(self)
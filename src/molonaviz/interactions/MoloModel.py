@@ -2,6 +2,8 @@ from PyQt5 import QtCore
 from PyQt5.QtCore import QObject
 from PyQt5.QtSql import QSqlQuery #Used only for type hints
 
+from ..utils.profiling import profiled
+
 class MoloModel(QObject):
     """
     Abstract class representing a backend model onto which one or several views may be subscribed.
@@ -24,6 +26,7 @@ class MoloModel(QObject):
         self.reset_data()
         self.exec()
 
+    @profiled()
     def exec(self):
         """
         Execute all queries and notify the subscribed views that the data has been modified.
@@ -1,7 +1,7 @@
-from PyQt5 import QtWidgets, QtGui, QtCore, uic
-from PyQt5.QtSql import QSqlDatabase
+from PyQt5 import QtWidgets, QtGui, QtCore
 from queue import Queue
 import sys, os.path
+import logging
 from pathlib import Path
 
 from .frontend.dialogAboutUs import DialogAboutUs
@@ -16,17 +16,23 @@ from .frontend.StudyHandler import StudyHandler
 from .frontend.LabHandler import LabHandler
 
 from .backend.StudyAndLabManager import StudyAndLabManager
+from .backend.ConnectionManager import connection_manager
 
-from .frontend.printThread import InterceptOutput, Receiver
+from .frontend.printThread import InterceptOutput, Receiver, install_log_handler, MESSAGES_LOGGER
 from .frontend.MoloTreeView import ThermometerTreeView, PSensorTreeViewModel, ShaftTreeView, SamplingPointTreeView
 from .utils.general import InvalidFile, displayCriticalMessage, createDatabaseDirectory, checkDbFolderIntegrity, extractDetectorsDF
-from .utils.get_files import get_ui_asset, get_imgs, get_interactions_asset, get_docs
+from .utils.get_files import get_imgs, get_interactions_asset, get_docs, get_ui_class
+from .utils.profiling import enable_profiling, disable_profiling, add_listener
 
-From_MainWindow = uic.loadUiType(get_ui_asset("mainwindow.ui"))[0]
+From_MainWindow = get_ui_class("mainwindow.ui")
 class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
     """
     The main window of the Molonaviz application.
     """
+    profilingRecord = QtCore.pyqtSignal(dict) #Profiling records may come from any thread: they are displayed through this signal.
+    MAX_PROFILING_ROWS = 1000 #Maximum number of records displayed in the Performance dock
+    MAX_MESSAGE_LINES = 5000 #Maximum number of lines kept in the Application Messages dock: the oldest lines are removed first
+
     def __init__(self):
         # Call constructor of parent classes
         super(MainWindow, self).__init__()
@@ -60,9 +66,11 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
         self.actionCloseStudy.triggered.connect(self.closeStudy)
         self.actionImportSPoint.triggered.connect(self.importSPoint)
         self.actionOpenSPoint.triggered.connect(self.openSPointFromAction)
+        self.actionOpenDashboard.triggered.connect(self.openDashboard)
         self.actionHideShowSPoints.triggered.connect(self.changeDockSPointsStatus)
         self.actionHideShowSensors.triggered.connect(self.changeDockSensorsStatus)
         self.actionHideShowAppMessages.triggered.connect(self.changeDockAppMessagesStatus)
+        self.actionHideShowPerformance.triggered.connect(self.changeDockPerformanceStatus)
         self.actionSwitchToTabbedView.triggered.connect(self.switchToTabbedView)
         self.actionSwitchToSubWindowView.triggered.connect(self.switchToSubWindowView)
         self.actionSwitchToCascadeView.triggered.connect(self.switchToCascadeView)
@@ -70,17 +78,36 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
 
         self.treeViewDataSPoints.doubleClicked.connect(self.openSPointFromDock)
 
+        #Profiling
+        self.dockPerformance.hide()
+        self.tableWidgetPerformance.horizontalHeader().setStretchLastSection(True)
+        self.checkBoxEnableProfiling.toggled.connect(self.changeProfilingStatus)
+        self.pushButtonClearPerformance.clicked.connect(lambda : self.tableWidgetPerformance.setRowCount(0))
+        self.profilingRecord.connect(self.showProfilingRecord)
+        add_listener(self.profilingRecord.emit)
+
         #Some actions or menus should not be enabled: disable them
         self.actionCloseStudy.setEnabled(False)
         self.menuSPoint.setEnabled(False)
 
         #Setup the queue used to display application messages.
+        self.plainTextEditApplicationMessages.setMaximumBlockCount(self.MAX_MESSAGE_LINES)
         self.messageQueue = Queue()
         sys.stdout = InterceptOutput(self.messageQueue)
+        self.logHandler = install_log_handler(self.messageQueue)
 
         self.con = None #Connection to the database
         self.openDatabase()
 
+        #The messages are sent to the Application Messages dock by another thread, started once the database is open.
+        self.messageThread = QtCore.QThread()
+        self.messageReceiver = Receiver(self.messageQueue)
+        self.messageReceiver.printMessage.connect(self.printApplicationMessage)
+        self.messageReceiver.moveToThread(self.messageThread)
+        self.messageThread.started.connect(self.messageReceiver.run)
+        self.messageReceiver.finished.connect(self.messageThread.quit)
+        self.messageThread.start()
+
         self.study_lab_manager = StudyAndLabManager(self.con)
         self.currentStudy = None
         self.currentLab = None
@@ -131,9 +158,8 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
 
         #Now, databaseDir is the path to a valid folder containing a database. Open it!
         databaseFile = os.path.join(databaseDir,"Molonari.sqlite")
-        self.con = QSqlDatabase.addDatabase("QSQLITE")
-        self.con.setDatabaseName(databaseFile)
-        self.con.open()
+        self.connections = connection_manager(databaseFile)
+        self.con = self.connections.get_connection()
 
         self.showDatabaseName()
 
@@ -200,8 +226,9 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
         Close the database and revert Molonaviz to its initial state.
         """
         self.closeChildren()
-        self.con.close()
+        self.study_lab_manager = None
         self.con = None
+        self.connections.close_all()
 
         self.actionCreateStudy.setEnabled(True)
         self.actionOpenStudy.setEnabled(True)
@@ -210,12 +237,14 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
         self.actionImportSPoint.setEnabled(False)
         self.actionOpenSPoint.setEnabled(False)
         self.actionRemoveSPoint.setEnabled(False)
+        self.actionOpenDashboard.setEnabled(False)
         self.switchToSubWindowView()
 
         if os.path.isfile(os.path.join(os.path.dirname(__file__),'config.txt')):
             os.remove(os.path.join(os.path.dirname(__file__),'config.txt'))
 
         self.openDatabase()
+        self.study_lab_manager = StudyAndLabManager(self.con)
 
     def importLab(self):
         """
@@ -299,6 +328,7 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
         self.actionImportSPoint.setEnabled(True)
         self.actionOpenSPoint.setEnabled(True)
         self.actionRemoveSPoint.setEnabled(True)
+        self.actionOpenDashboard.setEnabled(True)
 
     def closeStudy(self):
         """
@@ -316,6 +346,7 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
         self.actionImportSPoint.setEnabled(False)
         self.actionOpenSPoint.setEnabled(False)
         self.actionRemoveSPoint.setEnabled(False)
+        self.actionOpenDashboard.setEnabled(False)
 
     def importSPoint(self):
         """
@@ -370,6 +401,18 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
 
         self.switchToSubWindowView()
 
+    def openDashboard(self):
+        """
+        Open a subwindow displaying the summary of all the points in the current study.
+        This function may only be called if a study is opened, ie if self.currentStudy is not None.
+        """
+        dashboard = self.currentStudy.openDashboard()
+        subwindow = SubWindow(dashboard)
+        self.mdiArea.addSubWindow(subwindow)
+        subwindow.show()
+
+        self.switchToSubWindowView()
+
     def switchToTabbedView(self):
         """
         Rearrange the subwindows to display them as tabs.
@@ -426,15 +469,59 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
         else :
             self.dockAppMessages.hide()
 
+    def changeDockPerformanceStatus(self):
+        """
+        Hide or show the dock displaying the profiling records.
+        """
+        if self.actionHideShowPerformance.isChecked():
+            self.dockPerformance.show()
+        else :
+            self.dockPerformance.hide()
+
+    def changeProfilingStatus(self, enabled : bool):
+        """
+        Enable or disable profiling. The records are also written in the profiling.jsonl file next to main.py.
+        """
+        if enabled:
+            enable_profiling(os.path.join(os.path.dirname(__file__), 'profiling.jsonl'))
+        else:
+            disable_profiling()
+
+    def showProfilingRecord(self, record : dict):
+        """
+        Add a profiling record at the bottom of the Performance dock.
+        """
+        table = self.tableWidgetPerformance
+        if table.rowCount() >= self.MAX_PROFILING_ROWS:
+            table.removeRow(0)
+        row = table.rowCount()
+        table.insertRow(row)
+        memory = record.get("memory")
+        values = [record["name"], f"{record['duration']:.4f}", str(record.get("rows", "")), "" if memory is None else f"{memory/1e6:.2f}", record["thread"]]
+        for column, value in enumerate(values):
+            table.setItem(row, column, QtWidgets.QTableWidgetItem(value))
+        table.scrollToBottom()
+
     def printApplicationMessage(self, text : str):
         """
-        Show in the corresponding dock a message which needs to be displayed. This means that the program called the print() method somewhere.
+        Show in the corresponding dock a message which needs to be displayed. This means that the program called the print() method or logged a message somewhere.
         """
-        self.textEditApplicationMessages.moveCursor(QtGui.QTextCursor.End)
-        self.textEditApplicationMessages.insertPlainText(text)
+        self.plainTextEditApplicationMessages.moveCursor(QtGui.QTextCursor.End)
+        self.plainTextEditApplicationMessages.insertPlainText(text)
+        self.plainTextEditApplicationMessages.moveCursor(QtGui.QTextCursor.End)
 
     def clearText(self):
-        self.textEditApplicationMessages.clear()
+        self.plainTextEditApplicationMessages.clear()
+
+    def stopApplicationMessages(self):
+        """
+        Give back sys.stdout and stop the thread displaying the application messages.
+        """
+        sys.stdout = sys.__stdout__
+        logging.getLogger(MESSAGES_LOGGER).removeHandler(self.logHandler)
+        self.messageReceiver.stop()
+        self.messageThread.quit()
+        self.messageThread.wait()
 
     def aboutUs(self):
         """
@@ -445,14 +532,16 @@ class MainWindow(QtWidgets.QMainWindow,From_MainWindow):
 
     def closeEvent(self, event):
         """
-        Close the database when user quits the app.
+        Close the database and stop the thread displaying the application messages when user quits the app.
         """
         try:
             self.closeChildren()
-            self.con.close()
+            self.study_lab_manager = None
             self.con = None
+            self.connections.close_all()
         except Exception as e:
             pass
+        self.stopApplicationMessages()
         super().close()
 
     def openUserGuideFR(self):
@@ -467,13 +556,4 @@ def main():
     app.setWindowIcon(QtGui.QIcon(get_imgs("MolonavizIcon.png")))
     mainWin = MainWindow()
     mainWin.showMaximized()
-
-    # Create thread that will be used to display application messages.
-    messageThread = QtCore.QThread()
-    my_receiver = Receiver(mainWin.messageQueue)
-    my_receiver.printMessage.connect(mainWin.printApplicationMessage)
-    my_receiver.moveToThread(messageThread)
-    messageThread.started.connect(my_receiver.run)
-    messageThread.start()
-
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Generate the Python classes of the .ui files, so the XML doesn't have to be parsed every time Molonaviz is launched.
+The classes are written in frontend/ui/compiled, one module per .ui file. Every module also holds a hash of the .ui file it was generated from: if the .ui file is modified afterwards, the module is ignored (see get_ui_class).
+This is done when the package is built. It can also be done by hand after modifying a .ui file:
+    python -m molonaviz.utils.compile_ui
+This module should only depend on PyQt5, as it may be run before Molonaviz is installed.
+"""
+import hashlib
+import io
+import os
+import re
+
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend", "ui")
+COMPILED_DIR = os.path.join(UI_DIR, "compiled")
+
+def ui_hash(uiFile : str):
+    """
+    Return the hash of the content of a .ui file.
+    """
+    with open(uiFile, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def compile_ui_files(uiDir : str = UI_DIR, compiledDir : str = COMPILED_DIR):
+    """
+    Generate a module in compiledDir for every .ui file in uiDir. Return the number of generated modules.
+    """
+    from PyQt5 import uic
+    os.makedirs(compiledDir, exist_ok=True)
+    initFile = os.path.join(compiledDir, "__init__.py")
+    if not os.path.isfile(initFile):
+        open(initFile, "w").close()
+    nb_compiled = 0
+    for fileName in sorted(os.listdir(uiDir)):
+        if not fileName.endswith(".ui"):
+            continue
+        uiFile = os.path.join(uiDir, fileName)
+        code = io.StringIO()
+        with open(uiFile, "r") as f:
+            uic.compileUi(f, code)
+        className = re.search(r"^class (Ui_\w+)\(object\):", code.getvalue(), re.MULTILINE).group(1)
+        with open(os.path.join(compiledDir, f"{fileName[:-3]}.py"), "w") as f:
+            f.write(code.getvalue())
+            f.write(f"\nUI_CLASS = {className}\nUI_HASH = \"{ui_hash(uiFile)}\"\n")
+        nb_compiled += 1
+    return nb_compiled
+
+if __name__ == "__main__":
+    print(f"{compile_ui_files()} .ui files have been compiled in {COMPILED_DIR}")
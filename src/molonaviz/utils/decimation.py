@@ -0,0 +1,125 @@
+"""
+Level-of-detail helpers used by the views to draw long time series without sending every sample to matplotlib.
+"""
+import numpy as np
+
+class MinMaxPyramid:
+    """
+    A multi-resolution min/max pyramid built once for a time series (x must be sorted in increasing order).
+    Level 0 is the raw series. Each level k >= 1 splits the series into blocks of factor**k consecutive samples and stores, for every block, the index of its smallest and of its largest value.
+    Given a visible x-range and a number of pixels, decimate returns at most about 2 points per pixel, always keeping the extreme values of every block so that spikes are never lost.
+    """
+    def __init__(self, x, y, factor : int = 4):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y)
+        self.factor = factor
+        self.levels = [] #levels[k-1] = (indices of the minimums, indices of the maximums) for blocks of size factor**k
+        self.build()
+
+    def build(self):
+        """
+        Compute all levels of the pyramid, stopping when a level only holds one block.
+        """
+        n = self.y.shape[0]
+        if n == 0:
+            return
+        #NaN values would break argmin/argmax: replace them by the opposite infinity so they are never picked.
+        ymin = np.where(np.isnan(self.y), np.inf, self.y)
+        ymax = np.where(np.isnan(self.y), -np.inf, self.y)
+        imin = np.arange(n)
+        imax = np.arange(n)
+        while imin.shape[0] > 1:
+            imin = self.reduce(imin, ymin, np.argmin)
+            imax = self.reduce(imax, ymax, np.argmax)
+            self.levels.append((imin, imax))
+
+    def reduce(self, indices, values, argfunction):
+        """
+        Group the given indices by blocks of self.factor elements and keep, for each block, the index selected by argfunction.
+        """
+        nb_blocks = -(-indices.shape[0] // self.factor) #Ceil division
+        padded = np.empty(nb_blocks * self.factor, dtype=indices.dtype)
+        padded[:indices.shape[0]] = indices
+        padded[indices.shape[0]:] = indices[-1] #Repeat the last index so the last block is full
+        blocks = padded.reshape(nb_blocks, self.factor)
+        selected = argfunction(values[blocks], axis=1)
+        return blocks[np.arange(nb_blocks), selected]
+
+    def decimate(self, xmin : float | None = None, xmax : float | None = None, nb_pixels : int = 1000):
+        """
+        Return the x and y arrays which should be drawn for the range [xmin, xmax] on a canvas nb_pixels wide.
+        One sample is kept on each side of the range so the curve reaches the edges of the axes.
+        """
+        n = self.y.shape[0]
+        if n == 0:
+            return self.x, self.y
+        start = 0 if xmin is None else max(int(np.searchsorted(self.x, xmin, side="left")) - 1, 0)
+        end = n if xmax is None else min(int(np.searchsorted(self.x, xmax, side="right")) + 1, n)
+        nb_pixels = max(int(nb_pixels), 1)
+        if end - start <= 2 * nb_pixels:
+            return self.x[start:end], self.y[start:end]
+
+        #Smallest level whose blocks are at least as large as a pixel.
+        level = int(np.ceil(np.log((end - start) / nb_pixels) / np.log(self.factor)))
+        level = min(max(level, 1), len(self.levels))
+        block_size = self.factor ** level
+        imin, imax = self.levels[level - 1]
+        first_block = start // block_size
+        last_block = min((end - 1) // block_size + 1, imin.shape[0])
+        indices = np.concatenate(([start], imin[first_block:last_block], imax[first_block:last_block], [end - 1]))
+        indices = np.unique(indices) #Sorted and without duplicates
+        indices = indices[(indices >= start) & (indices < end)]
+        return self.x[indices], self.y[indices]
+
+class ImagePyramid:
+    """
+    A multi-resolution pyramid for a 2D map whose columns are regularly spaced along the x-axis (for example a heat map where rows are depths and columns are dates).
+    Level 0 is the full map. Level k averages blocks of factor**k consecutive columns: levels are only computed the first time they are needed.
+    Every level is cut into tiles of tile_width columns. Given a visible x-range and a number of pixels, view returns the tiles covering this range at the coarsest level which still gives at least one column per pixel, so the image sent to matplotlib never has to be much wider than the screen.
+    """
+    def __init__(self, x, image, factor : int = 2, tile_width : int = 256):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.levels = {0 : np.asarray(image)}
+        self.factor = factor
+        self.tile_width = tile_width
+        self.nb_columns = self.levels[0].shape[1]
+        #Columns are spread evenly between the first and last value of x, as imshow does with an extent.
+        self.column_width = (self.x[-1] - self.x[0]) / self.nb_columns if self.nb_columns > 0 else 0
+
+    def level(self, k : int):
+        """
+        Return the map at level k, computing it from level k-1 if needed.
+        """
+        if k not in self.levels:
+            previous = self.level(k - 1)
+            nb_blocks = -(-previous.shape[1] // self.factor) #Ceil division
+            #Repeat the last column so the last block is full.
+            padded = np.pad(previous, ((0, 0), (0, nb_blocks * self.factor - previous.shape[1])), mode="edge")
+            self.levels[k] = padded.reshape(previous.shape[0], nb_blocks, self.factor).mean(axis=2)
+        return self.levels[k]
+
+    def max_level(self):
+        """
+        Return the coarsest level which still has more than one column.
+        """
+        return max(int(np.ceil(np.log(max(self.nb_columns, 1)) / np.log(self.factor))) - 1, 0)
+
+    def view(self, xmin : float, xmax : float, nb_pixels : int):
+        """
+        Return a tuple (image, (left, right), key) where image is the part of the map which should be displayed for the range [xmin, xmax] on a canvas nb_pixels wide, and (left, right) are the x-coordinates of its edges.
+        key identifies the tiles used: if it did not change since the last call, there is no need to update the image.
+        """
+        first = int(np.clip(np.floor((xmin - self.x[0]) / self.column_width), 0, self.nb_columns - 1)) if self.column_width > 0 else 0
+        last = int(np.clip(np.ceil((xmax - self.x[0]) / self.column_width), first + 1, self.nb_columns)) if self.column_width > 0 else self.nb_columns
+        k = int(np.floor(np.log(max((last - first) / max(nb_pixels, 1), 1)) / np.log(self.factor)))
+        k = min(k, self.max_level())
+        block_size = self.factor ** k
+        level = self.level(k)
+
+        first_tile = (first // block_size) // self.tile_width
+        last_tile = -(-(last // block_size + 1) // self.tile_width) #Ceil division
+        start = first_tile * self.tile_width
+        end = min(last_tile * self.tile_width, level.shape[1])
+        left = self.x[0] + start * block_size * self.column_width
+        right = self.x[0] + min(end * block_size, self.nb_columns) * self.column_width
+        return level[:, start:end], (left, right), (k, first_tile, last_tile)
@@ -1,17 +1,19 @@
 """
 Some useful functions which can be used throughout the code.
 """
+import logging
 from PyQt5 import QtWidgets
 import os
 from datetime import datetime
 import pandas as pd
 import numpy as np
-import matplotlib.dates as mdates
 from PyQt5.QtSql import QSqlDatabase, QSqlQuery
 from shutil import copy2
 import glob
 
+from .profiling import profiled, count_rows
 
+logger = logging.getLogger(__name__)
 
 def displayCriticalMessage(mainMessage: str, infoMessage: str = ''):
     """
@@ -90,7 +92,7 @@ def extractDetectorsDF(labDirPath):
             else:
                 raise InvalidFile
         except Exception as e:
-            print("Couldn't load thermometer ", file)
+            logger.warning(f"Couldn't load thermometer {file}")
 
     psdir = os.path.join(labDirPath, "pressure_sensors", "*.csv")
     files = glob.glob(psdir)
@@ -104,7 +106,7 @@ def extractDetectorsDF(labDirPath):
             else:
                 raise InvalidFile
         except Exception as e:
-            print("Couldn't load pressure sensor ", file)
+            logger.warning(f"Couldn't load pressure sensor {file}")
 
     shaftdir = os.path.join(labDirPath, "shafts", "*.csv")
     files = glob.glob(shaftdir)
@@ -118,7 +120,7 @@ def extractDetectorsDF(labDirPath):
             else:
                 raise InvalidFile
         except Exception as e:
-            print("Couldn't load shaft ", file)
+            logger.warning(f"Couldn't load shaft {file}")
     rejected = checkDetectorsIntegrity(validThermometers, validPSensors, validShafts)
     if len(rejected) == 0:
         return validThermometers, validPSensors, validShafts
@@ -140,6 +142,7 @@ def checkDetectorsIntegrity(thermos : list[pd.DataFrame], psensors : list[pd.Dat
             rejected.append(shaft)
     return rejected
 
+@profiled()
 def convertDates(df : pd.DataFrame, timesIndex = 0):
     """
     Convert dates from a list of strings by testing several different input formats
@@ -168,6 +171,7 @@ def convertDates(df : pd.DataFrame, timesIndex = 0):
                "%m:%d:%Y %H:%M:%S", "%m:%d:%Y %I:%M:%S %p",None)
 
     times = df[df.columns[timesIndex]]
+    count_rows(len(times))
     for f in formats:
         try:
             # Convert strings to datetime objects
@@ -206,17 +210,38 @@ def databaseDateToDatetime(date : str):
         return [databaseDateToDatetime(d) for d in date]
     return datetime.strptime(date, databaseDateFormat())
 
+def databaseDatesToDatetime64(dates):
+    """
+    Given a list or an array of dates in the database format (YYYY/MM/DD HH:MM:SS), return the corresponding numpy array of datetime64.
+    All dates are parsed at once, which is much faster than calling databaseDateToDatetime on every date. If the dates already are datetime64, they are returned as is.
+    """
+    dates = np.asarray(dates)
+    if dates.dtype.kind == "M":
+        return dates
+    if dates.shape[0] == 0:
+        return np.array([], dtype="datetime64[ns]")
+    return pd.to_datetime(dates, format=databaseDateFormat()).to_numpy()
+
+def datetime64ToDatabaseDate(date : np.datetime64):
+    """
+    Given a datetime64, return a date (string) in the database format (YYYY/MM/DD HH:MM:SS).
+    """
+    return pd.Timestamp(date).strftime(databaseDateFormat())
+
 def datetimeToDatabaseDate(date : datetime):
     """
     Given a datetime oject, return a date (string) in the database format (YYYY/MM/DD HH:MM:SS).
     """
     return date.strftime(databaseDateFormat())
 
-def dateToMdates(dates : list[str]):
+def dateToMdates(dates):
     """
-    Given a list of datetime objects, return the corresponding list of matplotlib dates.
+    Given a list of datetime objects or an array of datetime64, return the corresponding array of matplotlib dates.
     """
-    return [mdates.date2num(date) for date in dates]
+    if len(dates) == 0:
+        return np.array([])
+    import matplotlib.dates as mdates #Only imported when a graph is drawn, as matplotlib is slow to import.
+    return mdates.date2num(np.asarray(dates))
 
 def build_picture(oneDArray : np.array, nb_cells=100):
     """
@@ -1,31 +1,52 @@
 """
 This file holds different methods to import or get files from the molonaviz package more easily.
 """
+import os
+from importlib import import_module, resources
 
-from pkg_resources import resource_filename
+from .compile_ui import ui_hash
+
+#Set the environment variable MOLONAVIZ_COMPILED_UI to 0 to always load the .ui files with uic (this is slower).
+USE_COMPILED_UI = os.environ.get("MOLONAVIZ_COMPILED_UI", "1") != "0"
 
 def get_docs(filename):
     """
     Get the corresponding image from the docs/ folder.
     Ex: get_docs(ERD.png)
     """
-    return resource_filename("molonaviz.docs", filename)
+    return str(resources.files("molonaviz.docs") / filename)
 
 def get_imgs(filename):
     """
     Get the corresponding image from the imgs/ folder.
     Ex: get_imgs(MolonavizIcon.png)
     """
-    return resource_filename("molonaviz.imgs", filename)
+    return str(resources.files("molonaviz.imgs") / filename)
 
 def get_ui_asset(filename):
     """
     Get the corresponding image from the frontend/ui folder.
     """
-    return resource_filename("molonaviz.frontend.ui", filename)
+    return str(resources.files("molonaviz.frontend.ui") / filename)
 
 def get_interactions_asset(filename):
     """
     Get the corresponding image from the frontend/ui folder.
     """
-    return resource_filename("molonaviz.interactions", filename)
\ No newline at end of file
+    return str(resources.files("molonaviz.interactions") / filename)
+
+def get_ui_class(filename):
+    """
+    Return the class generated from the given .ui file, which can be used as a base class for a widget (it has a setupUi method).
+    If the class was generated when building the package (see utils/compile_ui.py) and the .ui file hasn't changed since, it is imported directly. Otherwise, the .ui file is loaded with uic, which is much slower.
+    """
+    uiFile = get_ui_asset(filename)
+    if USE_COMPILED_UI:
+        try:
+            module = import_module(f"molonaviz.frontend.ui.compiled.{os.path.splitext(filename)[0]}")
+            if module.UI_HASH == ui_hash(uiFile):
+                return module.UI_CLASS
+        except (ImportError, AttributeError):
+            pass
+    from PyQt5 import uic
+    return uic.loadUiType(uiFile)[0]
@@ -0,0 +1,134 @@
+"""
+Lightweight instrumentation used to find out where the time goes in Molonaviz.
+A piece of code can be measured with the timed context manager or the profiled decorator. When profiling is enabled, every measure gives a record with:
+    -name: the name of the measured code
+    -duration: the wall time, in seconds
+    -rows: the number of rows processed, if the code reported it with count_rows
+    -memory: the memory allocated (or freed, if negative) by Python and numpy during the measure, in bytes
+    -thread: the name of the thread running the code
+Records are written to a rotating JSON-lines log and given to all listeners (see add_listener).
+Profiling is disabled by default: in this case, the decorator directly calls the function and the context manager does nothing.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+_enabled = False
+_listeners = []
+_local = threading.local() #Stack of the records being measured in the current thread
+_logger = logging.getLogger("molonaviz.profiling")
+_logger.propagate = False #Records only go to the log file, never to the console
+logger = logging.getLogger(__name__) #Messages for the user, unlike the records
+
+def enable_profiling(logFile : str | None = None, maxBytes : int = 5*1024*1024, backupCount : int = 3):
+    """
+    Enable profiling. If logFile is not None, records are appended to this file (one JSON object per line): when the file is larger than maxBytes, it is renamed and a new file is started. At most backupCount old files are kept.
+    Memory is traced with tracemalloc, which makes Python code slower: profiling should only be enabled to investigate performance.
+    """
+    global _enabled
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    if logFile is not None:
+        handler = RotatingFileHandler(logFile, maxBytes=maxBytes, backupCount=backupCount)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.INFO)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+def disable_profiling():
+    """
+    Disable profiling and close the log file.
+    """
+    global _enabled
+    _enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+
+def is_profiling_enabled():
+    return _enabled
+
+def add_listener(listener):
+    """
+    Call listener(record) every time a measure is over. Records can be given from any thread: a listener updating the UI should go through a Qt signal.
+    """
+    _listeners.append(listener)
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def count_rows(nb_rows : int):
+    """
+    Add nb_rows to the number of rows processed by the innermost measure running in this thread. Does nothing if profiling is disabled.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1]["rows"] = stack[-1].get("rows", 0) + nb_rows
+
+@contextmanager
+def timed(name : str):
+    """
+    Measure the code in the with block.
+    """
+    if not _enabled:
+        yield
+        return
+    record = {"name" : name, "start" : datetime.now().isoformat(timespec="milliseconds"), "thread" : threading.current_thread().name}
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(record)
+    memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record["duration"] = time.perf_counter() - start
+        if memory is not None and tracemalloc.is_tracing():
+            record["memory"] = tracemalloc.get_traced_memory()[0] - memory
+        stack.pop()
+        _publish(record)
+
+def profiled(name : str | None = None):
+    """
+    Decorator measuring every call of a function. By default, the record is named after the function: for methods, the name of the class of the instance is used, so that overloaded methods can be told apart.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            recordName = name
+            if recordName is None:
+                if "." in func.__qualname__ and len(args) > 0:
+                    recordName = f"{type(args[0]).__name__}.{func.__name__}"
+                else:
+                    recordName = func.__qualname__
+            with timed(recordName):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _publish(record : dict):
+    """
+    Write the record in the log and give it to the listeners.
+    """
+    if _logger.handlers:
+        _logger.info(json.dumps(record))
+    for listener in list(_listeners):
+        try:
+            listener(record)
+        except Exception as e:
+            logger.warning(f"Couldn't display a profiling record: {e}")